@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for the pipeline state.
+Each input is summarized in a fresh subprocess against the local fake LLM
+server, reporting peak RSS and the peak of Python allocations. With
+``--baseline`` the same inputs also run against another checkout (e.g. a git
+worktree of an older commit) for before/after numbers. The retained size of the
+chunk list alone is compared for offset-based chunks and per-chunk Document
+copies.
+
+Usage:
+    git worktree add /tmp/summarizer-before <commit>
+    python benchmarks/bench_memory.py --baseline /tmp/summarizer-before --sizes 20000 100000
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import tracemalloc
+from typing import Any, Dict, List, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bench_pipeline import INPUT_TYPES, synthetic_document
+from fake_llm_server import FakeLLMServer
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def list_inputs(sizes: List[int]) -> List[Tuple[str, str, str]]:
+    """Sample files plus synthetic documents as (name, input type, content or word count)"""
+    inputs = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "samples", "*"))):
+        input_type = INPUT_TYPES.get(os.path.splitext(path)[1].lower())
+        if input_type:
+            inputs.append((os.path.basename(path), input_type, path))
+    for words in sizes:
+        inputs.append((f"synthetic-{words}", "synthetic", str(words)))
+    return inputs
+
+
+def run_worker(root: str, input_type: str, content: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Summarize one input with the checkout at ``root`` inside the current process"""
+    sys.path.insert(0, root)
+    from src.pipeline import run_pipeline, shutdown_pipeline
+    
+    if input_type == "synthetic":
+        input_type, content = "text", synthetic_document(int(content), seed=int(content))
+    rss_before = peak_rss_mb()
+    
+    async def run() -> Dict[str, Any]:
+        try:
+            return await run_pipeline(input_type, content, **options)
+        finally:
+            await shutdown_pipeline()
+    
+    tracemalloc.start()
+    state = asyncio.run(run())
+    python_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    tracemalloc.stop()
+    
+    return {
+        "summaries": len(state.get("summaries", [])),
+        "rss_before_mb": round(rss_before, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "peak_python_mb": round(python_peak, 2),
+    }
+
+
+def retained_mb(build) -> Tuple[Any, float]:
+    """Build an object and measure the Python memory it keeps allocated"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = build()
+    retained = (tracemalloc.get_traced_memory()[0] - before) / (1024 * 1024)
+    tracemalloc.stop()
+    return value, retained
+
+
+def compare_chunk_storage(input_type: str, content: str, chunk_size: int, chunk_overlap: int) -> Dict[str, Any]:
+    """Retained size of the documents, offset-based chunks and per-chunk Document copies"""
+    sys.path.insert(0, ROOT)
+    from langchain_core.documents import Document
+    from src.loaders.content_loader import iter_documents
+    from src.utils.text_splitter import split_documents
+    
+    if input_type == "synthetic":
+        input_type, content = "text", synthetic_document(int(content), seed=int(content))
+    
+    # Load and split once first so imports and the tokenizer load are not counted
+    split_documents(list(iter_documents(input_type, content)), chunk_size, chunk_overlap)
+    documents, documents_mb = retained_mb(lambda: list(iter_documents(input_type, content)))
+    chunks, offsets_mb = retained_mb(lambda: split_documents(documents, chunk_size, chunk_overlap))
+    # The previous representation: one Document with a copied string and metadata per chunk
+    _, copies_mb = retained_mb(lambda: [
+        Document(page_content=chunk.page_content, metadata=dict(chunk.metadata)) for chunk in chunks
+    ])
+    
+    return {
+        "chunks": len(chunks),
+        "documents_mb": round(documents_mb, 2),
+        "offset_chunks_mb": round(offsets_mb, 2),
+        "document_chunks_mb": round(copies_mb, 2),
+    }
+
+
+def run_in_subprocess(root: str, input_type: str, content: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """Run one input in a fresh interpreter so peak RSS is not shared between runs"""
+    process = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", root, "--input-type", input_type,
+         "--content", content, "--chunk-size", str(args.chunk_size), "--chunk-overlap", str(args.chunk_overlap),
+         "--max-concurrency", str(args.max_concurrency)],
+        capture_output=True, text=True, cwd=root
+    )
+    if process.returncode != 0:
+        error = process.stderr.strip().splitlines()[-1] if process.stderr.strip() else "unknown error"
+        return {"error": error}
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure peak memory of the pipeline, optionally against an older checkout")
+    parser.add_argument("--baseline", default=None, help="Checkout to compare against, e.g. a git worktree of an older commit")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[20000, 100000], help="Synthetic document sizes in words")
+    parser.add_argument("--chunk-size", type=int, default=150)
+    parser.add_argument("--chunk-overlap", type=int, default=15)
+    parser.add_argument("--max-concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--output", default=None, help="Write JSON results to this file")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--input-type", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--content", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    # Measure the pipeline, not the response cache or the chunk store
+    os.environ["OPENROUTER_API_KEY"] = os.getenv("OPENROUTER_API_KEY") or "benchmark"
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    
+    if args.worker:
+        options = {
+            "chunk_size": args.chunk_size,
+            "chunk_overlap": args.chunk_overlap,
+            "max_summary_length": 5,
+            "max_concurrency": args.max_concurrency,
+        }
+        print(json.dumps(run_worker(args.worker, args.input_type, args.content, options)))
+        return
+    
+    roots = [("current", ROOT)]
+    if args.baseline:
+        roots.insert(0, ("baseline", os.path.abspath(args.baseline)))
+    
+    server = FakeLLMServer(latency_ms=args.latency_ms, tokens_per_second=0, seed=0).start()
+    os.environ["OPENROUTER_BASE_URL"] = server.base_url
+    
+    results = []
+    try:
+        for name, input_type, content in list_inputs(args.sizes):
+            result = {"input": name, "runs": {}}
+            for label, root in roots:
+                result["runs"][label] = run_in_subprocess(root, input_type, content, args)
+            result["state"] = compare_chunk_storage(input_type, content, args.chunk_size, args.chunk_overlap)
+            results.append(result)
+    finally:
+        server.stop()
+    
+    print(f"{'input':<24}{'tree':<10}{'peak RSS MB':>12}{'python MB':>11}")
+    for result in results:
+        for label, run in result["runs"].items():
+            if "error" in run:
+                print(f"{result['input']:<24}{label:<10}error: {run['error']}")
+                continue
+            print(f"{result['input']:<24}{label:<10}{run['peak_rss_mb']:>12}{run['peak_python_mb']:>11}")
+    
+    print(f"\n{'input':<24}{'chunks':>8}{'documents MB':>14}{'offsets MB':>12}{'Documents MB':>14}")
+    for result in results:
+        state = result["state"]
+        print(f"{result['input']:<24}{state['chunks']:>8}{state['documents_mb']:>14}"
+              f"{state['offset_chunks_mb']:>12}{state['document_chunks_mb']:>14}")
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark for parallel PDF extraction.
+The sample PDFs and synthetic PDFs of growing page counts are extracted
+sequentially by PyPDFLoader and in parallel by ``PDFLoader`` with several
+worker counts (pool startup included), reporting the median time, pages per
+second and speedup. The default configuration, which extracts small files
+sequentially, is measured too. Every run's pages are checked against
+PyPDFLoader's, text and metadata.
+
+Usage:
+    python benchmarks/bench_pdf.py --pages 50 200 800 --workers 2 4 8 --runs 3 --output bench_pdf.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_pipeline import synthetic_document
+
+
+def write_synthetic_pdf(path: str, pages: int, lines_per_page: int = 60, seed: int = 0):
+    """Write a PDF of ``pages`` pages of Helvetica text lines without a PDF library"""
+    words = synthetic_document(pages * lines_per_page * 12, seed=seed).split()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Page tree, written once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page in range(pages):
+        lines = []
+        for line in range(lines_per_page):
+            start = (page * lines_per_page + line) * 12
+            lines.append(f"({' '.join(words[start:start + 12])}) Tj T*")
+        stream = f"BT /F1 10 Tf 12 TL 40 800 Td {' '.join(lines)} ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects))
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode("latin-1")
+    
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+def extract(path: str, workers: int, min_pages: int) -> Tuple[float, List[Any]]:
+    """Extract all pages with ``PDFLoader`` and return the elapsed seconds and the pages"""
+    from src.loaders.pdf_loader import PDFLoader
+    
+    started = time.perf_counter()
+    documents = PDFLoader(path, workers=workers, min_pages=min_pages).load()
+    return time.perf_counter() - started, documents
+
+
+def measure(path: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """Time sequential, default and parallel extraction of one PDF and check the pages"""
+    from langchain_community.document_loaders import PyPDFLoader
+    from src.loaders.pdf_loader import get_parallel_min_pages, get_pdf_workers
+    
+    expected = [(document.page_content, document.metadata) for document in PyPDFLoader(path).load()]
+    configurations = [("sequential", 1, 0), ("default", get_pdf_workers(), get_parallel_min_pages())]
+    configurations += [(f"{workers} workers", workers, 0) for workers in args.workers]
+    
+    runs = {}
+    for label, workers, min_pages in configurations:
+        times = []
+        identical = True
+        for _ in range(args.runs):
+            seconds, documents = extract(path, workers, min_pages)
+            times.append(seconds)
+            identical = identical and [(document.page_content, document.metadata) for document in documents] == expected
+        median = statistics.median(times)
+        runs[label] = {
+            "workers": workers,
+            "median_s": round(median, 3),
+            "pages_per_s": round(len(expected) / median, 1) if median else None,
+            "identical": identical,
+        }
+    
+    baseline = runs["sequential"]["median_s"]
+    for run in runs.values():
+        run["speedup"] = round(baseline / run["median_s"], 2) if run["median_s"] else None
+    return {"pages": len(expected), "runs": runs}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sequential and multi-process PDF text extraction")
+    parser.add_argument("--pages", type=int, nargs="*", default=[50, 200, 800], help="Page counts of synthetic PDFs")
+    parser.add_argument("--workers", type=int, nargs="*", default=[2, 4, os.cpu_count() or 1], help="Worker counts to measure")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per configuration; the median is reported")
+    parser.add_argument("--output", default=None, help="Write JSON results to this file")
+    args = parser.parse_args()
+    args.workers = sorted(set(workers for workers in args.workers if workers > 1))
+    
+    inputs = sorted(glob.glob(os.path.join(ROOT, "samples", "*.pdf")))
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for pages in args.pages:
+            path = os.path.join(directory, f"synthetic-{pages}p.pdf")
+            write_synthetic_pdf(path, pages, seed=pages)
+            inputs.append(path)
+        
+        for path in inputs:
+            result = measure(path, args)
+            result["input"] = os.path.basename(path)
+            results.append(result)
+    
+    print(f"CPUs: {os.cpu_count()}\n")
+    print(f"{'input':<24}{'pages':>6}  {'mode':<14}{'median s':>10}{'pages/s':>10}{'speedup':>9}  identical")
+    for result in results:
+        for label, run in result["runs"].items():
+            print(f"{result['input']:<24}{result['pages']:>6}  {label:<14}{run['median_s']:>10}"
+                  f"{run['pages_per_s']:>10}{run['speedup']:>9}  {run['identical']}")
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"cpus": os.cpu_count(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
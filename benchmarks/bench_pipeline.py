@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+End-to-end pipeline benchmark against the local fake LLM server.
+Runs the pipeline over the files in samples/ and synthetic documents of
+increasing size, and reports per-stage latency, end-to-end p50/p95, LLM calls
+per document and peak memory as JSON. With ``--hedge`` slow map calls are
+hedged and the hedging done and the p99 latency it saved are reported too.
+
+Usage:
+    python benchmarks/bench_pipeline.py --runs 5 --sizes 1000 5000 20000 --output bench_pipeline.json
+    python benchmarks/bench_pipeline.py --jitter 1.0 --sizes 20000 --hedge
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fake_llm_server import FakeLLMServer
+
+VOCABULARY = (
+    "model data patient system health care clinical research result study analysis "
+    "network company market growth report revenue product customer team quarter "
+    "learning algorithm training evaluation risk policy outcome process design value"
+).split()
+
+INPUT_TYPES = {".pdf": "pdf", ".txt": "textfile", ".md": "textfile"}
+
+
+def synthetic_document(words: int, seed: int) -> str:
+    """Generate a reproducible document of roughly ``words`` words"""
+    rng = random.Random(seed)
+    sentences = []
+    count = 0
+    while count < words:
+        length = rng.randint(8, 20)
+        sentence = " ".join(rng.choice(VOCABULARY) for _ in range(length))
+        sentences.append(sentence.capitalize() + ".")
+        count += length
+    return " ".join(sentences)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+async def run_once(input_type: str, content: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Run the pipeline once, timing each node from its stream update"""
+    from src.pipeline import build_initial_state, get_app
+    
+    state = build_initial_state(input_type, content, **options).model_dump()
+    stages: Dict[str, float] = {}
+    hedge_stats: Dict[str, Any] = {}
+    
+    start = previous = time.perf_counter()
+    async for update in get_app().astream(state, stream_mode="updates"):
+        now = time.perf_counter()
+        for node, values in update.items():
+            stages[node] = stages.get(node, 0.0) + (now - previous)
+            hedge_stats.update((values or {}).get("hedge_stats", {}))
+        previous = now
+    
+    return {"seconds": time.perf_counter() - start, "stages": stages, "hedge_stats": hedge_stats}
+
+
+async def bench_input(name: str, input_type: str, content: str, runs: int,
+                      options: Dict[str, Any], server: FakeLLMServer) -> Dict[str, Any]:
+    """Benchmark one input over several runs"""
+    totals = []
+    stages: Dict[str, List[float]] = {}
+    calls = []
+    peaks = []
+    hedges = []
+    
+    for _ in range(runs):
+        server.reset_counters()
+        tracemalloc.start()
+        result = await run_once(input_type, content, options)
+        peaks.append(tracemalloc.get_traced_memory()[1] / (1024 * 1024))
+        tracemalloc.stop()
+        
+        totals.append(result["seconds"])
+        calls.append(server.counters["requests"])
+        if result["hedge_stats"]:
+            hedges.append(result["hedge_stats"])
+        for stage, seconds in result["stages"].items():
+            stages.setdefault(stage, []).append(seconds)
+    
+    report = {
+        "input": name,
+        "input_type": input_type,
+        "runs": runs,
+        "p50_seconds": round(percentile(totals, 0.50), 4),
+        "p95_seconds": round(percentile(totals, 0.95), 4),
+        "stage_p50_seconds": {stage: round(statistics.median(values), 4) for stage, values in stages.items()},
+        "llm_calls_per_document": statistics.median(calls),
+        "peak_python_memory_mb": round(max(peaks), 2),
+    }
+    if hedges:
+        report["hedge"] = {
+            "hedged_calls": sum(stats["hedged"] for stats in hedges),
+            "backup_wins": sum(stats["backup_wins"] for stats in hedges),
+            "map_calls": sum(stats["calls"] for stats in hedges),
+            "p99_saved_ms_p50": statistics.median(stats.get("p99_saved_ms", 0.0) for stats in hedges),
+        }
+    return report
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    from src.pipeline import shutdown_pipeline
+    
+    options = {
+        "chunk_size": args.chunk_size,
+        "chunk_overlap": args.chunk_overlap,
+        "max_summary_length": 5,
+        "max_concurrency": args.max_concurrency,
+        "pipelined": args.pipelined,
+        "map_mode": args.map_mode,
+        "hedge": args.hedge,
+    }
+    
+    inputs = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "samples", "*"))):
+        input_type = INPUT_TYPES.get(os.path.splitext(path)[1].lower())
+        if input_type:
+            inputs.append((os.path.basename(path), input_type, path))
+    for words in args.sizes:
+        inputs.append((f"synthetic-{words}", "text", synthetic_document(words, seed=words)))
+    
+    server = FakeLLMServer(
+        latency_ms=args.latency_ms,
+        jitter=args.jitter,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        malformed_rate=args.malformed_rate,
+        seed=0
+    ).start()
+    os.environ["OPENROUTER_BASE_URL"] = server.base_url
+    
+    results = []
+    try:
+        for name, input_type, content in inputs:
+            result = await bench_input(name, input_type, content, args.runs, options, server)
+            results.append(result)
+            print(
+                f"{name:<28} p50 {result['p50_seconds']:>8.3f}s  p95 {result['p95_seconds']:>8.3f}s  "
+                f"calls {result['llm_calls_per_document']:>5}  peak {result['peak_python_memory_mb']:>7.2f} MB",
+                file=sys.stderr
+            )
+            if "hedge" in result:
+                hedge = result["hedge"]
+                print(
+                    f"{'':<28} hedged {hedge['hedged_calls']}/{hedge['map_calls']} map calls, "
+                    f"{hedge['backup_wins']} won by the backup, p99 saved {hedge['p99_saved_ms_p50']} ms",
+                    file=sys.stderr
+                )
+    finally:
+        await shutdown_pipeline()
+        server.stop()
+    
+    return {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline against a local fake LLM server")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per input")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1000, 5000, 20000], help="Synthetic document sizes in words")
+    parser.add_argument("--chunk-size", type=int, default=150)
+    parser.add_argument("--chunk-overlap", type=int, default=15)
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--pipelined", action="store_true", help="Benchmark the pipelined load/split/summarize mode")
+    parser.add_argument("--map-mode", choices=["chunk", "packed"], default="chunk", help="One chunk or several chunks per LLM call")
+    parser.add_argument("--hedge", action="store_true", help="Hedge map calls slower than the recent p95 latency")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Fraction of packed responses the fake server truncates")
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--jitter", type=float, default=0.3)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--output", default=None, help="Write JSON results to this file instead of stdout")
+    args = parser.parse_args()
+    
+    # Measure the pipeline, not the response cache
+    os.environ["OPENROUTER_API_KEY"] = os.getenv("OPENROUTER_API_KEY") or "benchmark"
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    
+    report = asyncio.run(run_benchmark(args))
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the text splitter backends.
+Each backend runs in a fresh subprocess so that load time and peak memory are
+measured in isolation. Results are printed as a table and written as JSON.
+
+Usage:
+    python benchmarks/bench_splitter.py --backends hf tiktoken sentence-transformers --repeat 20
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+
+DEFAULT_SAMPLE = os.path.join(ROOT, "samples", "healthcare_ai.txt")
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_worker(backend: str, path: str, repeat: int, chunk_size: int, chunk_overlap: int) -> dict:
+    """Benchmark one backend inside the current process"""
+    os.environ["SPLITTER_BACKEND"] = backend
+    from langchain_core.documents import Document
+    from src.utils.text_splitter import split_documents, token_offsets, get_splitter_config
+
+    with open(path, encoding="utf-8") as f:
+        text = f.read() * repeat
+    documents = [Document(page_content=text)]
+    rss_before = peak_rss_mb()
+
+    # First call includes importing and loading the tokenizer/model
+    start = time.perf_counter()
+    split_documents([Document(page_content="warm up")], chunk_size, chunk_overlap)
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    chunks = split_documents(documents, chunk_size, chunk_overlap)
+    split_seconds = time.perf_counter() - start
+
+    # Token count with the backend's own tokenizer where available
+    _, name = get_splitter_config()
+    if backend == "sentence-transformers":
+        from src.utils.text_splitter import get_sentence_transformers_splitter
+        tokens = get_sentence_transformers_splitter(name, chunk_size, chunk_overlap).count_tokens(text=text)
+    else:
+        tokens = len(token_offsets(text, backend, name))
+
+    return {
+        "backend": backend,
+        "characters": len(text),
+        "tokens": tokens,
+        "chunks": len(chunks),
+        "load_seconds": round(load_seconds, 4),
+        "split_seconds": round(split_seconds, 4),
+        "tokens_per_second": round(tokens / split_seconds) if split_seconds else None,
+        "rss_before_mb": round(rss_before, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare splitter backends by throughput and peak memory")
+    parser.add_argument("--backends", nargs="+", default=["hf", "tiktoken", "sentence-transformers"])
+    parser.add_argument("--file", default=DEFAULT_SAMPLE, help="Text file used as input")
+    parser.add_argument("--repeat", type=int, default=20, help="Number of times the file is concatenated")
+    parser.add_argument("--chunk-size", type=int, default=150)
+    parser.add_argument("--chunk-overlap", type=int, default=15)
+    parser.add_argument("--output", default=None, help="Write JSON results to this file")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_worker(args.worker, args.file, args.repeat, args.chunk_size, args.chunk_overlap)
+        print(json.dumps(result))
+        return
+
+    results = []
+    for backend in args.backends:
+        process = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", backend, "--file", args.file,
+             "--repeat", str(args.repeat), "--chunk-size", str(args.chunk_size),
+             "--chunk-overlap", str(args.chunk_overlap)],
+            capture_output=True, text=True
+        )
+        if process.returncode != 0:
+            error = process.stderr.strip().splitlines()[-1] if process.stderr.strip() else "unknown error"
+            results.append({"backend": backend, "error": error})
+        else:
+            results.append(json.loads(process.stdout.strip().splitlines()[-1]))
+
+    print(f"{'backend':<24}{'tokens':>10}{'chunks':>8}{'load s':>9}{'split s':>9}{'tok/s':>12}{'peak MB':>9}")
+    for result in results:
+        if "error" in result:
+            print(f"{result['backend']:<24}error: {result['error']}")
+            continue
+        print(f"{result['backend']:<24}{result['tokens']:>10}{result['chunks']:>8}{result['load_seconds']:>9}"
+              f"{result['split_seconds']:>9}{result['tokens_per_second']:>12}{result['peak_rss_mb']:>9}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the command-line summarizer.
+Imports each module in a fresh interpreter with ``-X importtime`` and reports
+the median cumulative import time and the packages that dominate it. The CLI is
+then timed end to end on a short text in extractive mode (no LLM or tokenizer
+needed), both in-process and through a warm daemon started for the benchmark.
+With ``--baseline`` the import timings also run against another checkout.
+
+Usage:
+    git worktree add /tmp/summarizer-before <commit>
+    python benchmarks/bench_startup.py --baseline /tmp/summarizer-before --repeat 5 --output bench_startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+DEFAULT_MODULES = [
+    "src.pipeline",
+    "src.loaders.content_loader",
+    "src.utils.text_splitter",
+    "src.utils.llm",
+    "src.nodes.extractive_node",
+    "src.daemon",
+]
+
+SAMPLE_TEXT = (
+    "Startup time matters for short inputs. Most of the wall time of a short run is spent importing "
+    "libraries and loading models before any text is processed. Lazy imports defer that work until an "
+    "input actually needs it, and a warm daemon keeps everything loaded between runs."
+)
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Parse ``-X importtime`` lines into self and cumulative microseconds per module"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append({
+            "module": name.strip(),
+            # Nested imports are indented by two spaces per level after the separator's space
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_us": int(self_us.strip()),
+            "cumulative_us": int(cumulative_us.strip()),
+        })
+    return entries
+
+
+def time_import(root: str, module: str) -> Optional[Dict[str, Any]]:
+    """Import one module in a fresh interpreter and summarize its import timings"""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=root, env=dict(os.environ, PYTHONPATH=root)
+    )
+    if process.returncode != 0:
+        return None
+    entries = parse_importtime(process.stderr)
+    total = next((entry["cumulative_us"] for entry in entries if entry["module"] == module and entry["depth"] == 0), 0)
+    
+    # Self time grouped by top-level package
+    packages: Dict[str, int] = defaultdict(int)
+    for entry in entries:
+        packages[entry["module"].split(".")[0]] += entry["self_us"]
+    return {"total_us": total, "packages": dict(packages), "modules": len(entries)}
+
+
+def bench_imports(root: str, modules: List[str], repeat: int, top: int) -> List[Dict[str, Any]]:
+    """Median import time of each module over ``repeat`` fresh interpreters"""
+    results = []
+    for module in modules:
+        runs = [time_import(root, module) for _ in range(repeat)]
+        runs = [run for run in runs if run is not None]
+        if not runs:
+            results.append({"module": module, "error": "import failed"})
+            continue
+        packages = defaultdict(list)
+        for run in runs:
+            for package, self_us in run["packages"].items():
+                packages[package].append(self_us)
+        heaviest = sorted(
+            ((package, statistics.median(values)) for package, values in packages.items()),
+            key=lambda item: item[1], reverse=True
+        )[:top]
+        results.append({
+            "module": module,
+            "import_ms": round(statistics.median(run["total_us"] for run in runs) / 1000, 1),
+            "modules_imported": runs[0]["modules"],
+            "heaviest_packages_ms": {package: round(value / 1000, 1) for package, value in heaviest},
+        })
+    return results
+
+
+def time_cli(extra_args: List[str], repeat: int, env: Dict[str, str]) -> float:
+    """Median wall time in seconds of the CLI summarizing SAMPLE_TEXT extractively"""
+    command = [sys.executable, os.path.join(ROOT, "src", "main.py"), "--text", SAMPLE_TEXT,
+               "--summary-mode", "extractive"] + extra_args
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, capture_output=True, text=True, check=True, env=env)
+        seconds.append(time.perf_counter() - start)
+    return statistics.median(seconds)
+
+
+def bench_cli(repeat: int) -> Dict[str, Any]:
+    """Time the CLI in-process and through a warm daemon on a temporary socket"""
+    socket_path = os.path.join(tempfile.mkdtemp(), "summarizer.sock")
+    env = dict(os.environ, DAEMON_SOCKET=socket_path, USE_DAEMON="false")
+    result = {"in_process_seconds": round(time_cli([], repeat, env), 3)}
+    
+    daemon = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "src", "daemon.py")],
+        stderr=subprocess.PIPE, text=True, env=env
+    )
+    try:
+        # Wait until the daemon has warmed up
+        for line in daemon.stderr:
+            if "listening on" in line:
+                break
+        else:
+            result["daemon_error"] = "daemon exited before listening"
+            return result
+        result["daemon_seconds"] = round(time_cli(["--daemon"], repeat, env), 3)
+    finally:
+        daemon.terminate()
+        daemon.wait()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and CLI startup, optionally against an older checkout")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES, help="Modules to import")
+    parser.add_argument("--baseline", default=None, help="Checkout to compare import times against")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=5, help="Heaviest packages listed per module")
+    parser.add_argument("--no-cli", action="store_true", help="Skip the end-to-end CLI timing")
+    parser.add_argument("--output", default=None, help="Write JSON results to this file")
+    args = parser.parse_args()
+    
+    roots = [("current", ROOT)]
+    if args.baseline:
+        roots.insert(0, ("baseline", os.path.abspath(args.baseline)))
+    
+    report: Dict[str, Any] = {"imports": {}}
+    for label, root in roots:
+        report["imports"][label] = bench_imports(root, args.modules, args.repeat, args.top)
+    
+    print(f"{'module':<30}{'tree':<10}{'import ms':>10}  heaviest packages (self ms)")
+    for module in args.modules:
+        for label, _ in roots:
+            result = next(result for result in report["imports"][label] if result["module"] == module)
+            if "error" in result:
+                print(f"{module:<30}{label:<10}{'-':>10}  {result['error']}")
+                continue
+            heaviest = ", ".join(f"{package} {ms}" for package, ms in result["heaviest_packages_ms"].items())
+            print(f"{module:<30}{label:<10}{result['import_ms']:>10}  {heaviest}")
+    
+    if not args.no_cli:
+        report["cli"] = bench_cli(args.repeat)
+        print(f"\nCLI, extractive summary of a short text: {report['cli']['in_process_seconds']}s in-process, "
+              f"{report['cli'].get('daemon_seconds', '-')}s through the warm daemon")
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Benchmark for streaming large text files.
+Synthetic UTF-8 text files of growing size (with multi-byte characters) are
+split in fresh subprocesses, once by loading the whole file and splitting it
+as one document and once by reading it in windows through ``StreamSplitter``.
+Peak RSS, time and chunk count are reported for each. The chunks of both
+paths are compared on a small file first. With ``--pipeline`` each file is
+also summarized end to end against the local fake LLM server, with and
+without streaming.
+
+Usage:
+    python benchmarks/bench_text_stream.py --sizes-mb 8 32 128 --output bench_text_stream.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, Iterator, List
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bench_pipeline import VOCABULARY
+from fake_llm_server import FakeLLMServer
+
+# Words with two-, three- and four-byte UTF-8 characters, so windows end inside characters
+MULTIBYTE_WORDS = ("naïve", "café", "straße", "αλγόριθμος", "данные", "模型", "データ", "résumé", "📈growth")
+
+MB = 1024 * 1024
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_text_file(path: str, size_mb: float, seed: int = 0):
+    """Write a reproducible text file of about ``size_mb`` MB, one paragraph at a time"""
+    rng = random.Random(seed)
+    words = list(VOCABULARY) + list(MULTIBYTE_WORDS)
+    target = int(size_mb * MB)
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < target:
+            sentences = []
+            for _ in range(rng.randint(3, 8)):
+                sentence = " ".join(rng.choice(words) for _ in range(rng.randint(8, 20)))
+                sentences.append(sentence.capitalize() + ".")
+            paragraph = " ".join(sentences) + "\n\n"
+            f.write(paragraph)
+            written += len(paragraph.encode("utf-8"))
+
+
+def split_loaded(path: str, chunk_size: int, chunk_overlap: int) -> List[str]:
+    """Chunks of the whole file loaded and split as one document"""
+    from src.loaders.content_loader import get_loader
+    from src.utils.text_splitter import split_documents
+    
+    return split_documents(get_loader("textfile", path).load(), chunk_size, chunk_overlap).texts()
+
+
+def split_streamed(path: str, chunk_size: int, chunk_overlap: int, window_bytes: int) -> Iterator[str]:
+    """Chunks of the file read in windows and split as a stream, yielded as they complete"""
+    from src.loaders.content_loader import iter_text_windows
+    from src.utils.text_splitter import StreamSplitter
+    
+    stream = StreamSplitter(chunk_size, chunk_overlap)
+    for text in iter_text_windows(path, window_bytes):
+        yield from stream.feed(text)
+    yield from stream.finish()
+
+
+def run_worker(mode: str, path: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """Split or summarize one file inside the current process"""
+    sys.path.insert(0, ROOT)
+    from langchain_core.documents import Document
+    from src.utils.text_splitter import split_documents
+    
+    # Split once first so imports and the tokenizer load are in the baseline, not the measurement
+    split_documents([Document(page_content="warm up")], args.chunk_size, args.chunk_overlap)
+    rss_before = peak_rss_mb()
+    started = time.perf_counter()
+    
+    if mode == "load":
+        # Only the count is kept, like the pipeline, which summarizes chunks and drops them
+        chunks = len(split_loaded(path, args.chunk_size, args.chunk_overlap))
+    elif mode == "stream":
+        chunks = sum(1 for _ in split_streamed(path, args.chunk_size, args.chunk_overlap, args.window_bytes))
+    else:
+        from src.pipeline import run_pipeline, shutdown_pipeline
+        
+        # TEXT_STREAM_THRESHOLD is set by the parent: 1 streams every file, 0 never does
+        async def run() -> Dict[str, Any]:
+            try:
+                return await run_pipeline("textfile", path, chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap,
+                                          max_summary_length=5, max_concurrency=args.max_concurrency)
+            finally:
+                await shutdown_pipeline()
+        
+        chunks = len(asyncio.run(run()).get("summaries", []))
+    
+    return {
+        "chunks": chunks,
+        "seconds": round(time.perf_counter() - started, 2),
+        "rss_before_mb": round(rss_before, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def run_in_subprocess(mode: str, path: str, args: argparse.Namespace, env: Dict[str, str] = None) -> Dict[str, Any]:
+    """Run one measurement in a fresh interpreter so peak RSS is not shared between runs"""
+    process = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", mode, "--path", path,
+         "--chunk-size", str(args.chunk_size), "--chunk-overlap", str(args.chunk_overlap),
+         "--window-bytes", str(args.window_bytes), "--max-concurrency", str(args.max_concurrency)],
+        capture_output=True, text=True, cwd=ROOT, env={**os.environ, **(env or {})}
+    )
+    if process.returncode != 0:
+        error = process.stderr.strip().splitlines()[-1] if process.stderr.strip() else "unknown error"
+        return {"error": error}
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def check_equivalence(directory: str, args: argparse.Namespace) -> bool:
+    """Whether streaming yields the same chunks as splitting the whole file, with windows far smaller than the file"""
+    sys.path.insert(0, ROOT)
+    path = os.path.join(directory, "equivalence.txt")
+    write_text_file(path, 0.25, seed=1)
+    return split_loaded(path, args.chunk_size, args.chunk_overlap) == list(split_streamed(
+        path, args.chunk_size, args.chunk_overlap, 4093
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare peak memory of loading vs streaming large text files")
+    parser.add_argument("--sizes-mb", type=float, nargs="*", default=[8, 32, 128], help="Synthetic file sizes in MB")
+    parser.add_argument("--chunk-size", type=int, default=512)
+    parser.add_argument("--chunk-overlap", type=int, default=32)
+    parser.add_argument("--window-bytes", type=int, default=MB, help="Bytes read per window when streaming")
+    parser.add_argument("--pipeline", action="store_true", help="Also summarize each file end to end against the fake LLM server")
+    parser.add_argument("--max-concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--output", default=None, help="Write JSON results to this file")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--path", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    # Measure the pipeline, not the response cache, the chunk store or checkpoints
+    os.environ["OPENROUTER_API_KEY"] = os.getenv("OPENROUTER_API_KEY") or "benchmark"
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    os.environ["CHECKPOINT_ENABLED"] = "false"
+    
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.path, args)))
+        return
+    
+    server = None
+    if args.pipeline:
+        server = FakeLLMServer(latency_ms=args.latency_ms, tokens_per_second=0, seed=0).start()
+        os.environ["OPENROUTER_BASE_URL"] = server.base_url
+    
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        equivalent = check_equivalence(directory, args)
+        print(f"Streamed chunks identical to whole-file chunks: {equivalent}")
+        
+        try:
+            for size_mb in args.sizes_mb:
+                path = os.path.join(directory, f"synthetic-{size_mb:g}mb.txt")
+                write_text_file(path, size_mb)
+                runs = {
+                    "load": run_in_subprocess("load", path, args),
+                    "stream": run_in_subprocess("stream", path, args),
+                }
+                if args.pipeline:
+                    runs["pipeline"] = run_in_subprocess("pipeline", path, args, {"TEXT_STREAM_THRESHOLD": "0"})
+                    runs["pipeline-stream"] = run_in_subprocess("pipeline", path, args, {"TEXT_STREAM_THRESHOLD": "1"})
+                results.append({"size_mb": size_mb, "runs": runs})
+                os.unlink(path)
+        finally:
+            if server is not None:
+                server.stop()
+    
+    print(f"\n{'size MB':>8}  {'mode':<16}{'chunks':>9}{'seconds':>9}{'peak RSS MB':>13}{'growth MB':>11}")
+    for result in results:
+        for mode, run in result["runs"].items():
+            if "error" in run:
+                print(f"{result['size_mb']:>8g}  {mode:<16}error: {run['error']}")
+                continue
+            growth = round(run["peak_rss_mb"] - run["rss_before_mb"], 1)
+            print(f"{result['size_mb']:>8g}  {mode:<16}{run['chunks']:>9}{run['seconds']:>9}{run['peak_rss_mb']:>13}{growth:>11}")
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"equivalent": equivalent, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
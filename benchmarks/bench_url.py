@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Benchmark for URL loading.
+The saved HTML pages in ``benchmarks/fixtures`` are served by a local HTTP
+server that supports ETag revalidation and adds a configurable latency. For
+each page the estimated tokens and chunks sent to the LLM are compared for
+the full page text of WebBaseLoader and the main content kept by
+``WebLoader``. Fetch time and bytes transferred are compared for WebBaseLoader
+loading the URLs one at a time, ``WebLoader`` on a cold cache and
+``WebLoader`` revalidating its cache (304 responses).
+
+Usage:
+    python benchmarks/bench_url.py --copies 8 --latency-ms 100 --output bench_url.json
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+sys.path.insert(0, ROOT)
+
+
+class FixtureServer:
+    """
+    Serves the fixture pages with ETag and Last-Modified validators.
+    
+    Query strings are ignored, so ``page.html?copy=2`` is a distinct URL for
+    the same page.
+    
+    Args:
+        latency_ms: Delay before every response
+    """
+    
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.counters = {"requests": 0, "not_modified": 0, "bytes": 0}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+    
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self) -> "FixtureServer":
+        fixture_server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(fixture_server.latency_ms / 1000)
+                path = os.path.join(FIXTURES, os.path.basename(self.path.split("?")[0]))
+                if not os.path.isfile(path):
+                    self.send_error(404)
+                    return
+                with open(path, "rb") as f:
+                    body = f.read()
+                etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+                
+                not_modified = self.headers.get("If-None-Match") == etag
+                with fixture_server._lock:
+                    fixture_server.counters["requests"] += 1
+                    fixture_server.counters["not_modified"] += int(not_modified)
+                    fixture_server.counters["bytes"] += 0 if not_modified else len(body)
+                
+                self.send_response(304 if not_modified else 200)
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", formatdate(os.path.getmtime(path), usegmt=True))
+                if not_modified:
+                    self.end_headers()
+                    return
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def reset(self):
+        with self._lock:
+            self.counters = {"requests": 0, "not_modified": 0, "bytes": 0}
+
+
+def compare_tokens(server: FixtureServer, chunk_size: int, chunk_overlap: int) -> List[Dict[str, Any]]:
+    """Estimated tokens and chunks per page for the full page text and the extracted main content"""
+    from langchain_community.document_loaders import WebBaseLoader
+    from src.loaders.web_loader import WebLoader
+    from src.nodes.planner_node import count_chunks
+    from src.utils.text_splitter import estimate_tokens
+    
+    results = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "*.html"))):
+        url = f"{server.base_url}/{os.path.basename(path)}"
+        full = WebBaseLoader(url).load()[0].page_content
+        lean = WebLoader([url]).load()[0].page_content
+        # Whitespace runs are collapsed first, so only the text removed is counted, not the layout
+        full_tokens = estimate_tokens(" ".join(full.split()))
+        lean_tokens = estimate_tokens(" ".join(lean.split()))
+        results.append({
+            "page": os.path.basename(path),
+            "html_bytes": os.path.getsize(path),
+            "full_tokens": full_tokens,
+            "lean_tokens": lean_tokens,
+            "reduction_pct": round(100 * (1 - lean_tokens / full_tokens), 1),
+            "full_chunks": count_chunks([full_tokens], chunk_size, chunk_overlap),
+            "lean_chunks": count_chunks([lean_tokens], chunk_size, chunk_overlap),
+        })
+    return results
+
+
+def compare_fetching(server: FixtureServer, urls: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Time and traffic of loading all URLs sequentially, concurrently on a cold cache and revalidated"""
+    from langchain_community.document_loaders import WebBaseLoader
+    from src.loaders.web_loader import WebLoader
+    from src.utils.http_cache import get_http_cache
+    
+    def measure(load) -> Dict[str, Any]:
+        server.reset()
+        started = time.perf_counter()
+        documents = load()
+        return {
+            "seconds": round(time.perf_counter() - started, 3),
+            "documents": len(documents),
+            **server.counters,
+        }
+    
+    get_http_cache().clear()
+    return {
+        "WebBaseLoader, sequential": measure(lambda: [WebBaseLoader(url).load()[0] for url in urls]),
+        "WebLoader, cold cache": measure(lambda: WebLoader(urls).load()),
+        "WebLoader, revalidated": measure(lambda: WebLoader(urls).load()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare tokens and fetch cost of the lean URL loader against WebBaseLoader")
+    parser.add_argument("--copies", type=int, default=8, help="Distinct URLs per fixture page in the fetch comparison")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="Server delay per response")
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--chunk-overlap", type=int, default=32)
+    parser.add_argument("--output", default=None, help="Write JSON results to this file")
+    args = parser.parse_args()
+    
+    # Use a throwaway page cache
+    directory = tempfile.mkdtemp()
+    os.environ["URL_CACHE_ENABLED"] = "true"
+    os.environ["URL_CACHE_PATH"] = os.path.join(directory, "url_cache.sqlite")
+    os.environ.setdefault("USER_AGENT", "bench-url")
+    
+    server = FixtureServer(latency_ms=args.latency_ms).start()
+    try:
+        tokens = compare_tokens(server, args.chunk_size, args.chunk_overlap)
+        pages = sorted(os.path.basename(path) for path in glob.glob(os.path.join(FIXTURES, "*.html")))
+        urls = [f"{server.base_url}/{page}?copy={copy}" for copy in range(args.copies) for page in pages]
+        fetching = compare_fetching(server, urls)
+    finally:
+        server.stop()
+    
+    print(f"{'page':<20}{'HTML bytes':>11}{'full tokens':>13}{'lean tokens':>13}{'reduction':>11}{'chunks':>10}")
+    for row in tokens:
+        print(f"{row['page']:<20}{row['html_bytes']:>11}{row['full_tokens']:>13}{row['lean_tokens']:>13}"
+              f"{row['reduction_pct']:>10}%{row['full_chunks']:>5} → {row['lean_chunks']}")
+    full_total = sum(row["full_tokens"] for row in tokens)
+    lean_total = sum(row["lean_tokens"] for row in tokens)
+    print(f"{'total':<20}{'':>11}{full_total:>13}{lean_total:>13}{round(100 * (1 - lean_total / full_total), 1):>10}%")
+    
+    print(f"\n{len(urls)} URLs, {args.latency_ms:g} ms server latency")
+    print(f"{'loader':<28}{'seconds':>9}{'requests':>10}{'304s':>6}{'bytes':>10}")
+    for label, run in fetching.items():
+        print(f"{label:<28}{run['seconds']:>9}{run['requests']:>10}{run['not_modified']:>6}{run['bytes']:>10}")
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"tokens": tokens, "fetching": fetching}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI-compatible stand-in server for offline benchmarks.
+Serves POST /chat/completions (plain and streaming) with a configurable latency
+distribution, generation speed and injected 429/5xx errors, and counts requests.
+
+Usage:
+    python benchmarks/fake_llm_server.py --port 8765 --latency-ms 300 --error-rate 0.02
+
+or from Python:
+    with FakeLLMServer(latency_ms=300) as server:
+        os.environ["OPENROUTER_BASE_URL"] = server.base_url
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+
+class FakeLLMServer:
+    """
+    OpenAI-compatible chat completions server running in a background thread.
+    
+    Each response waits ``latency_ms`` (log-normally distributed with the given
+    ``jitter``) plus ``completion_tokens / tokens_per_second``. A fraction of
+    requests fails with 429 (with a Retry-After header) or 500, and a fraction
+    of packed responses is missing a summary.
+    """
+    
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 200.0,
+        jitter: float = 0.3,
+        tokens_per_second: float = 200.0,
+        completion_tokens: int = 40,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 1.0,
+        malformed_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.malformed_rate = malformed_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.reset_counters()
+        
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+    
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+    
+    def reset_counters(self):
+        """Reset the request, error and token counters"""
+        with self._lock:
+            self.counters = {"requests": 0, "errors": 0, "rate_limited": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    
+    def _count(self, **increments: int):
+        with self._lock:
+            for key, value in increments.items():
+                self.counters[key] += value
+    
+    def _roll(self) -> float:
+        with self._lock:
+            return self._random.random()
+    
+    def _delay(self) -> float:
+        with self._lock:
+            sample = self._random.lognormvariate(0.0, self.jitter) if self.jitter else 1.0
+        return self.latency_ms / 1000.0 * sample
+    
+    def respond(self, body: Dict[str, Any]) -> str:
+        """
+        Build the completion text for a request.
+        
+        The text is deterministic for a given prompt. Packed prompts asking for
+        a JSON array get one summary per ``<chunk`` tag, unless the request is
+        picked to be malformed (``malformed_rate``).
+        """
+        prompt = body["messages"][-1]["content"] if body.get("messages") else ""
+        words = " ".join(["summary"] * max(1, self.completion_tokens - 3))
+        
+        chunks = prompt.count("<chunk ")
+        if chunks and "JSON array" in prompt:
+            summaries = [f"Summary of chunk {number}: {words}." for number in range(1, chunks + 1)]
+            if self._roll() < self.malformed_rate:
+                summaries = summaries[:-1]
+            return json.dumps(summaries)
+        
+        return f"Summary ({len(prompt)} chars): {words}."
+    
+    def _make_handler(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def log_message(self, format, *args):
+                pass
+            
+            def handle(self):
+                # Clients may cancel requests, e.g. the slower half of a hedged call
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+            
+            def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", "0"))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                server._count(requests=1)
+                
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                    return
+                
+                roll = server._roll()
+                if roll < server.rate_limit_rate:
+                    server._count(rate_limited=1)
+                    self._send_json(
+                        429, {"error": {"message": "Rate limit exceeded", "type": "rate_limit"}},
+                        {"Retry-After": str(server.retry_after)}
+                    )
+                    return
+                if roll < server.rate_limit_rate + server.error_rate:
+                    server._count(errors=1)
+                    time.sleep(server._delay())
+                    self._send_json(500, {"error": {"message": "Injected server error", "type": "server_error"}})
+                    return
+                
+                text = server.respond(body)
+                prompt_tokens = sum(len(m.get("content", "")) for m in body.get("messages", [])) // 4
+                completion_tokens = len(text) // 4 + 1
+                server._count(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens
+                }
+                
+                # Time to first token, then generation at tokens_per_second
+                time.sleep(server._delay())
+                generation_seconds = completion_tokens / server.tokens_per_second if server.tokens_per_second else 0.0
+                
+                if body.get("stream"):
+                    self._stream(body, text, usage, generation_seconds)
+                    return
+                
+                time.sleep(generation_seconds)
+                self._send_json(200, {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": text},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": usage
+                })
+            
+            def _stream(self, body: Dict[str, Any], text: str, usage: Dict[str, int], generation_seconds: float):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                
+                pieces = text.split(" ")
+                for index, piece in enumerate(pieces):
+                    delta = piece if index == 0 else " " + piece
+                    self._event(body, {"content": delta}, None)
+                    time.sleep(generation_seconds / len(pieces))
+                self._event(body, {}, "stop", usage if body.get("stream_options", {}).get("include_usage") else None)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+            
+            def _event(self, body: Dict[str, Any], delta: Dict[str, str], finish_reason: Optional[str], usage=None):
+                chunk = {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                }
+                if usage is not None:
+                    chunk["usage"] = usage
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+        
+        return Handler
+    
+    def start(self) -> "FakeLLMServer":
+        """Start serving in a background thread"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """Stop the server and wait for its thread"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+    
+    def __enter__(self) -> "FakeLLMServer":
+        return self.start()
+    
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Median time to first token")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Sigma of the log-normal latency distribution")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Generation speed")
+    parser.add_argument("--completion-tokens", type=int, default=40, help="Approximate length of each response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests failing with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Fraction of packed responses missing a summary")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    
+    server = FakeLLMServer(
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        jitter=args.jitter,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        malformed_rate=args.malformed_rate,
+        seed=args.seed
+    )
+    print(f"Fake LLM server listening on {server.base_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
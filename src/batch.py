@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Batch entry point for the LangGraph Content Summarizer.
+This script summarizes many inputs in one process, sharing the compiled graph,
+LLM clients and tokenizer, and writes one JSON result per line as each input completes.
+
+Rerunning a batch with the same output file skips the inputs that succeeded,
+and with --checkpoint inputs that failed, were interrupted or had failed chunks
+resume from their checkpoints. A resumed input keeps the options its checkpoint
+was started with; options changed since are reported as a warning and ignored.
+Each rerun appends a new line for every input it processes, so an input can
+appear more than once in the output file: the last line per id is its result.
+
+Inputs come from a file glob or a JSONL manifest whose lines may set any
+pipeline option (``pipeline.OPTION_FIELDS``) and look like:
+    {"id": "report-1", "input_type": "pdf", "content": "reports/1.pdf"}
+    {"input_type": "url", "content": "https://example.com/article", "max_summary_length": 3}
+"""
+
+import argparse
+import asyncio
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from dotenv import load_dotenv
+
+# Add the project root to the path so we can import our modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# Load environment variables from .env file
+load_dotenv()
+
+# File extensions mapped to loader input types
+EXTENSION_TYPES = {
+    ".pdf": "pdf",
+    ".txt": "textfile",
+    ".md": "textfile",
+}
+
+def inputs_from_glob(pattern: str) -> List[Dict[str, Any]]:
+    """
+    Build batch inputs from a file glob.
+    
+    Args:
+        pattern: Glob pattern such as 'reports/**/*.pdf', or a directory
+    
+    Returns:
+        List of input dictionaries with id, input_type and content
+    """
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*")
+    
+    inputs = []
+    for path in sorted(glob.glob(pattern, recursive=True)):
+        input_type = EXTENSION_TYPES.get(os.path.splitext(path)[1].lower())
+        if input_type and os.path.isfile(path):
+            inputs.append({"id": path, "input_type": input_type, "content": path})
+    return inputs
+
+
+def inputs_from_manifest(path: str) -> List[Dict[str, Any]]:
+    """
+    Read batch inputs from a JSONL manifest.
+    
+    Args:
+        path: Path to the manifest file
+    
+    Returns:
+        List of input dictionaries; entries without an id use their content as id
+    """
+    inputs = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if "input_type" not in entry or "content" not in entry:
+                raise ValueError(f"Manifest line {line_number} needs 'input_type' and 'content'")
+            entry.setdefault("id", entry["content"])
+            inputs.append(entry)
+    return inputs
+
+
+def completed_ids(output_path: str, retry_failed_chunks: bool = False) -> Set[str]:
+    """
+    Collect the ids of inputs already summarized successfully in an output file.
+    
+    Only the last line per id counts, as a rerun appends a new line for each
+    input it processes again.
+    
+    Args:
+        output_path: Path to the JSONL results file
+        retry_failed_chunks: Leave out inputs summarized with failed chunks, so
+            their checkpoints are resumed and the failed chunks retried
+    
+    Returns:
+        Set of ids to skip when resuming
+    """
+    if not os.path.exists(output_path):
+        return set()
+    
+    latest = {}
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                # A partially written last line from an interrupted run
+                continue
+            latest[result["id"]] = result
+    return {
+        input_id for input_id, result in latest.items()
+        if result.get("status") == "ok" and not (retry_failed_chunks and result.get("failed_chunks"))
+    }
+
+
+def batch_run_id(output_path: str, entry: Dict[str, Any]) -> str:
+    """
+    Run id under which an input is checkpointed.
+    
+    Derived from the output file and the input, so rerunning the batch with the
+    same output file resumes the inputs that failed or were interrupted.
+    
+    Args:
+        output_path: Path to the JSONL results file
+        entry: Input dictionary with id, input_type and content
+    
+    Returns:
+        The run id
+    """
+    payload = json.dumps([os.path.abspath(output_path), entry["id"], entry["input_type"], entry["content"]])
+    return "batch-" + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+async def run_batch(
+    inputs: List[Dict[str, Any]],
+    output_path: str,
+    defaults: Dict[str, Any],
+    doc_concurrency: int = 4,
+    llm_concurrency: Optional[int] = None,
+    incremental: bool = False,
+    checkpoint: bool = False
+) -> Dict[str, int]:
+    """
+    Summarize inputs concurrently and append results to a JSONL file as they complete.
+    
+    Args:
+        inputs: Input dictionaries with id, input_type, content and optional overrides
+        output_path: JSONL file results are appended to
+        defaults: Default pipeline options (chunk_size, chunk_overlap, ...)
+        doc_concurrency: Maximum number of documents processed at once
+        llm_concurrency: Maximum number of LLM calls in flight across all documents;
+            LLM_MAX_INFLIGHT or the scheduler's default when None
+        incremental: Use each input's id as its doc_id so unchanged chunks are reused
+        checkpoint: Checkpoint each input under ``batch_run_id`` so a rerun resumes it
+    
+    Returns:
+        Counts of succeeded, failed and skipped inputs
+    """
+    from src.pipeline import OPTION_FIELDS, changed_options, load_run_options, run_pipeline, shutdown_pipeline
+    from src.utils.llm import set_llm_concurrency
+    
+    done = completed_ids(output_path, retry_failed_chunks=checkpoint)
+    pending = [entry for entry in inputs if entry["id"] not in done]
+    counts = {"ok": 0, "error": 0, "skipped": len(inputs) - len(pending)}
+    
+    set_llm_concurrency(llm_concurrency)
+    semaphore = asyncio.Semaphore(max(1, doc_concurrency))
+    write_lock = asyncio.Lock()
+    
+    with open(output_path, "a", encoding="utf-8") as output:
+        
+        async def process(entry: Dict[str, Any]):
+            options = dict(defaults)
+            options.update({field: entry[field] for field in OPTION_FIELDS if field in entry})
+            if incremental:
+                options.setdefault("doc_id", entry["id"])
+            if checkpoint:
+                options.setdefault("run_id", batch_run_id(output_path, entry))
+            result = {"id": entry["id"], "input_type": entry["input_type"], "content": entry["content"]}
+            
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    # A resumed input continues with its checkpointed options
+                    saved = await asyncio.to_thread(load_run_options, options["run_id"]) if checkpoint else None
+                    changed = changed_options(options, saved) if saved else {}
+                    if changed:
+                        result["ignored_options"] = sorted(changed)
+                        print(
+                            f"Warning: {entry['id']} resumes from its checkpoint; ignoring changed options "
+                            + ", ".join(f"{field} ({old!r} -> {new!r})" for field, (old, new) in sorted(changed.items())),
+                            file=sys.stderr
+                        )
+                    final_state = await run_pipeline(
+                        input_type=entry["input_type"],
+                        content=entry["content"],
+                        **options
+                    )
+                    result.update({
+                        "status": "ok",
+                        "summary": final_state["final_summary"],
+                        "chunks": len(final_state.get("summaries", [])),
+                        "failed_chunks": final_state.get("failed_chunks", []),
+                        "reused_chunks": final_state.get("reused_chunks", 0),
+                        "resumed_chunks": final_state.get("resumed_chunks", 0),
+                        "plan": final_state.get("plan", {}),
+                        "hedge_stats": final_state.get("hedge_stats", {}),
+                    })
+                except Exception as e:
+                    result.update({"status": "error", "error": str(e)})
+                result["seconds"] = round(time.perf_counter() - start, 3)
+            
+            async with write_lock:
+                output.write(json.dumps(result) + "\n")
+                output.flush()
+                counts[result["status"]] += 1
+                print(f"[{result['status']}] {entry['id']} ({result['seconds']}s)", file=sys.stderr)
+        
+        try:
+            await asyncio.gather(*(process(entry) for entry in pending))
+        finally:
+            await shutdown_pipeline()
+    
+    return counts
+
+
+def main():
+    from src.utils.scheduler import DEFAULT_MAX_INFLIGHT, max_inflight_from_env
+    
+    parser = argparse.ArgumentParser(
+        description="Summarize many inputs in one process and write results as JSONL"
+    )
+    
+    input_group = parser.add_mutually_exclusive_group(required=True)
+    
+    input_group.add_argument(
+        "--glob",
+        type=str,
+        help="Directory or file glob of PDF/text files to summarize (e.g. 'reports/**/*.pdf')"
+    )
+    
+    input_group.add_argument(
+        "--manifest",
+        type=str,
+        help="JSONL manifest with one {id, input_type, content} object per line"
+    )
+    
+    parser.add_argument(
+        "--output",
+        type=str,
+        required=True,
+        help="JSONL file to append results to; inputs whose last line has status 'ok' are skipped, failed ones resume from their checkpoints with --checkpoint"
+    )
+    
+    parser.add_argument(
+        "--doc-concurrency",
+        type=int,
+        default=None,
+        help="Maximum number of documents processed at once (default: use BATCH_CONCURRENCY env var or 4)"
+    )
+    
+    parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        default=None,
+        help=f"Maximum number of LLM calls in flight across all documents (default: use LLM_MAX_INFLIGHT env var or {DEFAULT_MAX_INFLIGHT})"
+    )
+    
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=None,
+        help="Maximum number of concurrent LLM calls per document (default: use MAX_CONCURRENCY env var or 8)"
+    )
+    
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="Override chunk size (default: use CHUNK_SIZE env var, or let the planner derive it per document)"
+    )
+    
+    parser.add_argument(
+        "--chunk-overlap",
+        type=int,
+        default=None,
+        help="Override chunk overlap (default: use CHUNK_OVERLAP env var or 15)"
+    )
+    
+    parser.add_argument(
+        "--max-summary-length",
+        type=int,
+        default=5,
+        help="Maximum number of sentences in each final summary (default: 5)"
+    )
+    
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help="Checkpoint each input so inputs that fail or are cut off resume when the batch is rerun (default: use CHECKPOINT_ENABLED env var or false)"
+    )
+    
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Re-summarize only chunks that changed since the last run for the same input id"
+    )
+    
+    args = parser.parse_args()
+    
+    if not os.getenv("OPENROUTER_API_KEY"):
+        print("Error: OPENROUTER_API_KEY environment variable is required", file=sys.stderr)
+        print("Please set it in your .env file or environment", file=sys.stderr)
+        sys.exit(1)
+    
+    try:
+        inputs = inputs_from_glob(args.glob) if args.glob else inputs_from_manifest(args.manifest)
+    except Exception as e:
+        print(f"Error reading inputs: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    
+    defaults = {
+        "chunk_size": args.chunk_size or (int(os.getenv("CHUNK_SIZE")) if os.getenv("CHUNK_SIZE") else None),
+        "chunk_overlap": args.chunk_overlap or int(os.getenv("CHUNK_OVERLAP", "15")),
+        "max_summary_length": args.max_summary_length,
+        "max_concurrency": args.max_concurrency or int(os.getenv("MAX_CONCURRENCY", "8")),
+    }
+    doc_concurrency = args.doc_concurrency or int(os.getenv("BATCH_CONCURRENCY", "4"))
+    llm_concurrency = args.llm_concurrency or max_inflight_from_env()
+    
+    from src.utils.checkpoint import checkpointing_enabled
+    
+    counts = asyncio.run(run_batch(
+        inputs, args.output, defaults, doc_concurrency, llm_concurrency,
+        incremental=args.incremental, checkpoint=args.checkpoint or checkpointing_enabled()
+    ))
+    print(
+        f"Done: {counts['ok']} succeeded, {counts['error']} failed, {counts['skipped']} skipped",
+        file=sys.stderr
+    )
+    if counts["error"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
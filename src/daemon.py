@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Warm daemon for the command-line summarizer.
+This script keeps the pipeline, the LLM clients and the tokenizer loaded in one
+process and serves `python src/main.py --daemon` requests over a local Unix
+socket, so short inputs do not pay for imports and model loads on every run.
+
+Protocol: the client sends one JSON line {"options": {...}, "stream": bool} and
+the daemon answers with newline-delimited JSON events. Streaming requests get
+the events of ``astream_summary``; every response ends with a ``final`` event
+carrying the summary and the result state, or an ``error`` event.
+
+This module only imports the standard library at import time, so the client
+side stays cheap to load.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import sys
+import tempfile
+from typing import Any, Dict, Iterator, Optional
+
+# Add the project root to the path so we can import our modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# State fields sent back to clients; documents and chunks stay in the daemon
+RESULT_FIELDS = (
+    "final_summary", "plan", "summaries", "failed_chunks", "hedge_stats", "duplicate_chunks",
+    "unselected_chunks", "reduce_levels", "reduce_fan_in", "doc_id", "reused_chunks", "recomputed_chunks",
+    "resumed_chunks", "combine_skipped"
+)
+
+# Longest request line accepted from a client
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+
+
+def get_socket_path() -> str:
+    """Socket path from DAEMON_SOCKET, defaulting to a per-user file in the temp directory"""
+    return os.getenv("DAEMON_SOCKET") or os.path.join(tempfile.gettempdir(), f"summarizer-{os.getuid()}.sock")
+
+
+def result_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    """The JSON-serializable part of a final state that clients report on"""
+    return {field: state[field] for field in RESULT_FIELDS if field in state}
+
+
+def connect(path: Optional[str] = None) -> Optional[socket.socket]:
+    """
+    Connect to a running daemon.
+    
+    Args:
+        path: Socket path, defaults to ``get_socket_path()``
+    
+    Returns:
+        The connected socket, or None if no daemon is listening
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path or get_socket_path())
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def request_events(sock: socket.socket, options: Dict[str, Any], stream: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Send one request to the daemon and yield its events.
+    
+    Args:
+        sock: Socket returned by ``connect``
+        options: Keyword arguments for the pipeline, including input_type and content
+        stream: Whether to receive progress and token events
+    
+    Returns:
+        Iterator over the daemon's events, ending with a 'final' or 'error' event
+    """
+    with sock, sock.makefile("rb") as responses:
+        sock.sendall((json.dumps({"options": options, "stream": stream}) + "\n").encode("utf-8"))
+        for line in responses:
+            yield json.loads(line)
+
+
+def warm_up():
+    """Import the pipeline and load the LLM clients, loaders and tokenizer before the first request"""
+    from src.pipeline import get_app
+    from src.utils.text_splitter import (
+        DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_OVERLAP, get_splitter_config, get_tokenizer, get_sentence_transformers_splitter
+    )
+    import langchain_openai  # noqa: F401
+    import pypdf  # noqa: F401
+    from langchain_community.document_loaders import PyPDFLoader, TextLoader  # noqa: F401
+    from src.loaders.web_loader import get_session
+    from src.utils.llm import get_llm, get_role_model
+    import lxml.html  # noqa: F401
+    
+    get_app()
+    get_session()
+    
+    # Clients of the map and reduce models; without an API key only extractive requests can run
+    try:
+        for role in ("map", "reduce"):
+            get_llm(model=get_role_model(role), temperature=0.0)
+    except Exception as e:
+        print(f"Warning: could not create the LLM client: {str(e)}", file=sys.stderr)
+    
+    # A tokenizer that cannot be loaded only matters once a request needs it
+    backend, name = get_splitter_config()
+    try:
+        if backend == "sentence-transformers":
+            get_sentence_transformers_splitter(
+                name, int(os.getenv("CHUNK_SIZE") or DEFAULT_CHUNK_SIZE), int(os.getenv("CHUNK_OVERLAP") or DEFAULT_CHUNK_OVERLAP)
+            )
+        else:
+            get_tokenizer(backend, name)
+    except Exception as e:
+        print(f"Warning: could not preload the {backend} tokenizer: {str(e)}", file=sys.stderr)
+
+
+async def handle_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Run the pipeline for one client request and write its events back"""
+    from src.pipeline import astream_summary, run_pipeline
+    
+    async def send(event: Dict[str, Any]):
+        writer.write((json.dumps(event, default=str) + "\n").encode("utf-8"))
+        await writer.drain()
+    
+    try:
+        request = json.loads(await reader.readline())
+        options = request["options"]
+        try:
+            if request.get("stream"):
+                async for event in astream_summary(**options):
+                    if event["event"] == "final":
+                        event["state"] = result_state(event["state"])
+                    await send(event)
+            else:
+                state = await run_pipeline(**options)
+                await send({"event": "final", "summary": state["final_summary"], "state": result_state(state)})
+        except Exception as e:
+            await send({"event": "error", "error": str(e)})
+    except (ConnectionError, ValueError, KeyError):
+        # Client went away or sent a malformed request
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(path: str):
+    """Warm up and serve requests on the Unix socket until cancelled"""
+    from src.pipeline import shutdown_pipeline
+    
+    # Refuse to replace a daemon that is still running; remove a stale socket file
+    sock = connect(path)
+    if sock is not None:
+        sock.close()
+        raise RuntimeError(f"A daemon is already listening on {path}")
+    if os.path.exists(path):
+        os.unlink(path)
+    
+    # Requests carry --text content inline, so allow long request lines
+    # Only the owner may connect; the umask applies at bind, so there is no window before a chmod
+    previous_umask = os.umask(0o177)
+    try:
+        server = await asyncio.start_unix_server(handle_client, path=path, limit=MAX_REQUEST_BYTES)
+    finally:
+        os.umask(previous_umask)
+    
+    # Clients connecting during the warm-up wait in the backlog rather than running in-process
+    warm_up()
+    print(f"Summarizer daemon listening on {path}", file=sys.stderr)
+    
+    # Shut down cleanly on Ctrl-C and SIGTERM
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        await shutdown_pipeline()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def main():
+    from dotenv import load_dotenv
+    
+    # Load environment variables from .env file
+    load_dotenv()
+    
+    parser = argparse.ArgumentParser(description="Keep the summarizer loaded and serve CLI requests over a Unix socket")
+    parser.add_argument(
+        "--socket",
+        default=None,
+        help="Socket path (default: DAEMON_SOCKET env var or summarizer-<uid>.sock in the temp directory)"
+    )
+    args = parser.parse_args()
+    
+    try:
+        asyncio.run(serve(args.socket or get_socket_path()))
+    except RuntimeError as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,143 @@
 Content loaders for different source types.
 """
 
-from typing import List, Dict, Any
-import requests
-from langchain_community.document_loaders import WebBaseLoader, PyPDFLoader, TextLoader
+import io
+import os
+import codecs
+from typing import List, Dict, Any, Iterator
 from langchain_core.documents import Document
 
 
+def get_stream_threshold() -> int:
+    """Size in bytes above which text files are streamed (TEXT_STREAM_THRESHOLD, default 64 MiB, 0 disables)"""
+    return int(os.getenv("TEXT_STREAM_THRESHOLD", str(64 * 1024 * 1024)))
+
+
+def should_stream(input_type: str, content: str) -> bool:
+    """
+    Whether an input is a text file too large to load as one document.
+    
+    Such files are read in windows and split as a stream by the pipelined node.
+    
+    Args:
+        input_type: Type of input
+        content: URL, file path or text
+    
+    Returns:
+        True for text files larger than the stream threshold
+    """
+    threshold = get_stream_threshold()
+    return (
+        input_type == "textfile" and threshold > 0
+        and os.path.isfile(content) and os.path.getsize(content) > threshold
+    )
+
+
+def iter_text_windows(path: str, window_bytes: int = 0, encoding: str = "utf-8") -> Iterator[str]:
+    """
+    Read a text file in windows of decoded text, never holding the whole file.
+    
+    An incremental decoder carries multi-byte characters that straddle two
+    reads over to the next window, so no window ends inside a character.
+    Undecodable bytes are replaced.
+    
+    Args:
+        path: Path to the text file
+        window_bytes: Bytes read per window, defaults to TEXT_STREAM_WINDOW_BYTES (1 MiB)
+        encoding: Text encoding of the file
+    
+    Returns:
+        Iterator over the consecutive pieces of the file's text
+    """
+    window_bytes = window_bytes or int(os.getenv("TEXT_STREAM_WINDOW_BYTES", str(1024 * 1024)))
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(window_bytes)
+            text = decoder.decode(data, final=not data)
+            if text:
+                yield text
+            if not data:
+                break
+
+
+def get_loader(input_type: str, content: str) -> Any:
+    """
+    Create the LangChain loader for a URL or file input.
+    
+    Loader modules (and their parsers, e.g. pypdf or lxml) are
+    imported only when an input of their type is loaded.
+    
+    Args:
+        input_type: Type of input ('url', 'pdf', 'textfile')
+        content: URL or file path
+        
+    Returns:
+        The document loader
+    """
+    if input_type == "url":
+        # One or more whitespace-separated URLs, fetched concurrently
+        from src.loaders.web_loader import WebLoader, split_urls
+        return WebLoader(split_urls(content))
+    elif input_type == "pdf":
+        # Large PDFs are extracted by a process pool, small ones by PyPDFLoader
+        from src.loaders.pdf_loader import PDFLoader
+        return PDFLoader(content)
+    elif input_type == "textfile":
+        from langchain_community.document_loaders import TextLoader
+        return TextLoader(content)
+    else:
+        raise ValueError(f"Unsupported input type: {input_type}")
+
+
+def read_upload(input_type: str, data: bytes) -> str:
+    """
+    Extract the text of an uploaded PDF or text file from memory.
+    
+    Args:
+        input_type: 'pdf' or 'textfile'
+        data: The file contents
+        
+    Returns:
+        The text, with PDF pages separated by blank lines
+    """
+    if input_type == "pdf":
+        from pypdf import PdfReader
+        reader = PdfReader(io.BytesIO(data))
+        return "\n\n".join(page.extract_text() or "" for page in reader.pages)
+    elif input_type == "textfile":
+        return data.decode("utf-8", errors="replace")
+    else:
+        raise ValueError(f"Unsupported upload type: {input_type}")
+
+
+def iter_documents(input_type: str, content: str) -> Iterator[Document]:
+    """
+    Lazily yield documents for an input, one page at a time for PDFs.
+    
+    Text files are yielded as consecutive windows of one text (metadata
+    ``window``); split them with a ``StreamSplitter`` to get the chunks of the
+    whole file.
+    
+    Args:
+        input_type: Type of input ('url', 'pdf', 'textfile', 'text')
+        content: The actual content (URL, file path, or text)
+        
+    Returns:
+        Iterator over the loaded documents
+    """
+    if input_type == "text":
+        return iter([Document(page_content=content)])
+    if input_type == "textfile":
+        return (
+            Document(page_content=text, metadata={"source": content, "window": index})
+            for index, text in enumerate(iter_text_windows(content))
+        )
+    # Pages are extracted only as the iterator is consumed
+    return get_loader(input_type, content).lazy_load()
+
+
 def load_content(state: Any) -> Dict[str, Any]:
     """
     Load content based on the input type.
@@ -25,23 +156,12 @@ def load_content(state: Any) -> Dict[str, Any]:
     documents = []
     
     try:
-        if input_type == "url":
-            # Load content from a web URL
-            loader = WebBaseLoader(content)
-            documents = loader.load()
-        elif input_type == "pdf":
-            # Load content from a PDF file
-            loader = PyPDFLoader(content)
-            documents = loader.load()
-        elif input_type == "textfile":
-            # Load content from a text file
-            loader = TextLoader(content)
-            documents = loader.load()
-        elif input_type == "text":
+        if input_type == "text":
             # Wrap direct text in a Document
             documents = [Document(page_content=content)]
         else:
-            raise ValueError(f"Unsupported input type: {input_type}")
+            # Load content from a web URL, PDF file or text file
+            documents = get_loader(input_type, content).load()
     except Exception as e:
         raise Exception(f"Failed to load content: {str(e)}")
     
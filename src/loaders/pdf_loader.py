@@ -0,0 +1,167 @@
+"""
+Parallel PDF text extraction.
+
+pypdf extracts text in pure Python, one page after another, so extracting a
+large PDF keeps one core busy for longer than the LLM calls take. ``PDFLoader``
+splits the page range of large PDFs into contiguous batches that a pool of
+worker processes extracts at the same time, and yields the pages in page
+order with the metadata ``PyPDFLoader`` gives them. PDFs with fewer pages than
+PDF_PARALLEL_MIN_PAGES are extracted in this process, since starting the pool
+would cost more than it saves.
+
+The pool is opt-in (PDF_WORKERS=1 by default): its speedup has only been
+measured on a single core so far, where it cannot beat in-process extraction.
+Measure with ``benchmarks/bench_pdf.py`` on the target machine before enabling it.
+
+Workers are started with the spawn method, which is safe in the threaded
+service and daemon processes, and import only this module and pypdf.
+"""
+
+import os
+import math
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Batches per worker: more, smaller batches balance pages of uneven cost
+BATCHES_PER_WORKER = 4
+
+
+def get_pdf_workers() -> int:
+    """Number of extraction processes from PDF_WORKERS (default 1, no pool; 0 uses the CPU count)"""
+    return int(os.getenv("PDF_WORKERS", "1")) or os.cpu_count() or 1
+
+
+def get_parallel_min_pages() -> int:
+    """Fewest pages for which a PDF is extracted in parallel (PDF_PARALLEL_MIN_PAGES, default 64)"""
+    return int(os.getenv("PDF_PARALLEL_MIN_PAGES", "64"))
+
+
+def page_batches(pages: int, workers: int) -> List[Tuple[int, int]]:
+    """
+    Split a page range into contiguous batches.
+    
+    Args:
+        pages: Number of pages
+        workers: Number of worker processes
+    
+    Returns:
+        List of (start, stop) page ranges covering all pages in order
+    """
+    size = max(1, math.ceil(pages / (workers * BATCHES_PER_WORKER)))
+    return [(start, min(start + size, pages)) for start in range(0, pages, size)]
+
+
+def extract_pages(path: str, start: int, stop: int) -> List[str]:
+    """
+    Extract the text of pages ``start`` to ``stop`` (exclusive); runs in a worker process.
+    
+    Args:
+        path: Path to the PDF file
+        start: First page index
+        stop: Page index after the last page
+    
+    Returns:
+        Text of each page, stripped like PyPDFLoader does
+    """
+    from pypdf import PdfReader
+    
+    reader = PdfReader(path)
+    return [page_text(reader, index) for index in range(start, stop)]
+
+
+def page_text(reader: Any, index: int) -> str:
+    """Text of one page, stripped like PyPDFLoader does"""
+    return (reader.pages[index].extract_text(extraction_mode="plain") or "").strip()
+
+
+def normalize_date(value: str) -> str:
+    """Convert a PDF date such as ``D:20240101120000+01'00'`` to ISO 8601, keeping values that do not parse"""
+    try:
+        return datetime.strptime(value.replace("'", ""), "D:%Y%m%d%H%M%S%z").isoformat("T")
+    except ValueError:
+        return value
+
+
+def document_metadata(reader: Any, path: str) -> Dict[str, Any]:
+    """
+    Metadata shared by all pages, normalized the way PyPDFLoader does.
+    
+    Keys lose their leading slash and are lowercased, values other than str
+    and int become str, strings are stripped and the creation and
+    modification dates are converted to ISO 8601.
+    """
+    raw = (
+        {"producer": "PyPDF", "creator": "PyPDF", "creationdate": ""}
+        | dict(reader.metadata or {})
+        | {"source": path, "total_pages": len(reader.pages)}
+    )
+    metadata = {}
+    for key, value in raw.items():
+        if type(value) not in (str, int):
+            value = str(value)
+        key = key.lstrip("/").lower()
+        if key in ("creationdate", "moddate"):
+            metadata[key] = normalize_date(value)
+        else:
+            metadata[key] = value.strip() if isinstance(value, str) else value
+    return metadata
+
+
+class PDFLoader:
+    """
+    Loads a PDF one document per page, extracting large PDFs in parallel.
+    
+    Args:
+        path: Path to the PDF file
+        workers: Number of worker processes, defaults to ``get_pdf_workers()``
+        min_pages: Fewest pages extracted in parallel, defaults to ``get_parallel_min_pages()``
+    """
+    
+    def __init__(self, path: str, workers: int = 0, min_pages: Optional[int] = None):
+        self.path = path
+        self.workers = workers or get_pdf_workers()
+        self.min_pages = get_parallel_min_pages() if min_pages is None else min_pages
+    
+    def load(self) -> List[Any]:
+        """Extract all pages"""
+        return list(self.lazy_load())
+    
+    def lazy_load(self) -> Iterator[Any]:
+        """
+        Yield the pages in page order as they are extracted.
+        
+        In parallel mode every batch is submitted up front, so later batches
+        are extracted while earlier pages are being consumed.
+        """
+        from pypdf import PdfReader
+        from langchain_core.documents import Document
+        
+        reader = PdfReader(self.path)
+        pages = len(reader.pages)
+        workers = min(self.workers, pages)
+        
+        # Page labels are computed for all pages at once, so read them here rather than per page
+        metadata = document_metadata(reader, self.path)
+        labels = reader.page_labels
+        
+        # Small PDFs are extracted with the reader already opened, without parsing the file again
+        if workers <= 1 or pages < self.min_pages:
+            for page in range(pages):
+                text = page_text(reader, page)
+                yield Document(page_content=text, metadata=metadata | {"page": page, "page_label": labels[page]})
+            return
+        del reader
+        
+        pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            futures = [pool.submit(extract_pages, self.path, start, stop) for start, stop in page_batches(pages, workers)]
+            page = 0
+            for future in futures:
+                for text in future.result():
+                    yield Document(page_content=text, metadata=metadata | {"page": page, "page_label": labels[page]})
+                    page += 1
+        finally:
+            # A consumer that stops early does not wait for the remaining batches
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,280 @@
+"""
+Lean loader for web pages.
+
+Pages are fetched with one pooled ``requests`` session per process and kept
+in an on-disk cache (``HTTPCache``) that is revalidated with ETag and
+Last-Modified on every load, so an unchanged page costs a 304 response
+instead of a download. The main content is extracted with lxml: scripts,
+navigation, headers, footers, sidebars and link lists are removed before the
+text is taken, so boilerplate is never split into chunks and sent to the LLM.
+Several URLs are fetched concurrently and loaded as one document each.
+"""
+
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (compatible; langgraph-summarizer)"
+
+# Elements that never contain page text
+DROP_TAGS = ("script", "style", "noscript", "template", "svg", "canvas", "iframe", "object", "form", "button", "select")
+
+# Page chrome; headers are kept inside the main content, where they hold the title and byline
+CHROME_TAGS = ("nav", "aside", "footer")
+PAGE_CHROME_TAGS = CHROME_TAGS + ("header",)
+CHROME_ROLES = ("navigation", "banner", "contentinfo", "complementary", "search", "dialog")
+
+# class/id words of boilerplate containers
+BOILERPLATE_PATTERN = re.compile(
+    r"(?:^|[\s_-])(?:nav|navbar|menu|breadcrumbs?|sidebar|footer|cookies?|consent|banner|share|sharing|social|"
+    r"related|comments?|advert|ads?|promo|newsletter|subscribe|popup|modal|skip)(?:$|[\s_-])",
+    re.IGNORECASE
+)
+
+# Containers dropped when most of their text is link text (menus, tag clouds, "read next" lists)
+LINK_LIST_TAGS = ("ul", "ol", "div", "section", "table", "p")
+MAX_LINK_DENSITY = 0.5
+
+# Elements that end a line of text
+BLOCK_TAGS = (
+    "p", "div", "section", "article", "main", "header", "li", "ul", "ol", "dl", "dt", "dd", "tr", "table",
+    "blockquote", "pre", "figcaption", "h1", "h2", "h3", "h4", "h5", "h6", "br", "hr"
+)
+
+# A main content candidate with less text than this is ignored in favor of the body
+MIN_MAIN_CHARS = 200
+
+CHARSET_PATTERN = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.IGNORECASE)
+
+
+def split_urls(content: str) -> List[str]:
+    """URLs of a url input: one or more separated by whitespace"""
+    return content.split()
+
+
+def get_fetch_concurrency() -> int:
+    """Number of URLs fetched at once (URL_FETCH_CONCURRENCY, default 8)"""
+    return max(1, int(os.getenv("URL_FETCH_CONCURRENCY", "8")))
+
+
+_session: Any = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> Any:
+    """
+    Get the process-wide HTTP session.
+    
+    Its connection pool is sized for URL_FETCH_CONCURRENCY, so connections to
+    a host are reused across pages and across runs of a long-lived process.
+    
+    Returns:
+        A shared requests.Session
+    """
+    global _session
+    
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=get_fetch_concurrency(), pool_maxsize=get_fetch_concurrency())
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = os.getenv("USER_AGENT", DEFAULT_USER_AGENT)
+            _session = session
+        return _session
+
+
+def fetch(url: str) -> Tuple[bytes, Optional[str]]:
+    """
+    Fetch a page, revalidating a cached copy instead of downloading it again.
+    
+    Args:
+        url: URL of the page
+    
+    Returns:
+        Tuple of (body, Content-Type header)
+    
+    Raises:
+        requests.HTTPError: For an error response
+    """
+    from src.utils.http_cache import get_http_cache
+    
+    cache = get_http_cache()
+    cached = cache.get(url) if cache is not None else None
+    headers = {}
+    if cached is not None:
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+    
+    response = get_session().get(url, headers=headers, timeout=float(os.getenv("URL_TIMEOUT", "30")))
+    if response.status_code == 304 and cached is not None:
+        cache.touch(url)
+        return cached["body"], cached["content_type"]
+    response.raise_for_status()
+    
+    content_type = response.headers.get("Content-Type")
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    # Only pages that can be revalidated are worth storing
+    if cache is not None and (etag or last_modified) and "no-store" not in response.headers.get("Cache-Control", ""):
+        cache.set(url, etag, last_modified, content_type, response.content)
+    return response.content, content_type
+
+
+def decode_html(body: bytes, content_type: Optional[str]) -> str:
+    """Decode a page with the charset of its Content-Type header or meta tag, defaulting to UTF-8"""
+    match = re.search(r"charset=[\"']?([\w-]+)", content_type or "", re.IGNORECASE) or CHARSET_PATTERN.search(body[:4096])
+    encoding = match.group(1) if match else "utf-8"
+    if isinstance(encoding, bytes):
+        encoding = encoding.decode("ascii")
+    try:
+        return body.decode(encoding, errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+def is_boilerplate(element: Any) -> bool:
+    """Whether an element is navigation, an ad, a share bar or similar, by role, class or id"""
+    if element.get("role") in CHROME_ROLES or element.get("aria-hidden") == "true":
+        return True
+    return bool(BOILERPLATE_PATTERN.search(f"{element.get('class', '')} {element.get('id', '')}"))
+
+
+def link_density(element: Any) -> float:
+    """Share of an element's text that is link text"""
+    text = len("".join(element.text_content().split()))
+    if not text:
+        return 0.0
+    links = sum(len("".join(link.text_content().split())) for link in element.iter("a"))
+    return links / text
+
+
+def find_main(root: Any) -> Tuple[Any, bool]:
+    """
+    Find the element holding the page's main content.
+    
+    Returns:
+        The longest article, main or role=main element, or the body, and whether it is the body
+    """
+    candidates = root.xpath("//article | //main | //*[@role='main']")
+    if candidates:
+        main = max(candidates, key=lambda element: len(element.text_content()))
+        if len(main.text_content().strip()) >= MIN_MAIN_CHARS:
+            return main, False
+    body = root.find("body")
+    return (body if body is not None else root), True
+
+
+def element_text(element: Any) -> str:
+    """Text of an element with one line per block and whitespace collapsed"""
+    for block in element.iter(*BLOCK_TAGS):
+        block.text = "\n" + (block.text or "")
+        block.tail = "\n" + (block.tail or "")
+    lines = (" ".join(line.split()) for line in element.text_content().splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def prune(element: Any, should_drop: Callable[[Any], bool]):
+    """Drop the descendants of an element matching ``should_drop``, without descending into dropped ones"""
+    for child in list(element):
+        if not isinstance(child.tag, str):
+            continue
+        if should_drop(child):
+            child.drop_tree()
+        else:
+            prune(child, should_drop)
+
+
+def parse_html(html: str) -> Any:
+    """Parse a decoded page and drop the elements that never contain text"""
+    import lxml.html
+    
+    # lxml rejects decoded text that still carries an XML encoding declaration
+    root = lxml.html.document_fromstring(re.sub(r"^\s*<\?xml[^>]*\?>", "", html))
+    for element in list(root.iter(*DROP_TAGS)):
+        element.drop_tree()
+    return root
+
+
+def extract_main_text(html: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Extract the main text of a page without its boilerplate.
+    
+    Args:
+        html: The decoded page
+    
+    Returns:
+        Tuple of (text, metadata with title, description and language when present)
+    """
+    if not html.strip():
+        return "", {}
+    root = parse_html(html)
+    
+    metadata = {}
+    title = root.findtext(".//title")
+    if title and title.strip():
+        metadata["title"] = " ".join(title.split())
+    description = root.xpath("//meta[@name='description']/@content")
+    if description:
+        metadata["description"] = description[0].strip()
+    if root.get("lang"):
+        metadata["language"] = root.get("lang")
+    
+    main, is_body = find_main(root)
+    chrome = PAGE_CHROME_TAGS if is_body else CHROME_TAGS
+    prune(main, lambda element: element.tag in chrome or is_boilerplate(element))
+    prune(main, lambda element: element.tag in LINK_LIST_TAGS and link_density(element) > MAX_LINK_DENSITY)
+    text = element_text(main)
+    
+    # A page whose content all looks like boilerplate keeps its full text rather than none
+    if not text:
+        root = parse_html(html)
+        body = root.find("body")
+        text = element_text(body if body is not None else root)
+    return text, metadata
+
+
+def load_page(url: str) -> Any:
+    """Fetch one URL and return its main text as a Document"""
+    from langchain_core.documents import Document
+    
+    body, content_type = fetch(url)
+    text, metadata = extract_main_text(decode_html(body, content_type))
+    return Document(page_content=text, metadata={"source": url, **metadata})
+
+
+class WebLoader:
+    """
+    Loads web pages, one document per URL, fetching several URLs concurrently.
+    
+    Args:
+        urls: URLs of the pages
+        concurrency: Pages fetched at once, defaults to ``get_fetch_concurrency()``
+    """
+    
+    def __init__(self, urls: List[str], concurrency: int = 0):
+        self.urls = urls
+        self.concurrency = concurrency or get_fetch_concurrency()
+    
+    def load(self) -> List[Any]:
+        """Load all pages"""
+        return list(self.lazy_load())
+    
+    def lazy_load(self) -> Iterator[Any]:
+        """Yield the pages in the order of the URLs as they are loaded"""
+        if len(self.urls) == 1:
+            yield load_page(self.urls[0])
+            return
+        
+        pool = ThreadPoolExecutor(min(self.concurrency, len(self.urls)))
+        try:
+            yield from pool.map(load_page, self.urls)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
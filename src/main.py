@@ -3,6 +3,9 @@
 Main entry point for the LangGraph Content Summarizer.
 This script handles command-line arguments and orchestrates the summarization process.
 For a GUI, run `python src/desktop_app.py` instead.
+
+The pipeline is imported only once the arguments are valid; with --daemon the
+request is handed to a warm `src/daemon.py` process instead.
 """
 
 import argparse
@@ -13,21 +16,166 @@ from typing import Optional
 
 from dotenv import load_dotenv
 
+# Add the project root to the path so we can import our modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
 # Load environment variables from .env file
 load_dotenv()
 
+def format_plan(plan: dict) -> str:
+    """Describe a pipeline plan in one line"""
+    calls = f"~{plan['estimated_calls']} LLM call{'s' if plan['estimated_calls'] != 1 else ''}"
+    if plan["strategy"] == "stuff":
+        return f"stuff, {plan['document_tokens']} tokens in one prompt ({calls})"
+    return (
+        f"{plan['strategy']}, {plan['chunks']} chunks of {plan['chunk_size']} tokens, "
+        f"{plan['reduce_levels']} reduce level(s) ({calls})"
+    )
+
+def print_stats(final_state: dict):
+    """Print statistics about a finished pipeline run to stderr"""
+    print("\n--- Pipeline statistics ---", file=sys.stderr)
+    plan = final_state.get("plan")
+    if plan:
+        print(f"Plan: {format_plan(plan)}", file=sys.stderr)
+    print(f"Chunks summarized: {len(final_state.get('summaries', []))}", file=sys.stderr)
+    print(f"Failed chunks: {len(final_state.get('failed_chunks', []))}", file=sys.stderr)
+    print(f"Duplicate chunks skipped: {final_state.get('duplicate_chunks', 0)}", file=sys.stderr)
+    print(f"Chunks left out by salience selection: {final_state.get('unselected_chunks', 0)}", file=sys.stderr)
+    print(f"Reduce levels: {final_state.get('reduce_levels', 0)}", file=sys.stderr)
+    print(f"Fan-in per level: {final_state.get('reduce_fan_in', [])}", file=sys.stderr)
+    hedge_stats = final_state.get("hedge_stats")
+    if hedge_stats:
+        print(
+            f"Hedged calls: {hedge_stats['hedged']} of {hedge_stats['calls']}, won by the backup: {hedge_stats['backup_wins']}",
+            file=sys.stderr
+        )
+        if "p99_ms" in hedge_stats:
+            print(
+                f"Map call p99: {hedge_stats['p99_ms']} ms (~{hedge_stats['p99_unhedged_ms']} ms unhedged, "
+                f"{hedge_stats['p99_saved_ms']} ms saved)",
+                file=sys.stderr
+            )
+    if final_state.get("resumed_chunks"):
+        print(f"Chunks resumed from the checkpoint: {final_state['resumed_chunks']}", file=sys.stderr)
+    if final_state.get("doc_id"):
+        print(f"Chunks reused: {final_state.get('reused_chunks', 0)}, recomputed: {final_state.get('recomputed_chunks', 0)}", file=sys.stderr)
+        print(f"Combiner skipped: {final_state.get('combine_skipped', False)}", file=sys.stderr)
+    
+    from src.utils.llm_cache import get_llm_cache
+    cache = get_llm_cache()
+    if cache is not None:
+        cache_stats = cache.stats()
+        print(f"LLM cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['entries']} entries", file=sys.stderr)
+
+class ConsolePrinter:
+    """
+    Print streaming pipeline events as they happen.
+    
+    Progress goes to stderr; the final summary is written to stdout token by token.
+    """
+    
+    def __init__(self):
+        self.streamed_tokens = False
+        self.final_state = {}
+    
+    def print_event(self, event: dict):
+        kind = event["event"]
+        if kind == "resumed":
+            print(f"Resuming run {event['run_id']}; only its missing and failed chunks are summarized", file=sys.stderr)
+        elif kind == "loaded":
+            print(f"Loaded {event['documents']} document(s)", file=sys.stderr)
+        elif kind == "planned":
+            print(f"Plan: {format_plan(event['plan'])}", file=sys.stderr)
+        elif kind == "split":
+            print(f"Split into {event['chunks']} chunks", file=sys.stderr)
+        elif kind == "deduplicated" and event["skipped"]:
+            print(f"Skipped {event['skipped']} near-duplicate chunks", file=sys.stderr)
+        elif kind == "selected":
+            print(f"Selected the {event['chunks']} most salient chunks ({event['skipped']} left out)", file=sys.stderr)
+        elif kind == "chunk_summary":
+            print(f"[chunk {event['index']}] {event['summary']}", file=sys.stderr)
+        elif kind == "chunk_failed":
+            print(f"Warning: chunk {event['index']} failed: {event['error']}", file=sys.stderr)
+        elif kind == "reduce_level" and event["summaries"] > 1:
+            print(f"Combine level {event['level']}: {event['summaries']} summaries", file=sys.stderr)
+        elif kind == "token":
+            if not self.streamed_tokens:
+                print("", file=sys.stderr)
+            self.streamed_tokens = True
+            print(event["token"], end="", flush=True)
+        elif kind == "final":
+            self.final_state = event["state"]
+            if not self.streamed_tokens:
+                print(event["summary"], end="")
+            print()
+
+async def stream_to_console(options: dict) -> dict:
+    """
+    Run the pipeline in streaming mode, printing progress as it happens.
+    
+    Args:
+        options: Keyword arguments for the pipeline
+        
+    Returns:
+        The final pipeline state
+    """
+    from src.pipeline import astream_summary
+    
+    printer = ConsolePrinter()
+    async for event in astream_summary(**options):
+        printer.print_event(event)
+    
+    return printer.final_state
+
+def run_in_daemon(options: dict, stream: bool) -> Optional[dict]:
+    """
+    Hand the request to a running warm daemon.
+    
+    Args:
+        options: Keyword arguments for the pipeline
+        stream: Whether to print progress and stream the final summary
+        
+    Returns:
+        The result state reported by the daemon, or None if no daemon is running
+    """
+    from src import daemon
+    
+    sock = daemon.connect()
+    if sock is None:
+        return None
+    
+    # The daemon may run in another directory
+    if options["input_type"] in ("pdf", "textfile"):
+        options = dict(options, content=os.path.abspath(options["content"]))
+    
+    printer = ConsolePrinter()
+    for event in daemon.request_events(sock, options, stream):
+        if event["event"] == "error":
+            raise Exception(event["error"])
+        if stream:
+            printer.print_event(event)
+        elif event["event"] == "final":
+            printer.final_state = event["state"]
+    
+    if not printer.final_state:
+        raise Exception("The daemon closed the connection without a result")
+    return printer.final_state
+
 def main():
     parser = argparse.ArgumentParser(
         description="Summarize content from various sources using LangGraph and LLMs via OpenRouter API"
     )
     
     # Define mutually exclusive input group
-    input_group = parser.add_mutually_exclusive_group(required=True)
+    # Not required with --resume, which takes the input from the checkpoint
+    input_group = parser.add_mutually_exclusive_group()
     
     input_group.add_argument(
         "--url",
         type=str,
-        help="URL of the web page to summarize"
+        nargs="+",
+        help="URL of the web page to summarize; several URLs are fetched concurrently and summarized together"
     )
     
     input_group.add_argument(
@@ -53,7 +201,7 @@ def main():
         "--chunk-size",
         type=int,
         default=None,
-        help="Override chunk size (default: use CHUNK_SIZE env var or 150)"
+        help="Override chunk size (default: use CHUNK_SIZE env var, or let the planner derive it from the document size)"
     )
     
     parser.add_argument(
@@ -70,17 +218,158 @@ def main():
         help="Maximum number of sentences in final summary (default: 5)"
     )
     
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=None,
+        help="Maximum number of concurrent LLM calls (default: use MAX_CONCURRENCY env var or 8)"
+    )
+    
+    parser.add_argument(
+        "--combine-mode",
+        choices=["tree", "single"],
+        default=None,
+        help="How to combine chunk summaries: multi-level 'tree' reduce or one 'single' call (default: use COMBINE_MODE env var or tree)"
+    )
+    
+    parser.add_argument(
+        "--map-mode",
+        choices=["chunk", "packed"],
+        default=None,
+        help="Summarize one 'chunk' per LLM call or 'packed' several chunks per call (default: use MAP_MODE env var or chunk)"
+    )
+    
+    parser.add_argument(
+        "--map-model",
+        type=str,
+        default=None,
+        help="Model for the per-chunk summaries (default: use MAP_MODEL env var or LLM_MODEL)"
+    )
+    
+    parser.add_argument(
+        "--reduce-model",
+        type=str,
+        default=None,
+        help="Model for combining summaries and single-call summaries (default: use REDUCE_MODEL env var or LLM_MODEL)"
+    )
+    
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        default=None,
+        help="Duplicate chunk summary calls slower than the recent p95 latency, on HEDGE_MODEL if set, and keep the first response (default: use HEDGE_ENABLED env var)"
+    )
+    
+    parser.add_argument(
+        "--summary-mode",
+        choices=["full", "salient", "extractive"],
+        default=None,
+        help="Summarize 'full' content, only the 'salient' chunks within a token budget, or return top 'extractive' sentences without the LLM (default: use SUMMARY_MODE env var or full)"
+    )
+    
+    parser.add_argument(
+        "--strategy",
+        choices=["auto", "map_reduce"],
+        default=None,
+        help="'auto' summarizes documents that fit in one LLM call directly and plans chunking otherwise; 'map_reduce' always splits into chunks (default: use SUMMARY_STRATEGY env var or auto)"
+    )
+    
+    parser.add_argument(
+        "--salient-token-budget",
+        type=int,
+        default=None,
+        help="Chunk tokens sent to the LLM in salient mode (default: use SALIENT_TOKEN_BUDGET env var or 4096)"
+    )
+    
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Summarize only one chunk of each cluster of near-duplicate chunks (default: use DEDUP_ENABLED env var or false)"
+    )
+    
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Summarize every chunk, including near-duplicates, even if DEDUP_ENABLED is set"
+    )
+    
+    parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=None,
+        help="Estimated Jaccard similarity at which chunks count as near-duplicates (default: use DEDUP_THRESHOLD env var or 0.9)"
+    )
+    
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the LLM instead of using the response cache"
+    )
+    
+    parser.add_argument(
+        "--doc-id",
+        type=str,
+        default=None,
+        help="Document id for incremental mode: only chunks that changed since the last run with this id are re-summarized"
+    )
+    
+    parser.add_argument(
+        "--pipelined",
+        action="store_true",
+        help="Overlap page extraction, splitting and summarization with bounded queues (default: use PIPELINED env var)"
+    )
+    
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help="Checkpoint the run so that if it fails or is interrupted it can be resumed with --resume (default: use CHECKPOINT_ENABLED env var or false)"
+    )
+    
+    parser.add_argument(
+        "--resume",
+        type=str,
+        default=None,
+        metavar="RUN_ID",
+        help="Resume a failed or interrupted run from its checkpoint; the input and options are those of the original run"
+    )
+    
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        default=os.getenv("USE_DAEMON", "false").lower() in ("1", "true", "yes"),
+        help="Hand the request to the warm daemon (python src/daemon.py) on DAEMON_SOCKET, running in-process if none is listening (default: use USE_DAEMON env var)"
+    )
+    
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print progress and chunk summaries as they complete and stream the final summary"
+    )
+    
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print a per-node timing, LLM call and token usage breakdown to stderr"
+    )
+    
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print pipeline statistics to stderr after the summary"
+    )
+    
     args = parser.parse_args()
     
-    # Validate environment variables
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    base_url = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
-    model = os.getenv("LLM_MODEL", "meta-llama/llama-3.1-8b-instruct:free")
+    has_input = any((args.url, args.pdf, args.textfile, args.text))
+    if args.resume and has_input:
+        parser.error("--resume cannot be combined with --url, --pdf, --textfile or --text")
+    if not args.resume and not has_input:
+        parser.error("one of the arguments --url --pdf --textfile --text --resume is required")
     
-    if not api_key:
-        print("Error: OPENROUTER_API_KEY environment variable is required", file=sys.stderr)
-        print("Please set it in your .env file or environment", file=sys.stderr)
-        sys.exit(1)
+    if args.no_cache:
+        os.environ["LLM_CACHE_ENABLED"] = "false"
+    
+    summary_mode = args.summary_mode or os.getenv("SUMMARY_MODE", "full")
     
     # Determine input type and content
     input_type = None
@@ -88,7 +377,8 @@ def main():
     
     if args.url:
         input_type = "url"
-        content = args.url
+        # Whitespace-separated, as the url loader expects
+        content = "\n".join(args.url)
     elif args.pdf:
         input_type = "pdf"
         content = args.pdf
@@ -108,24 +398,110 @@ def main():
         content = args.text
     
     # Get chunking configuration
-    chunk_size = args.chunk_size or int(os.getenv("CHUNK_SIZE", "150"))
+    # Without a configured chunk size the planner derives one from the document size
+    chunk_size = args.chunk_size or (int(os.getenv("CHUNK_SIZE")) if os.getenv("CHUNK_SIZE") else None)
     chunk_overlap = args.chunk_overlap or int(os.getenv("CHUNK_OVERLAP", "15"))
     max_summary_length = args.max_summary_length
+    max_concurrency = args.max_concurrency or int(os.getenv("MAX_CONCURRENCY", "8"))
+    combine_mode = args.combine_mode or os.getenv("COMBINE_MODE", "tree")
+    
+    options = {
+        "input_type": input_type,
+        "content": content,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "max_summary_length": max_summary_length,
+        "max_concurrency": max_concurrency,
+        "combine_mode": combine_mode,
+        "map_mode": args.map_mode or os.getenv("MAP_MODE", "chunk"),
+        "map_model": args.map_model,
+        "reduce_model": args.reduce_model,
+        "hedge": args.hedge,
+        "dedup": False if args.no_dedup else True if args.dedup else None,
+        "dedup_threshold": args.dedup_threshold,
+        "summary_mode": summary_mode,
+        "strategy": args.strategy,
+        "salient_token_budget": args.salient_token_budget,
+        "doc_id": args.doc_id,
+        "pipelined": args.pipelined or os.getenv("PIPELINED", "false").lower() in ("1", "true", "yes"),
+    }
+    
+    # Checkpoint the run so a failure or Ctrl-C can be resumed with --resume
+    from src.utils.checkpoint import checkpointing_enabled, new_run_id
+    
+    run_id = args.resume or (new_run_id() if args.checkpoint or checkpointing_enabled() else None)
+    if args.resume:
+        from src.pipeline import load_run_options
+        
+        options = load_run_options(args.resume)
+        if options is None:
+            print(f"Error: no checkpoint found for run '{args.resume}'", file=sys.stderr)
+            sys.exit(1)
+        summary_mode = options.get("summary_mode") or summary_mode
+    elif run_id:
+        options["run_id"] = run_id
     
-    # Import here to avoid issues with env vars
     try:
-        from src.pipeline import summarize_content
-        # Run the async function
-        summary = asyncio.run(summarize_content(
-            input_type=input_type,
-            content=content,
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            max_summary_length=max_summary_length
-        ))
-        print(summary)
+        # The daemon has its own cache settings and instrumentation, so these run in-process
+        final_state = None
+        profile_sink = None
+        if args.daemon and not args.no_cache and not args.profile:
+            final_state = run_in_daemon(options, args.stream)
+            if final_state is None:
+                print("No daemon is running; summarizing in-process", file=sys.stderr)
+        
+        if final_state is None:
+            # Extractive summaries never call the LLM
+            if not os.getenv("OPENROUTER_API_KEY") and summary_mode != "extractive":
+                print("Error: OPENROUTER_API_KEY environment variable is required", file=sys.stderr)
+                print("Please set it in your .env file or environment", file=sys.stderr)
+                sys.exit(1)
+            
+            # Import here to avoid issues with env vars
+            from src.pipeline import run_pipeline, shutdown_pipeline
+            from src.utils import instrumentation
+            
+            # Collect instrumentation records for the profile report
+            if args.profile:
+                profile_sink = instrumentation.MemorySink()
+                instrumentation.add_sink(profile_sink)
+            
+            async def run():
+                try:
+                    if args.stream:
+                        return await stream_to_console(options)
+                    return await run_pipeline(**options)
+                finally:
+                    # Close pooled HTTP connections before the event loop ends
+                    await shutdown_pipeline()
+            
+            # Run the async function
+            final_state = asyncio.run(run())
+        
+        # Report chunks that could not be summarized
+        if not args.stream:
+            for failure in final_state.get("failed_chunks", []):
+                print(f"Warning: chunk {failure['index']} failed: {failure['error']}", file=sys.stderr)
+            
+            print(final_state["final_summary"])
+        
+        if run_id and final_state.get("failed_chunks"):
+            print(f"Retry the failed chunks with: python src/main.py --resume {run_id}", file=sys.stderr)
+        
+        if args.stats:
+            print_stats(final_state)
+        
+        if profile_sink is not None:
+            print("\n--- Profile ---", file=sys.stderr)
+            print(instrumentation.format_profile(profile_sink.records), file=sys.stderr)
+    except KeyboardInterrupt:
+        if run_id:
+            print(f"\nInterrupted; resume with: python src/main.py --resume {run_id}", file=sys.stderr)
+        sys.exit(130)
     except Exception as e:
         print(f"Error during summarization: {str(e)}", file=sys.stderr)
+        if run_id:
+            print(f"Resume with: python src/main.py --resume {run_id}", file=sys.stderr)
         sys.exit(1)
 
 if __name__ == "__main__":
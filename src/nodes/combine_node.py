@@ -3,58 +3,216 @@ Summary combination node for merging multiple summaries into a cohesive final su
 """
 
 import os
+import asyncio
 from typing import List, Dict, Any
-from langchain_openai import ChatOpenAI
-from langchain.prompts import PromptTemplate
+from langchain_core.prompts import PromptTemplate
 
+from src.utils.checkpoint import get_run_store
+from src.utils.chunk_store import chunk_fingerprint, get_chunk_store
+from src.utils.llm import get_llm, get_role_model, invoke_llm
+from src.utils.progress import get_progress_writer
+from src.utils.text_splitter import estimate_tokens
 
-def combine_summaries(state: Any) -> Dict[str, Any]:
+
+def get_reduce_token_budget() -> int:
+    """
+    Get the number of summary tokens that may be sent in one combine call.
+    
+    Uses REDUCE_TOKEN_BUDGET if set, otherwise half of LLM_CONTEXT_WINDOW so the
+    instructions and the generated summary still fit in the model's context.
+    
+    Returns:
+        Token budget for the summaries of a single combine prompt
+    """
+    budget = os.getenv("REDUCE_TOKEN_BUDGET")
+    if budget:
+        return int(budget)
+    return int(os.getenv("LLM_CONTEXT_WINDOW", "8192")) // 2
+
+
+def batch_summaries(summaries: List[str], token_budget: int) -> List[List[str]]:
+    """
+    Group summaries into batches that fit within a token budget.
+    
+    Every batch except possibly the last holds at least two summaries, so each
+    reduce level strictly shrinks the number of summaries.
+    
+    Args:
+        summaries: Summaries to group, in document order
+        token_budget: Maximum number of summary tokens per batch
+        
+    Returns:
+        List of batches of summaries
+    """
+    batches = []
+    current = []
+    current_tokens = 0
+    
+    for summary in summaries:
+        tokens = estimate_tokens(summary)
+        if len(current) >= 2 and current_tokens + tokens > token_budget:
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(summary)
+        current_tokens += tokens
+    
+    if current:
+        batches.append(current)
+    
+    return batches
+
+
+def format_summaries(batch: List[str], weights: List[int]) -> str:
+    """
+    Format a batch of summaries as a bulleted list for a combine prompt.
+    
+    Args:
+        batch: Summaries to combine
+        weights: Number of near-identical chunks each summary stands for
+        
+    Returns:
+        Bulleted summaries, marked with their weight when it is above one
+    """
+    return "\n\n".join(
+        f"- [x{weight}] {summary}" if weight > 1 else f"- {summary}"
+        for summary, weight in zip(batch, weights)
+    )
+
+
+async def combine_summaries(state: Any) -> Dict[str, Any]:
     """
     Combine multiple summaries into a single coherent summary.
     
+    In ``tree`` mode (the default) each call reduces one level: summaries are
+    grouped into token-bounded batches that are combined in parallel, and the
+    graph loops back to this node until a single summary remains. In ``single``
+    mode all summaries are combined with one LLM call. On the first level,
+    summaries of deduplicated chunks are marked with their cluster size. A
+    checkpointed run saves each combined summary, and a resumed run reuses the
+    ones its earlier attempts saved.
+    
     Args:
         state: The current state containing summaries to combine
         
     Returns:
-        Updated state with final summary
+        Updated state with the next level of summaries or the final summary
     """
     # Access attributes using dot notation for Pydantic models
-    summaries = state.summaries
-    max_summary_length = getattr(state, "max_summary_length", 5)
+    reduce_levels = getattr(state, "reduce_levels", 0)
+    reduce_fan_in = list(getattr(state, "reduce_fan_in", []))
+    summaries = state.reduce_summaries if reduce_levels else state.summaries
+    max_summary_length = getattr(state, "max_summary_length", None) or 5
+    max_concurrency = getattr(state, "max_concurrency", None) or int(os.getenv("MAX_CONCURRENCY", "8"))
+    combine_mode = getattr(state, "combine_mode", None) or os.getenv("COMBINE_MODE", "tree")
     
     # If there's only one summary, return it as is
     if len(summaries) <= 1:
         return {"final_summary": summaries[0] if summaries else ""}
     
-    # Initialize LLM with low temperature for consistent, factual summaries
-    llm = ChatOpenAI(
-        model=os.getenv("LLM_MODEL", "meta-llama/llama-3.1-8b-instruct:free"),
-        openai_api_key=os.getenv("OPENROUTER_API_KEY"),
-        openai_api_base=os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1"),
-        temperature=0.0  # Low temperature for factual consistency
-    )
-    
-    # Create improved prompt template for combining summaries - explicitly requesting concise summaries
-    summaries_text = "\n\n".join([f"- {summary}" for summary in summaries])
+    # Get the shared client of the reduce model with low temperature for consistent, factual summaries
+    llm = get_llm(model=get_role_model("reduce", getattr(state, "reduce_model", None)), temperature=0.0)
     
     # Set sentence limit with min=3, max=10, default=5
     sentence_limit = max(3, min(max_summary_length, 10))
     
-    prompt_template = PromptTemplate.from_template(
+    # Cluster sizes from deduplication only apply to the chunk summaries themselves
+    weights = list(getattr(state, "summary_weights", None) or [])
+    if reduce_levels or len(weights) != len(summaries):
+        weights = [1] * len(summaries)
+    weight_note = (
+        "Summaries marked [xN] stand for N near-identical sections of the document; give them proportionate weight.\n\n"
+        if max(weights) > 1 else ""
+    )
+    
+    # Create improved prompt template for combining summaries - explicitly requesting concise summaries
+    final_template = PromptTemplate.from_template(
         "You are a skilled editor tasked with combining multiple summaries into a single, concise, and coherent summary.\n\n"
         "Individual summaries:\n{summaries}\n\n"
+        f"{weight_note}"
         f"Please synthesize these summaries into one well-structured summary in exactly {sentence_limit} sentences. "
         "Remove redundancies, maintain logical flow, and ensure the result reads as a unified piece of text rather than a list of separate points. "
         "Focus only on the most essential information and keep it as brief as possible while maintaining clarity.\n\n"
         "Concise Combined Summary:"
     )
     
-    # Format prompt with summaries
-    prompt = prompt_template.format(summaries=summaries_text)
+    # Intermediate levels keep more detail so the final level has material to work with
+    partial_template = PromptTemplate.from_template(
+        "You are a skilled editor tasked with combining consecutive summaries of one document into a single, concise summary.\n\n"
+        "Individual summaries:\n{summaries}\n\n"
+        f"{weight_note}"
+        "Please merge these summaries into one short paragraph that keeps every key fact in its original order. "
+        "Remove redundancies and do not add information that is not present in the summaries.\n\n"
+        "Merged Summary:"
+    )
     
-    # Get combined summary from LLM
-    response = llm.invoke(prompt)
-    final_summary = response.content.strip()
+    if combine_mode == "single":
+        batches = [summaries]
+    else:
+        batches = batch_summaries(summaries, get_reduce_token_budget())
+    
+    # This is the last level once every summary fits into one batch
+    is_final = len(batches) == 1
+    prompt_template = final_template if is_final else partial_template
+    
+    # Limit the number of in-flight LLM calls
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    
+    # Combined summaries saved by earlier attempts of a checkpointed run
+    run_id = getattr(state, "run_id", None)
+    runs = get_run_store() if run_id else None
+    completed = await asyncio.to_thread(runs.get_summaries, run_id) if runs is not None else {}
+    model = getattr(llm, "model_name", "")
+    
+    # Stream the tokens of the final summary when the caller is consuming events
+    on_token = None
+    if is_final and getattr(state, "stream_events", False):
+        write_progress = get_progress_writer()
+        on_token = lambda token: write_progress({"event": "token", "token": token})
+    
+    async def combine_batch(batch: List[str], batch_weights: List[int]) -> str:
+        # A batch with a single oversized summary is carried to the next level unchanged
+        if len(batch) == 1:
+            return batch[0]
+        
+        # Format prompt with summaries
+        summaries_text = format_summaries(batch, batch_weights)
+        prompt = prompt_template.format(summaries=summaries_text)
+        
+        fingerprint = chunk_fingerprint(model, prompt)
+        if fingerprint in completed:
+            if on_token is not None:
+                on_token(completed[fingerprint])
+            return completed[fingerprint]
+        
+        # Get combined summary from LLM (or the response cache)
+        async with semaphore:
+            combined = await invoke_llm(llm, prompt, on_token=on_token)
+        if runs is not None:
+            await runs.aadd_summary(run_id, fingerprint, combined)
+        return combined
+    
+    # Batches are consecutive, so their weights are consecutive slices
+    offsets = [0]
+    for batch in batches:
+        offsets.append(offsets[-1] + len(batch))
+    combined = await asyncio.gather(*(
+        combine_batch(batch, weights[offsets[index]:offsets[index + 1]]) for index, batch in enumerate(batches)
+    ))
+    
+    update = {
+        "reduce_summaries": list(combined),
+        "reduce_levels": reduce_levels + 1,
+        "reduce_fan_in": reduce_fan_in + [[len(batch) for batch in batches]],
+    }
+    
+    if is_final:
+        update["final_summary"] = combined[0]
+        
+        # Remember the final summary so an unchanged document can skip combining next time
+        doc_id = getattr(state, "doc_id", None)
+        if doc_id and getattr(state, "summaries_fingerprint", None):
+            await asyncio.to_thread(get_chunk_store().set_final_summary, doc_id, state.summaries_fingerprint, combined[0])
     
     # Return updated state
-    return {"final_summary": final_summary}
\ No newline at end of file
+    return update
@@ -0,0 +1,198 @@
+"""
+Near-duplicate detection node that skips redundant chunk summaries.
+
+Chunks are compared by MinHash signatures of their word 3-grams. Signatures of
+all chunks are computed with vectorized NumPy operations, candidate pairs are
+found with locality-sensitive hashing over signature bands, and candidates
+whose estimated Jaccard similarity reaches the threshold are clustered. Only
+the first chunk of each cluster is summarized; the cluster sizes travel with
+the summaries so the combiner can weigh repeated content.
+"""
+
+import os
+import re
+import zlib
+from collections import Counter
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
+
+
+# Modulus of the MinHash permutations; products of two values below it fit in 64 bits
+MERSENNE_PRIME = (1 << 31) - 1
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def get_dedup_settings(state: Any) -> Tuple[bool, float]:
+    """
+    Get whether deduplication is enabled and its similarity threshold.
+    
+    Uses the state's ``dedup`` and ``dedup_threshold`` fields, falling back to
+    DEDUP_ENABLED (default false) and DEDUP_THRESHOLD (default 0.9).
+    
+    Returns:
+        Tuple of (enabled, threshold)
+    """
+    enabled = getattr(state, "dedup", None)
+    if enabled is None:
+        enabled = os.getenv("DEDUP_ENABLED", "false").lower() in ("1", "true", "yes")
+    threshold = getattr(state, "dedup_threshold", None)
+    if threshold is None:
+        threshold = float(os.getenv("DEDUP_THRESHOLD", "0.9"))
+    return enabled, threshold
+
+
+def shingle_hashes(text: str, size: int = 3) -> np.ndarray:
+    """
+    Hash the overlapping word n-grams of a text.
+    
+    Args:
+        text: Chunk text
+        size: Words per shingle; texts with fewer words are hashed word by word
+    
+    Returns:
+        Array of shingle hashes below MERSENNE_PRIME
+    """
+    words = np.fromiter(
+        (zlib.crc32(word.encode("utf-8")) for word in WORD_PATTERN.findall(text.lower())),
+        dtype=np.uint64
+    )
+    if len(words) < size:
+        return words % np.uint64(MERSENNE_PRIME)
+    
+    # Polynomial rolling combination of each window of word hashes
+    count = len(words) - size + 1
+    hashes = np.zeros(count, dtype=np.uint64)
+    for offset in range(size):
+        hashes = (hashes * np.uint64(1000003) + words[offset:offset + count]) % np.uint64(MERSENNE_PRIME)
+    return hashes
+
+
+def minhash_signatures(texts: List[str], num_perm: int = 128, block_size: int = 1 << 14) -> np.ndarray:
+    """
+    Compute MinHash signatures for a list of texts.
+    
+    Shingles of many chunks are permuted together in blocks of about
+    ``block_size`` shingles, which bounds memory on very long documents: the
+    permuted block takes ``num_perm * block_size * 8`` bytes (16 MB by default).
+    
+    Args:
+        texts: Chunk texts
+        num_perm: Number of hash permutations (signature length)
+        block_size: Approximate number of shingles hashed per NumPy operation
+    
+    Returns:
+        Array of shape (len(texts), num_perm)
+    """
+    # Fixed seed so signatures are comparable across runs
+    rng = np.random.default_rng(1)
+    a = rng.integers(1, MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+    b = rng.integers(0, MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+    
+    shingles = [shingle_hashes(text) for text in texts]
+    signatures = np.full((len(texts), num_perm), MERSENNE_PRIME, dtype=np.uint64)
+    
+    start = 0
+    while start < len(texts):
+        end = start + 1
+        total = len(shingles[start])
+        while end < len(texts) and total + len(shingles[end]) <= block_size:
+            total += len(shingles[end])
+            end += 1
+        
+        # Texts without words keep the all-maximum signature
+        block = [index for index in range(start, end) if len(shingles[index])]
+        if block:
+            values = np.concatenate([shingles[index] for index in block])
+            offsets = np.cumsum([0] + [len(shingles[index]) for index in block[:-1]])
+            # In place, so only one (num_perm, block) array is alive at a time
+            permuted = a * values[np.newaxis, :]
+            permuted += b
+            permuted %= np.uint64(MERSENNE_PRIME)
+            signatures[block] = np.minimum.reduceat(permuted, offsets, axis=1).T
+        start = end
+    
+    return signatures
+
+
+def cluster_signatures(signatures: np.ndarray, threshold: float, bands: int = 32) -> List[int]:
+    """
+    Cluster near-duplicate signatures.
+    
+    Chunks sharing any band of their signature are candidates; a candidate
+    joins a cluster when the fraction of equal signature values (the estimated
+    Jaccard similarity) is at least ``threshold``.
+    
+    Args:
+        signatures: MinHash signatures, one row per chunk
+        threshold: Minimum estimated Jaccard similarity of duplicates
+        bands: Number of LSH bands
+    
+    Returns:
+        For each chunk, the index of the first chunk of its cluster
+    """
+    count, num_perm = signatures.shape
+    rows = max(1, num_perm // bands)
+    parent = list(range(count))
+    
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+    
+    for band_start in range(0, num_perm, rows):
+        band = np.ascontiguousarray(signatures[:, band_start:band_start + rows])
+        _, bucket_ids = np.unique(band, axis=0, return_inverse=True)
+        bucket_ids = bucket_ids.reshape(-1)
+        
+        # Group chunk indices by bucket, keeping document order within each bucket
+        order = np.argsort(bucket_ids, kind="stable")
+        boundaries = np.flatnonzero(np.diff(bucket_ids[order])) + 1
+        for members in np.split(order, boundaries):
+            if len(members) < 2:
+                continue
+            
+            # Compare every member with the first (earliest) chunk of the bucket
+            first = members[0]
+            similarity = (signatures[members[1:]] == signatures[first]).mean(axis=1)
+            for member, score in zip(members[1:], similarity):
+                if score >= threshold:
+                    root, other = find(first), find(member)
+                    if root != other:
+                        parent[max(root, other)] = min(root, other)
+    
+    return [find(index) for index in range(count)]
+
+
+def dedup_chunks(state: Any) -> Dict[str, Any]:
+    """
+    Drop near-duplicate chunks before summarization.
+    
+    Args:
+        state: The current state containing chunks
+    
+    Returns:
+        Updated state with one representative chunk per cluster, the cluster
+        sizes as ``chunk_weights`` and the number of skipped chunks
+    """
+    # Access attributes using dot notation for Pydantic models
+    chunks = state.chunks
+    enabled, threshold = get_dedup_settings(state)
+    
+    if not enabled or len(chunks) < 2:
+        return {}
+    
+    signatures = minhash_signatures(chunks.texts())
+    roots = cluster_signatures(signatures, threshold)
+    sizes = Counter(roots)
+    
+    # Each cluster is represented by its first chunk, so document order is kept
+    representatives = [index for index, root in enumerate(roots) if root == index]
+    
+    return {
+        "chunks": chunks.select(representatives),
+        "chunk_weights": [sizes[index] for index in representatives],
+        "duplicate_chunks": len(chunks) - len(representatives),
+    }
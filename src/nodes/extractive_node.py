@@ -0,0 +1,202 @@
+"""
+Extractive nodes that rank text by salience with TF-IDF and TextRank.
+
+Texts are turned into a sparse, L2-normalized TF-IDF matrix and ranked with
+TextRank over their cosine similarity graph. The similarity matrix is never
+materialized: each power iteration multiplies by the TF-IDF matrix and its
+transpose, so the cost grows with the number of terms rather than the square
+of the number of texts.
+"""
+
+import os
+import re
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
+
+import numpy as np
+
+from src.utils.text_splitter import estimate_tokens
+
+if TYPE_CHECKING:
+    from scipy import sparse
+
+
+WORD_PATTERN = re.compile(r"\w+")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+# Shorter fragments (headings, captions) are not used as extractive summary sentences
+MIN_SENTENCE_WORDS = 8
+
+
+def get_summary_mode(state: Any) -> str:
+    """
+    Get the summary mode from the state or SUMMARY_MODE.
+    
+    * ``full`` (default): every chunk is summarized by the LLM
+    * ``salient``: only the most salient chunks, up to a token budget, reach the LLM
+    * ``extractive``: the top-ranked sentences are returned without any LLM call
+    """
+    mode = getattr(state, "summary_mode", None) or os.getenv("SUMMARY_MODE", "full")
+    if mode not in ("full", "salient", "extractive"):
+        raise ValueError(f"Unsupported summary mode: {mode}")
+    return mode
+
+
+def tfidf_matrix(texts: List[str]) -> "sparse.csr_matrix":
+    """
+    Build an L2-normalized TF-IDF matrix with sublinear term frequencies.
+    
+    Args:
+        texts: Texts to vectorize
+    
+    Returns:
+        Sparse matrix of shape (len(texts), vocabulary size)
+    """
+    # SciPy is only needed in salient and extractive summary modes
+    from scipy import sparse
+    
+    vocabulary: Dict[str, int] = {}
+    rows: List[int] = []
+    columns: List[int] = []
+    
+    for row, text in enumerate(texts):
+        for word in WORD_PATTERN.findall(text.lower()):
+            rows.append(row)
+            columns.append(vocabulary.setdefault(word, len(vocabulary)))
+    
+    # Duplicate (row, column) entries are summed into term counts
+    counts = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float64), (rows, columns)),
+        shape=(len(texts), max(1, len(vocabulary)))
+    )
+    counts.sum_duplicates()
+    
+    document_frequency = np.bincount(counts.indices, minlength=counts.shape[1])
+    idf = np.log((1 + len(texts)) / (1 + document_frequency)) + 1.0
+    
+    matrix = counts.copy()
+    matrix.data = (1.0 + np.log(matrix.data)) * idf[matrix.indices]
+    
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.csr_matrix(sparse.diags(1.0 / norms) @ matrix)
+
+
+def textrank_scores(matrix: "sparse.csr_matrix", damping: float = 0.85, iterations: int = 100, tolerance: float = 1e-6) -> np.ndarray:
+    """
+    Rank rows of a normalized TF-IDF matrix with TextRank.
+    
+    Edges are the cosine similarities between rows (without self-loops).
+    Rows without any similar row spread their rank uniformly.
+    
+    Args:
+        matrix: L2-normalized TF-IDF matrix
+        damping: PageRank damping factor
+        iterations: Maximum number of power iterations
+        tolerance: L1 change at which the iteration stops
+    
+    Returns:
+        Array of scores summing to one
+    """
+    count = matrix.shape[0]
+    if count == 0:
+        return np.zeros(0)
+    
+    transposed = matrix.T.tocsr()
+    self_similarity = np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel()
+    
+    def similarity_times(vector: np.ndarray) -> np.ndarray:
+        # (X X^T - diag) v without building X X^T
+        return matrix @ (transposed @ vector) - self_similarity * vector
+    
+    degree = similarity_times(np.ones(count))
+    dangling = degree <= 1e-12
+    degree[dangling] = 1.0
+    
+    scores = np.full(count, 1.0 / count)
+    for _ in range(iterations):
+        spread = np.where(dangling, 0.0, scores / degree)
+        updated = (1 - damping) / count + damping * (similarity_times(spread) + scores[dangling].sum() / count)
+        if np.abs(updated - scores).sum() < tolerance:
+            scores = updated
+            break
+        scores = updated
+    
+    return scores / scores.sum()
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into whitespace-normalized sentences at terminal punctuation and blank lines"""
+    return [" ".join(sentence.split()) for sentence in SENTENCE_PATTERN.split(text) if sentence.strip()]
+
+
+def select_salient_chunks(state: Any) -> Dict[str, Any]:
+    """
+    Keep only the most salient chunks in ``salient`` summary mode.
+    
+    Chunks are ranked with TF-IDF TextRank and taken from the top until the
+    token budget (the state's ``salient_token_budget`` or SALIENT_TOKEN_BUDGET)
+    is used up; the kept chunks stay in document order.
+    
+    Args:
+        state: The current state containing chunks
+    
+    Returns:
+        Updated state with the selected chunks and the number left out
+    """
+    # Access attributes using dot notation for Pydantic models
+    chunks = state.chunks
+    if get_summary_mode(state) != "salient" or len(chunks) < 2:
+        return {}
+    
+    token_budget = getattr(state, "salient_token_budget", None) or int(os.getenv("SALIENT_TOKEN_BUDGET", "4096"))
+    texts = chunks.texts()
+    scores = textrank_scores(tfidf_matrix(texts))
+    
+    # Highest scores first; the top chunk is always kept
+    selected = []
+    used = 0
+    for index in np.argsort(-scores, kind="stable"):
+        tokens = estimate_tokens(texts[index])
+        if selected and used + tokens > token_budget:
+            continue
+        selected.append(int(index))
+        used += tokens
+    selected.sort()
+    
+    update = {
+        "chunks": chunks.select(selected),
+        "unselected_chunks": len(chunks) - len(selected),
+    }
+    
+    # Keep deduplication weights aligned with the selected chunks
+    chunk_weights: Optional[List[int]] = getattr(state, "chunk_weights", None)
+    if chunk_weights:
+        update["chunk_weights"] = [chunk_weights[index] for index in selected]
+    return update
+
+
+def extract_summary(state: Any) -> Dict[str, Any]:
+    """
+    Build the final summary from the top-ranked sentences, without an LLM.
+    
+    Args:
+        state: The current state containing loaded documents
+    
+    Returns:
+        Updated state with the final summary; the documents are released
+    """
+    # Access attributes using dot notation for Pydantic models
+    max_summary_length = getattr(state, "max_summary_length", None) or 5
+    
+    sentences = [
+        sentence
+        for document in state.documents
+        for sentence in split_sentences(document.page_content)
+    ]
+    sentences = [sentence for sentence in sentences if len(sentence.split()) >= MIN_SENTENCE_WORDS] or sentences
+    if not sentences:
+        return {"final_summary": "", "documents": []}
+    
+    scores = textrank_scores(tfidf_matrix(sentences))
+    top = sorted(np.argsort(-scores, kind="stable")[:max_summary_length])
+    return {"final_summary": " ".join(sentences[index] for index in top), "documents": []}
@@ -0,0 +1,134 @@
+"""
+Pipelined node that overlaps loading, splitting and chunk summarization.
+"""
+
+import os
+import asyncio
+from typing import Dict, Any, List
+
+from src.loaders.content_loader import iter_documents
+from src.nodes.summarize_node import (
+    get_max_concurrency, get_map_mode, get_map_llm, get_pack_token_budget, pack_chunks, summarize_pack,
+    collect_summaries, fail_pack, start_incremental, start_hedging
+)
+from src.utils.progress import get_progress_writer
+from src.utils.text_splitter import DEFAULT_CHUNK_SIZE, StreamSplitter, split_documents
+
+
+async def load_split_summarize(state: Any) -> Dict[str, Any]:
+    """
+    Load, split and summarize content as a pipeline of bounded stages.
+    
+    Pages are extracted lazily in a worker thread and handed to the splitter
+    through a queue of PIPELINE_QUEUE_DEPTH pages. Each chunk is sent to the LLM
+    as soon as it is produced, and the splitter waits while ``max_concurrency``
+    chunks are in flight. Extraction, tokenization and LLM calls therefore
+    overlap, and only a bounded number of pages and chunks is held in memory.
+    Chunks never span page boundaries; in ``packed`` map mode the chunks of
+    each page are packed into as few requests as the pack token budget allows.
+    Text files are read in windows of one continuous text and split as a
+    stream, so their chunks do span windows and the file is never held whole.
+    The document size is not known up front, so no strategy is planned and an
+    unset chunk size falls back to DEFAULT_CHUNK_SIZE.
+    
+    Args:
+        state: The current state containing input_type, content and chunking settings
+    
+    Returns:
+        Updated state with chunk summaries and any per-chunk failures
+    """
+    # Access attributes using dot notation for Pydantic models
+    input_type = state.input_type
+    content = state.content
+    chunk_size = state.chunk_size or DEFAULT_CHUNK_SIZE
+    chunk_overlap = state.chunk_overlap
+    queue_depth = max(1, int(os.getenv("PIPELINE_QUEUE_DEPTH", "4")))
+    
+    # One chunk per request unless packing is enabled
+    if get_map_mode(state) == "packed":
+        pack_budget, pack_size = get_pack_token_budget(), int(os.getenv("PACK_MAX_CHUNKS", "10"))
+    else:
+        pack_budget, pack_size = 0, 1
+    
+    # Get the shared client of the map model
+    llm = get_map_llm(state)
+    write_progress = get_progress_writer()
+    incremental = start_incremental(state, llm)
+    hedger = start_hedging(state, llm)
+    
+    pages: asyncio.Queue = asyncio.Queue(maxsize=queue_depth)
+    in_flight = asyncio.Semaphore(get_max_concurrency(state))
+    tasks = []
+    chunk_count = 0
+    
+    async def extract():
+        # Pull pages from the lazy loader in a thread; blocks while the queue is full
+        try:
+            iterator = await asyncio.to_thread(iter_documents, input_type, content)
+            page_number = 0
+            while True:
+                page = await asyncio.to_thread(next, iterator, None)
+                if page is None:
+                    break
+                page_number += 1
+                await pages.put(page)
+            write_progress({"event": "loaded", "documents": page_number})
+        except Exception as e:
+            # Only loader errors are load failures; splitter and LLM errors keep their own message
+            raise Exception(f"Failed to load content: {str(e)}") from e
+        finally:
+            await pages.put(None)
+    
+    async def summarize_group(indices: List[int], texts: List[str]) -> List[Any]:
+        try:
+            return await summarize_pack(llm, indices, texts, write_progress, incremental, hedger)
+        except Exception as e:
+            return fail_pack(indices, e, write_progress)
+        finally:
+            in_flight.release()
+    
+    # Windows of a text file are pieces of one text rather than separate pages
+    stream = StreamSplitter(chunk_size, chunk_overlap) if input_type == "textfile" else None
+    
+    async def dispatch(texts: List[str]):
+        nonlocal chunk_count
+        for pack in pack_chunks(texts, pack_budget, pack_size):
+            await in_flight.acquire()
+            tasks.append(asyncio.create_task(summarize_group(
+                [chunk_count + index for index in pack], [texts[index] for index in pack]
+            )))
+        chunk_count += len(texts)
+    
+    async def split_and_dispatch():
+        while True:
+            page = await pages.get()
+            if page is None:
+                break
+            
+            # Tokenize off the event loop so LLM responses keep being processed
+            if stream is not None:
+                texts = await asyncio.to_thread(stream.feed, page.page_content)
+            else:
+                chunks = await asyncio.to_thread(split_documents, [page], chunk_size, chunk_overlap)
+                texts = [chunk.page_content for chunk in chunks]
+            await dispatch(texts)
+        
+        if stream is not None:
+            await dispatch(await asyncio.to_thread(stream.finish))
+    
+    producer = asyncio.create_task(extract())
+    consumer = asyncio.create_task(split_and_dispatch())
+    try:
+        await asyncio.gather(producer, consumer)
+    except Exception:
+        for task in [producer, consumer] + tasks:
+            task.cancel()
+        raise
+    
+    write_progress({"event": "split", "chunks": chunk_count})
+    
+    # Tasks are in chunk order and report per-chunk failures in their results
+    grouped = await asyncio.gather(*tasks)
+    
+    # Return updated state
+    return await collect_summaries([result for results in grouped for result in results], state, incremental, hedger)
@@ -0,0 +1,259 @@
+"""
+Strategy planning node that picks the cheapest way to summarize the loaded documents.
+
+Token counts are estimated once from the loaded text and compared with the
+model's context window:
+
+* ``stuff``: the whole document fits in one prompt and is summarized with a
+  single LLM call, skipping splitting and combining.
+* ``map_reduce``: chunks are summarized and every chunk summary fits into one
+  combine call.
+* ``tree``: chunk summaries need several combine levels.
+
+Unless a chunk size is configured, it is derived from the document size so the
+chunk summaries fit into as few combine calls as possible.
+"""
+
+import os
+import math
+from typing import List, Dict, Any
+from langchain_core.prompts import PromptTemplate
+
+from src.nodes.combine_node import get_reduce_token_budget
+from src.nodes.extractive_node import get_summary_mode
+from src.nodes.summarize_node import get_map_mode, get_pack_token_budget
+from src.utils.llm import get_llm, get_role_model, invoke_llm
+from src.utils.progress import get_progress_writer
+from src.utils.text_splitter import DEFAULT_CHUNK_SIZE, estimate_tokens, get_splitter_config
+
+
+# Tokens assumed for one chunk summary (1-2 sentences) and one merged partial summary
+SUMMARY_TOKEN_ESTIMATE = 60
+PARTIAL_SUMMARY_TOKEN_ESTIMATE = 150
+
+# Derived chunk sizes are rounded up to this step, so small edits to a document
+# keep its chunk boundaries (and incremental summaries) stable
+CHUNK_SIZE_STEP = 64
+
+
+def get_stuff_token_budget() -> int:
+    """
+    Get the number of document tokens that may be summarized in one call.
+    
+    Uses STUFF_TOKEN_BUDGET if set, otherwise half of LLM_CONTEXT_WINDOW so the
+    instructions and the generated summary still fit in the model's context.
+    
+    Returns:
+        Token budget for the document text of a single prompt
+    """
+    budget = os.getenv("STUFF_TOKEN_BUDGET")
+    if budget:
+        return int(budget)
+    return int(os.getenv("LLM_CONTEXT_WINDOW", "8192")) // 2
+
+
+def get_strategy(state: Any) -> str:
+    """
+    Get the requested strategy from the state or SUMMARY_STRATEGY.
+    
+    * ``auto`` (default): summarize documents that fit in one call directly
+    * ``map_reduce``: always split into chunks, as before planning existed
+    """
+    strategy = getattr(state, "strategy", None) or os.getenv("SUMMARY_STRATEGY", "auto")
+    if strategy not in ("auto", "map_reduce"):
+        raise ValueError(f"Unsupported summary strategy: {strategy}")
+    return strategy
+
+
+def count_chunks(document_tokens: List[int], chunk_size: int, chunk_overlap: int) -> int:
+    """
+    Number of chunks the splitter produces for documents of the given sizes.
+    
+    Args:
+        document_tokens: Token count of each document
+        chunk_size: Number of tokens per chunk
+        chunk_overlap: Number of tokens shared by consecutive chunks
+    
+    Returns:
+        Total number of chunks
+    """
+    step = max(1, chunk_size - chunk_overlap)
+    return sum(
+        1 + math.ceil(max(0, tokens - chunk_size) / step)
+        for tokens in document_tokens if tokens > 0
+    )
+
+
+def derive_chunk_size(total_tokens: int, chunk_overlap: int, reduce_budget: int, min_size: int, max_size: int) -> int:
+    """
+    Chunk size at which the chunk summaries fit into one combine call.
+    
+    Args:
+        total_tokens: Tokens in all documents
+        chunk_overlap: Number of tokens shared by consecutive chunks
+        reduce_budget: Summary tokens per combine call
+        min_size: Smallest chunk size to return
+        max_size: Largest chunk size to return
+    
+    Returns:
+        Chunk size in tokens, rounded up to CHUNK_SIZE_STEP and clamped to [min_size, max_size]
+    """
+    target_chunks = max(1, reduce_budget // SUMMARY_TOKEN_ESTIMATE)
+    size = math.ceil(total_tokens / target_chunks) + chunk_overlap
+    size = math.ceil(size / CHUNK_SIZE_STEP) * CHUNK_SIZE_STEP
+    return max(min_size, min(size, max_size))
+
+
+def estimate_reduce(summaries: int, reduce_budget: int, combine_mode: str) -> Dict[str, int]:
+    """
+    Estimate the combine calls and levels needed to reduce chunk summaries to one.
+    
+    Mirrors the token-bounded batching of the combiner with estimated summary sizes.
+    
+    Args:
+        summaries: Number of chunk summaries
+        reduce_budget: Summary tokens per combine call
+        combine_mode: 'tree' or 'single'
+    
+    Returns:
+        Dictionary with the number of combine calls and reduce levels
+    """
+    if summaries <= 1:
+        return {"calls": 0, "levels": 0}
+    if combine_mode == "single":
+        return {"calls": 1, "levels": 1}
+    
+    calls = levels = 0
+    summary_tokens = SUMMARY_TOKEN_ESTIMATE
+    while summaries > 1:
+        per_batch = max(2, reduce_budget // summary_tokens)
+        batches = math.ceil(summaries / per_batch)
+        # A trailing batch with a single summary is carried over without a call
+        last_batch = summaries - (batches - 1) * per_batch
+        calls += batches - (1 if batches > 1 and last_batch == 1 else 0)
+        summaries = batches
+        summary_tokens = PARTIAL_SUMMARY_TOKEN_ESTIMATE
+        levels += 1
+    return {"calls": calls, "levels": levels}
+
+
+def plan_summary(state: Any) -> Dict[str, Any]:
+    """
+    Choose the summarization strategy and chunk size for the loaded documents.
+    
+    A configured chunk size is kept; otherwise it is derived from the document
+    size, between MIN_CHUNK_SIZE and MAX_CHUNK_SIZE (default: the stuff token
+    budget). Salient mode and the sentence-transformers splitter keep the
+    default size: salient selection needs fine-grained chunks and that
+    splitter is limited by its model's sequence length. Call counts are upper
+    bounds, since deduplication may skip chunks.
+    
+    Args:
+        state: The current state containing documents and chunking settings
+    
+    Returns:
+        Updated state with the plan and the chunk size to split with
+    """
+    # Access attributes using dot notation for Pydantic models
+    documents = state.documents
+    chunk_overlap = state.chunk_overlap
+    summary_mode = get_summary_mode(state)
+    combine_mode = getattr(state, "combine_mode", None) or os.getenv("COMBINE_MODE", "tree")
+    
+    # Count tokens once; the same estimate sizes the combine and pack budgets
+    document_tokens = [estimate_tokens(document.page_content) if document.page_content.strip() else 0 for document in documents]
+    total_tokens = sum(document_tokens)
+    stuff_budget = get_stuff_token_budget()
+    reduce_budget = get_reduce_token_budget()
+    
+    # Stuff: one call summarizes the whole document
+    if get_strategy(state) == "auto" and 0 < total_tokens <= stuff_budget:
+        plan = {
+            "strategy": "stuff",
+            "document_tokens": total_tokens,
+            "chunk_size": None,
+            "chunks": 0,
+            "map_calls": 0,
+            "reduce_calls": 0,
+            "reduce_levels": 0,
+            "estimated_calls": 1,
+        }
+        return {"plan": plan}
+    
+    chunk_size = getattr(state, "chunk_size", None)
+    if not chunk_size:
+        min_size = int(os.getenv("MIN_CHUNK_SIZE", str(DEFAULT_CHUNK_SIZE)))
+        backend, _ = get_splitter_config()
+        if summary_mode == "salient" or backend == "sentence-transformers":
+            chunk_size = min_size
+        else:
+            max_size = int(os.getenv("MAX_CHUNK_SIZE", "0")) or stuff_budget
+            chunk_size = derive_chunk_size(total_tokens, chunk_overlap, reduce_budget, min_size, max_size)
+    
+    chunks = count_chunks(document_tokens, chunk_size, chunk_overlap)
+    
+    # Salient selection caps the chunk tokens sent to the LLM
+    summarized = chunks
+    if summary_mode == "salient":
+        token_budget = getattr(state, "salient_token_budget", None) or int(os.getenv("SALIENT_TOKEN_BUDGET", "4096"))
+        summarized = min(chunks, max(1, token_budget // chunk_size))
+    
+    map_calls = summarized
+    if get_map_mode(state) == "packed":
+        per_pack = max(1, min(int(os.getenv("PACK_MAX_CHUNKS", "10")), get_pack_token_budget() // chunk_size))
+        map_calls = math.ceil(summarized / per_pack)
+    
+    reduce = estimate_reduce(summarized, reduce_budget, combine_mode)
+    plan = {
+        "strategy": "tree" if reduce["levels"] > 1 else "map_reduce",
+        "document_tokens": total_tokens,
+        "chunk_size": chunk_size,
+        "chunks": chunks,
+        "map_calls": map_calls,
+        "reduce_calls": reduce["calls"],
+        "reduce_levels": reduce["levels"],
+        "estimated_calls": map_calls + reduce["calls"],
+    }
+    
+    # Return updated state
+    return {"plan": plan, "chunk_size": chunk_size}
+
+
+async def stuff_summary(state: Any) -> Dict[str, Any]:
+    """
+    Summarize all documents with a single LLM call.
+    
+    Args:
+        state: The current state containing documents
+    
+    Returns:
+        Updated state with the final summary; the documents are released
+    """
+    # Access attributes using dot notation for Pydantic models
+    text = "\n\n".join(document.page_content for document in state.documents)
+    max_summary_length = getattr(state, "max_summary_length", None) or 5
+    
+    # The single call produces the final summary, so it goes to the reduce model
+    llm = get_llm(model=get_role_model("reduce", getattr(state, "reduce_model", None)), temperature=0.0)
+    
+    # Set sentence limit with min=3, max=10, default=5
+    sentence_limit = max(3, min(max_summary_length, 10))
+    
+    prompt_template = PromptTemplate.from_template(
+        "You are a precise summarization assistant. Your task is to create a concise, accurate summary of the provided document while preserving its key information and main points.\n\n"
+        "Document:\n{text}\n\n"
+        f"Please provide a well-structured summary in exactly {sentence_limit} sentences. "
+        "Maintain logical flow and focus only on the most essential information, keeping it as brief as possible while maintaining clarity.\n\n"
+        "Concise Summary:"
+    )
+    
+    # Stream the tokens of the summary when the caller is consuming events
+    on_token = None
+    if getattr(state, "stream_events", False):
+        write_progress = get_progress_writer()
+        on_token = lambda token: write_progress({"event": "token", "token": token})
+    
+    summary = await invoke_llm(llm, prompt_template.format(text=text), on_token=on_token)
+    
+    # Return updated state
+    return {"final_summary": summary, "documents": []}
@@ -3,52 +3,396 @@ Summarization node for processing text chunks.
 """
 
 import os
-from typing import List, Dict, Any
-from langchain_openai import ChatOpenAI
-from langchain.prompts import PromptTemplate
-from langchain_core.documents import Document
+import json
+import asyncio
+from typing import List, Dict, Any, Callable, Optional
+from langchain_core.prompts import PromptTemplate
 
+from src.utils.chunk_store import IncrementalSummaries
+from src.utils.chunks import Chunk, ChunkList
+from src.utils.hedging import Hedger, hedger_from_env, hedging_enabled
+from src.utils.llm import get_llm, get_role_model, invoke_llm
+from src.utils.progress import get_progress_writer
+from src.utils.text_splitter import estimate_tokens
 
-def summarize_chunks(state: Any) -> Dict[str, Any]:
+
+# Create improved prompt template for summarization - explicitly requesting concise summaries
+SUMMARY_PROMPT = PromptTemplate.from_template(
+    "You are a precise summarization assistant. Your task is to create a very concise, accurate summary of the provided text while preserving key information and main points.\n\n"
+    "Text to summarize:\n{chunk_text}\n\n"
+    "Please provide a clear, factual summary in exactly 1-2 sentences. Focus only on the most essential information. Keep it as brief as possible while maintaining clarity.\n\n"
+    "Concise Summary:"
+)
+
+
+# Packed map mode: several chunks per request, answered as a JSON array of summaries
+PACKED_SUMMARY_PROMPT = PromptTemplate.from_template(
+    "You are a precise summarization assistant. Below are {count} consecutive chunks of one document, each wrapped in <chunk> tags.\n\n"
+    "{chunks}\n\n"
+    "Summarize each chunk separately in exactly 1-2 sentences, preserving its key information. "
+    "Respond with only a JSON array of exactly {count} strings: one summary per chunk, in the same order as the chunks.\n\n"
+    "JSON array:"
+)
+
+
+def get_max_concurrency(state: Any) -> int:
+    """Get the per-document limit on concurrent LLM calls from the state or MAX_CONCURRENCY"""
+    return max(1, getattr(state, "max_concurrency", None) or int(os.getenv("MAX_CONCURRENCY", "8")))
+
+
+def get_map_mode(state: Any) -> str:
+    """Get the map mode ('chunk' or 'packed') from the state or MAP_MODE"""
+    return getattr(state, "map_mode", None) or os.getenv("MAP_MODE", "chunk")
+
+
+def get_map_llm(state: Any) -> Any:
+    """Get the shared client of the map model (the state's map_model, MAP_MODEL or LLM_MODEL)"""
+    # Low temperature for consistent, factual summaries
+    return get_llm(model=get_role_model("map", getattr(state, "map_model", None)), temperature=0.0)
+
+
+def start_hedging(state: Any, llm: Any) -> Optional[Hedger]:
     """
-    Summarize text chunks using an LLM.
+    Create the hedger for a run's map calls, if hedging is enabled.
+    
+    Backup requests go to HEDGE_MODEL when set, otherwise to the map model itself.
     
     Args:
-        state: The current state containing chunks to summarize
+        state: The current state; its ``hedge`` overrides HEDGE_ENABLED
+        llm: Client of the map model
+    
+    Returns:
+        A Hedger, or None when hedging is disabled
+    """
+    if not hedging_enabled(getattr(state, "hedge", None)):
+        return None
+    model = getattr(llm, "model_name", "")
+    backup_model = os.getenv("HEDGE_MODEL") or model
+    fallback = get_llm(model=backup_model, temperature=0.0) if backup_model != model else llm
+    return hedger_from_env(model, backup_model, fallback)
+
+
+def get_pack_token_budget() -> int:
+    """
+    Get the number of chunk tokens that may be sent in one packed request.
+    
+    Uses PACK_TOKEN_BUDGET if set, otherwise a quarter of LLM_CONTEXT_WINDOW so
+    the instructions and one summary per chunk still fit in the model's context.
+    
+    Returns:
+        Token budget for the chunks of a single packed prompt
+    """
+    budget = os.getenv("PACK_TOKEN_BUDGET")
+    if budget:
+        return int(budget)
+    return int(os.getenv("LLM_CONTEXT_WINDOW", "8192")) // 4
+
+
+def pack_chunks(texts: List[str], token_budget: int, max_chunks: int) -> List[List[int]]:
+    """
+    Group consecutive chunks into packs that fit within a token budget.
+    
+    Args:
+        texts: Chunk texts, in document order
+        token_budget: Maximum number of chunk tokens per pack
+        max_chunks: Maximum number of chunks per pack
         
     Returns:
-        Updated state with chunk summaries
+        List of packs of chunk indices
     """
-    # Access attributes using dot notation for Pydantic models
-    chunks = state.chunks
+    packs = []
+    current = []
+    current_tokens = 0
     
-    # Initialize LLM with low temperature for consistent, factual summaries
-    llm = ChatOpenAI(
-        model=os.getenv("LLM_MODEL", "meta-llama/llama-3.1-8b-instruct:free"),
-        openai_api_key=os.getenv("OPENROUTER_API_KEY"),
-        openai_api_base=os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1"),
-        temperature=0.0  # Low temperature for factual consistency
-    )
+    for index, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_chunks):
+            packs.append(current)
+            current = []
+            current_tokens = 0
+        current.append(index)
+        current_tokens += tokens
+    
+    if current:
+        packs.append(current)
+    
+    return packs
+
+
+def parse_packed_summaries(response: str, count: int) -> Optional[List[str]]:
+    """
+    Parse the JSON array answer to a packed prompt.
+    
+    Args:
+        response: LLM response, possibly wrapped in a code fence or extra text
+        count: Number of chunks in the pack
+        
+    Returns:
+        The summaries in chunk order, or None if the response is not a JSON
+        array of ``count`` non-empty strings
+    """
+    start = response.find("[")
+    end = response.rfind("]")
+    if start == -1 or end < start:
+        return None
+    
+    try:
+        summaries = json.loads(response[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    
+    if not isinstance(summaries, list) or len(summaries) != count:
+        return None
+    if not all(isinstance(summary, str) and summary.strip() for summary in summaries):
+        return None
+    return [summary.strip() for summary in summaries]
+
+
+async def summarize_chunk(
+    llm: Any,
+    index: int,
+    text: str,
+    write_progress: Callable,
+    incremental: Optional[IncrementalSummaries] = None,
+    hedger: Optional[Hedger] = None
+) -> str:
+    """
+    Summarize a single chunk and report the outcome as a progress event.
+    
+    Args:
+        llm: Chat model to call
+        index: Position of the chunk in the document
+        text: Chunk text
+        write_progress: Progress event writer
+        incremental: Stored summaries of the document, reused for unchanged chunks
+        hedger: Hedger for slow calls, if hedging is enabled
+    
+    Returns:
+        The chunk summary
+    """
+    # Reuse the stored summary of an unchanged chunk
+    if incremental is not None:
+        summary = incremental.lookup(text)
+        if summary is not None:
+            write_progress({"event": "chunk_summary", "index": index, "summary": summary, "reused": True})
+            return summary
+    
+    # Format prompt with chunk content
+    prompt = SUMMARY_PROMPT.format(chunk_text=text)
     
-    # Create improved prompt template for summarization - explicitly requesting concise summaries
-    prompt_template = PromptTemplate.from_template(
-        "You are a precise summarization assistant. Your task is to create a very concise, accurate summary of the provided text while preserving key information and main points.\n\n"
-        "Text to summarize:\n{chunk_text}\n\n"
-        "Please provide a clear, factual summary in exactly 1-2 sentences. Focus only on the most essential information. Keep it as brief as possible while maintaining clarity.\n\n"
-        "Concise Summary:"
+    # Get summary from LLM (or the response cache)
+    try:
+        summary = await invoke_llm(llm, prompt, hedger=hedger)
+    except Exception as e:
+        write_progress({"event": "chunk_failed", "index": index, "error": str(e)})
+        raise
+    
+    if incremental is not None:
+        await incremental.record(text, summary)
+    
+    write_progress({"event": "chunk_summary", "index": index, "summary": summary})
+    return summary
+
+
+async def summarize_pack(
+    llm: Any,
+    indices: List[int],
+    texts: List[str],
+    write_progress: Callable,
+    incremental: Optional[IncrementalSummaries] = None,
+    hedger: Optional[Hedger] = None
+) -> List[Any]:
+    """
+    Summarize a pack of chunks with one LLM call.
+    
+    Chunks with a stored summary are not sent. If the response is not a JSON
+    array with one summary per chunk, the pack falls back to per-chunk calls.
+    
+    Args:
+        llm: Chat model to call
+        indices: Positions of the chunks in the document
+        texts: Chunk texts
+        write_progress: Progress event writer
+        incremental: Stored summaries of the document, reused for unchanged chunks
+        hedger: Hedger for slow calls, if hedging is enabled
+    
+    Returns:
+        Summary strings or exceptions, in chunk order
+    """
+    results: List[Any] = [None] * len(texts)
+    pending = []
+    
+    # Reuse the stored summaries of unchanged chunks
+    for position, text in enumerate(texts):
+        summary = incremental.lookup(text) if incremental is not None else None
+        if summary is None:
+            pending.append(position)
+            continue
+        write_progress({"event": "chunk_summary", "index": indices[position], "summary": summary, "reused": True})
+        results[position] = summary
+    
+    if len(pending) > 1:
+        chunks_text = "\n\n".join(
+            f'<chunk id="{number}">\n{texts[position]}\n</chunk>' for number, position in enumerate(pending, start=1)
+        )
+        prompt = PACKED_SUMMARY_PROMPT.format(count=len(pending), chunks=chunks_text)
+        
+        try:
+            summaries = parse_packed_summaries(await invoke_llm(llm, prompt, hedger=hedger), len(pending))
+        except Exception:
+            summaries = None
+        
+        if summaries is not None:
+            for position, summary in zip(pending, summaries):
+                if incremental is not None:
+                    await incremental.record(texts[position], summary)
+                write_progress({"event": "chunk_summary", "index": indices[position], "summary": summary})
+                results[position] = summary
+            return results
+    
+    # Single chunks and packs whose response did not parse get one call per chunk
+    fallback = await asyncio.gather(
+        *(summarize_chunk(llm, indices[position], texts[position], write_progress, incremental, hedger) for position in pending),
+        return_exceptions=True
     )
+    for position, result in zip(pending, fallback):
+        results[position] = result
+    return results
+
+
+def fail_pack(indices: List[int], error: Exception, write_progress: Callable) -> List[Exception]:
+    """Report every chunk of a pack that raised as failed, so one pack does not fail the run"""
+    for index in indices:
+        write_progress({"event": "chunk_failed", "index": index, "error": str(error)})
+    return [error] * len(indices)
+
+
+def start_incremental(state: Any, llm: Any) -> IncrementalSummaries:
+    """Load the stored chunk summaries of the state's doc_id and run_id (a no-op tracker without either)"""
+    return IncrementalSummaries(
+        getattr(state, "doc_id", None), getattr(llm, "model_name", ""), run_id=getattr(state, "run_id", None)
+    )
+
+
+async def collect_summaries(
+    results: List[Any],
+    state: Any = None,
+    incremental: Optional[IncrementalSummaries] = None,
+    hedger: Optional[Hedger] = None
+) -> Dict[str, Any]:
+    """
+    Split per-chunk results into ordered summaries and failures.
+    
+    In incremental mode the run's chunk summaries are stored, and the stored
+    final summary is returned when the combiner input did not change. A
+    checkpointed run reports how many chunks it resumed.
+    
+    Args:
+        results: Summary strings or exceptions, in chunk order
+        state: The current state, for the combine settings
+        incremental: Tracker of reused, resumed and recomputed chunks
+        hedger: Hedger of the map calls, whose statistics are reported
     
+    Returns:
+        State update with summaries, failed_chunks and, after deduplication,
+        summary_weights and, with hedging, hedge_stats
+    """
     summaries = []
+    failed_chunks = []
+    
+    for index, result in enumerate(results):
+        if isinstance(result, BaseException):
+            failed_chunks.append({"index": index, "error": str(result)})
+        else:
+            summaries.append(result)
+    
+    # Nothing to combine if every chunk failed
+    if results and not summaries:
+        raise Exception(f"Failed to summarize all {len(results)} chunks: {failed_chunks[0]['error']}")
+    
+    update = {"summaries": summaries, "failed_chunks": failed_chunks}
+    
+    # Keep the near-duplicate cluster sizes aligned with the successful summaries
+    chunk_weights = getattr(state, "chunk_weights", None)
+    if chunk_weights:
+        update["summary_weights"] = [
+            weight for weight, result in zip(chunk_weights, results) if not isinstance(result, BaseException)
+        ]
+    
+    if hedger is not None:
+        update["hedge_stats"] = hedger.stats()
+    
+    if incremental is not None:
+        update.update(await incremental.finish(
+            summaries,
+            weights=update.get("summary_weights"),
+            max_summary_length=getattr(state, "max_summary_length", None) or 5,
+            combine_mode=getattr(state, "combine_mode", None) or os.getenv("COMBINE_MODE", "tree"),
+            model=incremental.model,
+            reduce_model=get_role_model("reduce", getattr(state, "reduce_model", None))
+        ))
+    
+    return update
+
+
+async def summarize_chunks(state: Any) -> Dict[str, Any]:
+    """
+    Summarize text chunks concurrently using an LLM.
     
-    # Process each chunk
-    for chunk in chunks:
-        # Format prompt with chunk content
-        prompt = prompt_template.format(chunk_text=chunk.page_content)
+    Chunks are sent to the LLM in parallel, bounded by the configured
+    concurrency limit. Summaries are returned in chunk order; chunks whose
+    LLM call failed are reported in ``failed_chunks`` instead of aborting the run.
+    With a ``doc_id`` only chunks that changed since the last run are sent. In
+    ``packed`` map mode consecutive chunks share one request up to the pack
+    token budget. Chunks go to the map model; with hedging enabled, calls
+    slower than the recent p95 latency are duplicated.
+    
+    Args:
+        state: The current state containing chunks to summarize
+    
+    Returns:
+        Updated state with chunk summaries and any per-chunk failures
+    """
+    # Access attributes using dot notation for Pydantic models
+    chunks = state.chunks
+    
+    # Get the shared client of the map model
+    llm = get_map_llm(state)
+    
+    # Limit the number of in-flight LLM calls
+    semaphore = asyncio.Semaphore(get_max_concurrency(state))
+    write_progress = get_progress_writer()
+    incremental = start_incremental(state, llm)
+    hedger = start_hedging(state, llm)
+    
+    if get_map_mode(state) == "packed":
+        texts = [chunk.page_content for chunk in chunks]
+        packs = pack_chunks(texts, get_pack_token_budget(), int(os.getenv("PACK_MAX_CHUNKS", "10")))
+        
+        async def summarize_group(indices: List[int]) -> List[Any]:
+            async with semaphore:
+                try:
+                    return await summarize_pack(
+                        llm, indices, [texts[index] for index in indices], write_progress, incremental, hedger
+                    )
+                except Exception as e:
+                    return fail_pack(indices, e, write_progress)
+        
+        # Packs are consecutive, so flattening them preserves chunk order
+        grouped = await asyncio.gather(*(summarize_group(indices) for indices in packs))
+        results = [result for group in grouped for result in group]
+    else:
+        async def summarize_one(index: int, chunk: Chunk) -> str:
+            async with semaphore:
+                return await summarize_chunk(llm, index, chunk.page_content, write_progress, incremental, hedger)
         
-        # Get summary from LLM
-        response = llm.invoke(prompt)
-        summary = response.content.strip()
-        summaries.append(summary)
+        # Fan out all chunks; gather preserves chunk order
+        results = await asyncio.gather(
+            *(summarize_one(index, chunk) for index, chunk in enumerate(chunks)),
+            return_exceptions=True
+        )
     
-    # Return updated state
-    return {"summaries": summaries}
\ No newline at end of file
+    # Return updated state; the chunks are consumed and their buffers released
+    update = await collect_summaries(results, state, incremental, hedger)
+    update["chunks"] = ChunkList()
+    return update
@@ -3,99 +3,472 @@ LangGraph pipeline for content summarization.
 This module defines the workflow graph and manages the state transitions between nodes.
 """
 
+import uuid
 import asyncio
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 from langgraph.graph import StateGraph, END
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
-from src.loaders.content_loader import load_content
-from src.utils.text_splitter import split_text
+from src.loaders.content_loader import load_content, should_stream
+from src.utils.text_splitter import DEFAULT_CHUNK_OVERLAP, split_text
+from src.nodes.planner_node import plan_summary, stuff_summary
+from src.nodes.dedup_node import dedup_chunks
+from src.nodes.extractive_node import get_summary_mode, select_salient_chunks, extract_summary
 from src.nodes.summarize_node import summarize_chunks
 from src.nodes.combine_node import combine_summaries
+from src.nodes.pipelined_node import load_split_summarize
+from src.utils.chunks import ChunkList
+from src.utils.checkpoint import get_run_store
+from src.utils.llm import aclose_llm_clients, reset_llm_clients
+from src.utils.instrumentation import (
+    configure_sinks_from_env, instrument_node, iter_with_run_id, set_run_id, reset_run_id
+)
 
 
 class State(BaseModel):
     """State model for the LangGraph pipeline"""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    
     input_type: str
     content: str
-    chunk_size: int
-    chunk_overlap: int
+    chunk_size: Optional[int] = None
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP
     max_summary_length: Optional[int] = None
+    max_concurrency: Optional[int] = None
+    combine_mode: Optional[str] = None
+    map_mode: Optional[str] = None
+    map_model: Optional[str] = None
+    reduce_model: Optional[str] = None
+    hedge: Optional[bool] = None
+    dedup: Optional[bool] = None
+    dedup_threshold: Optional[float] = None
+    summary_mode: Optional[str] = None
+    strategy: Optional[str] = None
+    salient_token_budget: Optional[int] = None
+    stream_events: bool = False
+    pipelined: bool = False
+    doc_id: Optional[str] = None
+    run_id: Optional[str] = None
     documents: List[Any] = Field(default_factory=list)
-    chunks: List[Any] = Field(default_factory=list)
+    plan: Dict[str, Any] = Field(default_factory=dict)
+    chunks: ChunkList = Field(default_factory=ChunkList)
+    chunk_weights: List[int] = Field(default_factory=list)
+    duplicate_chunks: int = 0
+    unselected_chunks: int = 0
     summaries: List[str] = Field(default_factory=list)
+    summary_weights: List[int] = Field(default_factory=list)
+    failed_chunks: List[Dict[str, Any]] = Field(default_factory=list)
+    hedge_stats: Dict[str, Any] = Field(default_factory=dict)
+    reduce_summaries: List[str] = Field(default_factory=list)
+    reduce_levels: int = 0
+    reduce_fan_in: List[List[int]] = Field(default_factory=list)
+    reused_chunks: int = 0
+    recomputed_chunks: int = 0
+    resumed_chunks: int = 0
+    summaries_fingerprint: Optional[str] = None
+    combine_skipped: bool = False
     final_summary: str = ""
 
 
+# Fields set by the caller rather than by the nodes; a resumed run takes them from its checkpoint
+INPUT_FIELDS = (
+    "input_type", "content", "chunk_size", "chunk_overlap", "max_summary_length", "max_concurrency",
+    "combine_mode", "map_mode", "map_model", "reduce_model", "hedge", "dedup", "dedup_threshold",
+    "summary_mode", "strategy", "salient_token_budget", "pipelined", "doc_id", "run_id"
+)
+
+# Input fields that set how an input is summarized rather than what is summarized
+OPTION_FIELDS = tuple(field for field in INPUT_FIELDS if field not in ("input_type", "content"))
+
+
 def create_workflow():
     """Create and configure the LangGraph workflow"""
     # Define a LangGraph state machine
     workflow = StateGraph(State)
     
-    # Add nodes
-    workflow.add_node("loader", load_content)
-    workflow.add_node("splitter", split_text)
-    workflow.add_node("summarizer", summarize_chunks)
-    workflow.add_node("combiner", combine_summaries)
-    workflow.add_node("output", lambda state: {"final_summary": getattr(state, "final_summary", "")})
+    # Add nodes, each timed by the instrumentation layer
+    workflow.add_node("loader", instrument_node("loader", load_content))
+    workflow.add_node("planner", instrument_node("planner", plan_summary))
+    workflow.add_node("stuff", instrument_node("stuff", stuff_summary))
+    workflow.add_node("splitter", instrument_node("splitter", split_text))
+    workflow.add_node("dedup", instrument_node("dedup", dedup_chunks))
+    workflow.add_node("selector", instrument_node("selector", select_salient_chunks))
+    workflow.add_node("extractor", instrument_node("extractor", extract_summary))
+    workflow.add_node("summarizer", instrument_node("summarizer", summarize_chunks))
+    workflow.add_node("combiner", instrument_node("combiner", combine_summaries))
+    workflow.add_node("pipelined", instrument_node("pipelined", load_split_summarize))
+    workflow.add_node("output", lambda state: {"final_summary": state.final_summary or (state.summaries[0] if state.summaries else "")})
     
     # Add edges - simplified using direct string values
-    workflow.add_edge("loader", "splitter")
-    workflow.add_edge("splitter", "summarizer")
+    workflow.add_conditional_edges(
+        "loader",
+        lambda state: "extractor" if get_summary_mode(state) == "extractive" else "planner",
+        {
+            "extractor": "extractor",
+            "planner": "planner"
+        }
+    )
+    
+    # Documents that fit in one prompt skip splitting and combining
+    workflow.add_conditional_edges(
+        "planner",
+        lambda state: "stuff" if state.plan.get("strategy") == "stuff" else "splitter",
+        {
+            "stuff": "stuff",
+            "splitter": "splitter"
+        }
+    )
+    workflow.add_edge("stuff", "output")
+    workflow.add_edge("splitter", "dedup")
+    workflow.add_edge("dedup", "selector")
+    workflow.add_edge("selector", "summarizer")
+    workflow.add_edge("extractor", "output")
     
     # Use lambda instead of dedicated function
+    for node in ("summarizer", "pipelined"):
+        workflow.add_conditional_edges(
+            node,
+            lambda state: "combiner" if len(getattr(state, "summaries", [])) > 1 and not state.final_summary else "output",
+            {
+                "combiner": "combiner",
+                "output": "output"
+            }
+        )
+    
+    # Keep reducing until the combiner produces the final summary
     workflow.add_conditional_edges(
-        "summarizer",
-        lambda state: "combiner" if len(getattr(state, "summaries", [])) > 1 else "output",
+        "combiner",
+        lambda state: "combiner" if len(getattr(state, "reduce_summaries", [])) > 1 else "output",
         {
             "combiner": "combiner",
             "output": "output"
         }
     )
-    
-    workflow.add_edge("combiner", "output")
     workflow.add_edge("output", END)
     
-    # Set entry point
-    workflow.set_entry_point("loader")
+    # Set entry point; pipelined runs load, split and summarize in one overlapping node,
+    # and text files too large to load whole are always streamed through it
+    workflow.set_conditional_entry_point(
+        lambda state: "pipelined" if (
+            getattr(state, "pipelined", False) or should_stream(state.input_type, state.content)
+        ) and get_summary_mode(state) == "full" else "loader",
+        {
+            "pipelined": "pipelined",
+            "loader": "loader"
+        }
+    )
     
     return workflow
 
 
-async def summarize_content(
+_app = None
+
+
+def get_app():
+    """
+    Get the compiled workflow, compiling it on first use.
+    
+    The compiled graph is stateless between runs, so one instance is shared by
+    every call in the process.
+    
+    Returns:
+        The compiled LangGraph application
+    """
+    global _app
+    if _app is None:
+        configure_sinks_from_env()
+        _app = create_workflow().compile()
+    return _app
+
+
+def run_inputs(state: State) -> Dict[str, Any]:
+    """The fields of a state a checkpointed run is recorded with and resumed from"""
+    return {field: getattr(state, field) for field in INPUT_FIELDS}
+
+
+def start_run(state: State) -> Tuple[State, bool]:
+    """
+    Record the start of a checkpointed run, or of another attempt at it.
+    
+    A run that was started before is run again from the inputs it was first
+    started with; the chunk summaries and combined summaries it completed are
+    reused rather than sent to the LLM again.
+    
+    Args:
+        state: Initial state of the run, with a run_id
+    
+    Returns:
+        Tuple of (initial state to run, whether the run is resumed)
+    """
+    inputs, resumed = get_run_store().start(state.run_id, run_inputs(state))
+    if resumed:
+        state = State(**inputs, stream_events=state.stream_events)
+    return state, resumed
+
+
+def discard_run(run_id: str):
+    """Delete the checkpoint of a finished run"""
+    get_run_store().delete(run_id)
+
+
+def changed_options(options: Dict[str, Any], saved: Dict[str, Any]) -> Dict[str, Tuple[Any, Any]]:
+    """
+    Compare the options of a run with the options its checkpoint was started with.
+    
+    Args:
+        options: Keyword arguments for ``run_pipeline``
+        saved: Options returned by ``load_run_options``
+    
+    Returns:
+        Dictionary mapping each option that differs to (saved value, new value)
+    """
+    defaults = State(input_type="text", content="")
+    changed = {}
+    for field, value in options.items():
+        if field not in OPTION_FIELDS or field == "run_id":
+            continue
+        old = saved.get(field, getattr(defaults, field))
+        if old != value:
+            changed[field] = (old, value)
+    return changed
+
+
+def load_run_options(run_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Read the options a checkpointed run was started with.
+    
+    Args:
+        run_id: Run id
+    
+    Returns:
+        Keyword arguments for ``run_pipeline`` that resume the run, or None if
+        the run has no checkpoint
+    """
+    return get_run_store().get_inputs(run_id)
+
+
+def reload_pipeline():
+    """Rebuild the compiled graph and LLM clients, e.g. after the environment configuration changed"""
+    global _app
+    _app = None
+    reset_llm_clients()
+
+
+async def shutdown_pipeline():
+    """Release the shared LLM clients and HTTP connection pools held by this process"""
+    global _app
+    _app = None
+    await aclose_llm_clients()
+
+
+def build_initial_state(
     input_type: str,
     content: str,
-    chunk_size: int = 150,
-    chunk_overlap: int = 15,
-    max_summary_length: Optional[int] = None
-) -> str:
+    chunk_size: Optional[int] = None,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+    max_summary_length: Optional[int] = None,
+    **options: Any
+) -> State:
     """
-    Summarize content using the LangGraph pipeline.
+    Build the initial pipeline state.
     
     Args:
         input_type: Type of input ('url', 'pdf', 'textfile', 'text')
         content: The actual content (URL, file path, or text)
-        chunk_size: Size of text chunks
+        chunk_size: Size of text chunks, derived by the planner if None
         chunk_overlap: Overlap between chunks
         max_summary_length: Maximum number of sentences in final summary
+        **options: Optional State fields such as max_concurrency or combine_mode
         
     Returns:
-        The final summary as a string
+        The initial State
     """
-    # Create the workflow
-    workflow = create_workflow()
-    app = workflow.compile()
-    
-    # Initialize state
-    initial_state = State(
+    return State(
         input_type=input_type,
         content=content,
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
-        max_summary_length=max_summary_length
+        max_summary_length=max_summary_length,
+        **options
+    )
+
+
+async def run_pipeline(
+    input_type: str,
+    content: str,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+    max_summary_length: Optional[int] = None,
+    **options: Any
+) -> Dict[str, Any]:
+    """
+    Run the LangGraph pipeline and return the final state.
+    
+    Args:
+        input_type: Type of input ('url', 'pdf', 'textfile', 'text')
+        content: The actual content (URL, file path, or text)
+        chunk_size: Size of text chunks, derived by the planner if None
+        chunk_overlap: Overlap between chunks
+        max_summary_length: Maximum number of sentences in final summary
+        **options: Optional State fields: max_concurrency (concurrent LLM calls when
+            summarizing chunks), combine_mode ('tree' or 'single'), map_mode
+            ('chunk', or 'packed' to send several chunks per request), dedup and
+            dedup_threshold (summarize one chunk per near-duplicate cluster),
+            summary_mode ('full', 'salient' chunks up to salient_token_budget, or
+            'extractive' without LLM calls), strategy ('auto' to summarize
+            documents that fit in one call directly, or 'map_reduce'), map_model
+            and reduce_model (override MAP_MODEL and REDUCE_MODEL), hedge
+            (duplicate slow map calls, overrides HEDGE_ENABLED), pipelined
+            (overlap page extraction, splitting and summarization), doc_id
+            (reuse stored summaries of unchanged chunks of this document),
+            run_id (checkpoint the run under this id; if the run was started
+            before, it is resumed with the input and options it was first
+            started with, the other arguments are ignored, and only its
+            missing or failed chunks are sent to the LLM; the checkpoint is
+            deleted once the run finishes without failed chunks)
+        
+    Returns:
+        The final pipeline state as a dictionary
+    """
+    # Initialize state
+    initial_state = build_initial_state(
+        input_type, content, chunk_size, chunk_overlap, max_summary_length, **options
+    )
+    run_id = initial_state.run_id
+    if run_id:
+        initial_state, _ = await asyncio.to_thread(start_run, initial_state)
+    
+    # Run the workflow, tagging instrumentation records with the run id
+    token = set_run_id(run_id or uuid.uuid4().hex)
+    try:
+        final_state = await get_app().ainvoke(initial_state.model_dump())
+    finally:
+        reset_run_id(token)
+    
+    # A run with failed chunks keeps its checkpoint so resuming it retries them
+    if run_id and not final_state.get("failed_chunks"):
+        await asyncio.to_thread(discard_run, run_id)
+    return final_state
+
+
+async def astream_summary(
+    input_type: str,
+    content: str,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+    max_summary_length: Optional[int] = None,
+    **options: Any
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run the LangGraph pipeline and yield progress events as they happen.
+    
+    Events are dictionaries with an ``event`` key:
+    
+    * ``resumed``: run ``run_id`` was started before and reuses what it completed
+    * ``loaded``: ``documents`` were loaded
+    * ``planned``: the ``plan`` (strategy, chunk size and estimated LLM calls) was chosen
+    * ``split``: the documents were split into ``chunks`` chunks
+    * ``deduplicated``: ``skipped`` near-duplicate chunks were dropped, leaving ``chunks``
+    * ``selected``: the ``chunks`` most salient chunks were kept, ``skipped`` were left out
+    * ``chunk_summary``: chunk ``index`` was summarized as ``summary``
+    * ``chunk_failed``: chunk ``index`` failed with ``error``
+    * ``reduce_level``: combine level ``level`` produced ``summaries`` summaries
+    * ``token``: a ``token`` of the final summary as it is generated
+    * ``final``: the final ``summary`` and the final ``state``
+    
+    Args:
+        input_type: Type of input ('url', 'pdf', 'textfile', 'text')
+        content: The actual content (URL, file path, or text)
+        chunk_size: Size of text chunks, derived by the planner if None
+        chunk_overlap: Overlap between chunks
+        max_summary_length: Maximum number of sentences in final summary
+        **options: Optional State fields, see ``run_pipeline``
+        
+    Yields:
+        Progress event dictionaries
+    """
+    initial_state = build_initial_state(
+        input_type, content, chunk_size, chunk_overlap, max_summary_length,
+        stream_events=True, **options
     )
+    run_id = initial_state.run_id
+    
+    if run_id:
+        initial_state, resumed = await asyncio.to_thread(start_run, initial_state)
+        if resumed:
+            yield {"event": "resumed", "run_id": run_id}
     
-    # Run the workflow
-    final_state = await app.ainvoke(initial_state.model_dump())
+    inputs = initial_state.model_dump()
+    final_state = dict(inputs)
+        
+    # Instrumentation records are tagged with the run id; the caller's context is left untouched
+    stream = get_app().astream(inputs, stream_mode=["updates", "custom"])
+    async for mode, payload in iter_with_run_id(stream, run_id or uuid.uuid4().hex):
+        # Events emitted from inside nodes (chunk summaries, final summary tokens)
+        if mode == "custom":
+            yield payload
+            continue
+        
+        for node, update in payload.items():
+            if not update:
+                continue
+            final_state.update(update)
+            
+            if node == "loader":
+                yield {"event": "loaded", "documents": len(update.get("documents", []))}
+            elif node == "planner":
+                yield {"event": "planned", "plan": update["plan"]}
+            elif node == "splitter":
+                yield {"event": "split", "chunks": len(update.get("chunks", []))}
+            elif node == "dedup":
+                yield {
+                    "event": "deduplicated",
+                    "chunks": len(update["chunks"]),
+                    "skipped": update["duplicate_chunks"]
+                }
+            elif node == "selector":
+                yield {
+                    "event": "selected",
+                    "chunks": len(update["chunks"]),
+                    "skipped": update["unselected_chunks"]
+                }
+            elif node == "combiner" and "reduce_levels" in update:
+                yield {
+                    "event": "reduce_level",
+                    "level": update["reduce_levels"],
+                    "summaries": len(update["reduce_summaries"])
+                }
+    
+    if run_id and not final_state.get("failed_chunks"):
+        await asyncio.to_thread(discard_run, run_id)
+    
+    yield {"event": "final", "summary": final_state["final_summary"], "state": final_state}
+
+
+async def summarize_content(
+    input_type: str,
+    content: str,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+    max_summary_length: Optional[int] = None,
+    **options: Any
+) -> str:
+    """
+    Summarize content using the LangGraph pipeline.
+    
+    Args:
+        input_type: Type of input ('url', 'pdf', 'textfile', 'text')
+        content: The actual content (URL, file path, or text)
+        chunk_size: Size of text chunks, derived by the planner if None
+        chunk_overlap: Overlap between chunks
+        max_summary_length: Maximum number of sentences in final summary
+        **options: Optional State fields, see ``run_pipeline``
+        
+    Returns:
+        The final summary as a string
+    """
+    final_state = await run_pipeline(
+        input_type, content, chunk_size, chunk_overlap, max_summary_length, **options
+    )
     
     return final_state["final_summary"]
\ No newline at end of file
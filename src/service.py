@@ -0,0 +1,541 @@
+#!/usr/bin/env python3
+"""
+Async HTTP service for the LangGraph Content Summarizer.
+This script serves the summarization pipeline as JSON endpoints on a single
+event loop, with a fixed pool of workers and a bounded job queue.
+
+Endpoints:
+    POST /summaries                 Submit {"input_type", "content", ...options}; returns the job
+    GET  /summaries/{job_id}        Job status
+    GET  /summaries/{job_id}/result Final summary (add ?wait=true to block until done)
+    GET  /summaries/{job_id}/events Progress events as newline-delimited JSON
+    POST /summaries/{job_id}/resume Queue a failed job again, resuming from its checkpoints
+    GET  /health                    Queue depth and worker counts
+
+Identical submissions (same input and options) made while a job for them is
+queued or running are attached to that job instead of running the pipeline again.
+When the queue is full, submissions are rejected with 429 and a Retry-After header.
+With checkpointing, each job runs under a run id derived from its job id; a
+submission may pass the ``run_id`` reported for a job of an earlier service
+process to resume it. Run ids of other clients (the CLI, batch runs) are
+rejected, and job ids are random, so only a client that was given a job's run
+id can resume it. Once a job finishes, its streamed token events are dropped;
+the final event holds the whole summary, and the other events are kept.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+from dotenv import load_dotenv
+
+# Add the project root to the path so we can import our modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Input types accepted from clients; file inputs read paths on the server
+INPUT_TYPES = ("url", "pdf", "textfile", "text")
+FILE_INPUT_TYPES = ("pdf", "textfile")
+
+# Run ids of checkpointed jobs; only these may be passed back by clients
+RUN_ID_PREFIX = "service-"
+RUN_ID_PATTERN = re.compile(r"service-[0-9a-f]{32}")
+
+# Events dropped once a job has finished; the final event repeats their content
+TRANSIENT_EVENTS = ("token",)
+
+
+def job_run_id(job_id: str) -> str:
+    """Run id under which a job is checkpointed"""
+    return RUN_ID_PREFIX + job_id
+
+
+def validate_options(input_type: str, content: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Check the types of a submission's options against the pipeline state.
+    
+    Args:
+        input_type: Type of input
+        content: URL, file path or text
+        options: Pipeline options
+    
+    Returns:
+        The options converted to their field types, e.g. "512" to 512
+    
+    Raises:
+        ValueError: If an option has the wrong type
+    """
+    from pydantic import ValidationError
+    from src.pipeline import build_initial_state
+    
+    try:
+        state = build_initial_state(input_type, content, **options)
+    except ValidationError as e:
+        error = e.errors()[0]
+        field = ".".join(str(part) for part in error["loc"])
+        raise ValueError(f"Invalid option '{field}': {error['msg']}") from None
+    return {field: getattr(state, field) for field in options}
+
+
+def request_key(input_type: str, content: str, options: Dict[str, Any]) -> str:
+    """
+    Key identifying submissions that produce the same summary.
+    
+    Args:
+        input_type: Type of input
+        content: URL, file path or text
+        options: Pipeline options of the submission
+    
+    Returns:
+        Hex digest of the content hash and parameters
+    """
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    payload = json.dumps([input_type, content_hash, options], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Job:
+    """A submitted summarization and the progress events it produced so far"""
+    
+    def __init__(self, key: str, input_type: str, content: str, options: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.input_type = input_type
+        self.content = content
+        self.options = options
+        self.status = "queued"
+        self.submissions = 1
+        self.attempts = 1
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.summary: Optional[str] = None
+        self.stats: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.events: List[Dict[str, Any]] = []
+        self.done = asyncio.Event()
+        self._subscribers: List[asyncio.Queue] = []
+    
+    def restart(self):
+        """Reset a finished job so it can be queued again"""
+        self.status = "queued"
+        self.attempts += 1
+        self.started = self.finished = None
+        self.summary = self.error = None
+        self.stats = {}
+        self.events = []
+        self.done = asyncio.Event()
+    
+    def publish(self, event: Optional[Dict[str, Any]]):
+        """
+        Record an event and pass it to every subscriber.
+        
+        None marks the end; token events are then dropped, as the final event
+        holds the whole summary. Progress, chunk summary and chunk failure events
+        are kept for clients that replay a finished job.
+        """
+        if event is not None:
+            self.events.append(event)
+        else:
+            self.events = [event for event in self.events if event["event"] not in TRANSIENT_EVENTS]
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+    
+    def subscribe(self) -> asyncio.Queue:
+        """Get a queue replaying the events so far, then following new ones"""
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in self.events:
+            queue.put_nowait(event)
+        if self.done.is_set():
+            queue.put_nowait(None)
+        else:
+            self._subscribers.append(queue)
+        return queue
+    
+    def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable job status"""
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "input_type": self.input_type,
+            "submissions": self.submissions,
+            "attempts": self.attempts,
+            "run_id": self.options.get("run_id"),
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "error": self.error,
+        }
+
+
+class SummaryService:
+    """
+    Runs submitted jobs on a fixed number of worker tasks.
+    
+    Args:
+        workers: Number of pipelines run at once
+        queue_size: Maximum number of jobs waiting for a worker
+        max_jobs: Number of finished jobs kept for status and result lookups
+        allow_files: Accept 'pdf' and 'textfile' inputs, which read server paths
+        checkpoint: Checkpoint each job under its id so failed jobs can be resumed
+    """
+    
+    def __init__(
+        self,
+        workers: int = 4,
+        queue_size: int = 64,
+        max_jobs: int = 1000,
+        allow_files: bool = False,
+        checkpoint: bool = False
+    ):
+        self.workers = max(1, workers)
+        self.max_jobs = max_jobs
+        self.allow_files = allow_files
+        self.checkpoint = checkpoint
+        self.queue: asyncio.Queue = asyncio.Queue(max(1, queue_size))
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.inflight: Dict[str, Job] = {}
+        self.running = 0
+        self._tasks: List[asyncio.Task] = []
+    
+    async def start(self):
+        """Start the worker tasks"""
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+    
+    async def stop(self):
+        """Cancel the workers and close the shared pipeline resources"""
+        from src.pipeline import shutdown_pipeline
+        
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await shutdown_pipeline()
+    
+    def submit(self, input_type: str, content: str, options: Dict[str, Any]) -> Tuple[Job, bool]:
+        """
+        Queue a job, or attach to an identical job that is queued or running.
+        
+        Args:
+            input_type: Type of input
+            content: URL, file path or text
+            options: Pipeline options
+        
+        Returns:
+            Tuple of (job, whether it was coalesced with an existing job)
+        
+        Raises:
+            ValueError: If the input type is not accepted, an option has the wrong type
+                or the run id is not one of this service's
+            asyncio.QueueFull: If no more jobs can be queued
+        """
+        if input_type not in INPUT_TYPES:
+            raise ValueError(f"input_type must be one of {', '.join(INPUT_TYPES)}")
+        if input_type in FILE_INPUT_TYPES and not self.allow_files:
+            raise ValueError(f"input_type '{input_type}' is disabled (set SERVICE_ALLOW_FILES=true)")
+        run_id = options.get("run_id")
+        if run_id is not None:
+            if not self.checkpoint:
+                raise ValueError("run_id needs checkpointing (set CHECKPOINT_ENABLED=true)")
+            if not isinstance(run_id, str) or not RUN_ID_PATTERN.fullmatch(run_id):
+                raise ValueError("run_id must be the run id of a job of this service")
+            if any(job.options.get("run_id") == run_id for job in self.jobs.values()):
+                raise ValueError("run_id belongs to a known job; resume it with POST /summaries/{job_id}/resume")
+        options = validate_options(input_type, content, options)
+        
+        key = request_key(input_type, content, options)
+        job = self.inflight.get(key)
+        if job is not None:
+            job.submissions += 1
+            return job, True
+        
+        job = Job(key, input_type, content, options)
+        if self.checkpoint:
+            job.options.setdefault("run_id", job_run_id(job.id))
+        self.queue.put_nowait(job)
+        self.inflight[key] = job
+        self.jobs[job.id] = job
+        self._evict()
+        return job, False
+    
+    def resume(self, job: Job):
+        """
+        Queue a failed job, or one that finished with failed chunks, again under
+        the same run id, so it continues from its checkpoints.
+        
+        Args:
+            job: The failed job
+        
+        Raises:
+            ValueError: If the job has not failed or an identical job is queued or running
+            asyncio.QueueFull: If no more jobs can be queued
+        """
+        if job.status != "error" and not (self.checkpoint and job.stats.get("failed_chunks")):
+            raise ValueError(f"Only failed jobs and jobs with failed chunks can be resumed, this job is {job.status}")
+        if job.key in self.inflight:
+            raise ValueError("An identical job is already queued or running")
+        
+        self.queue.put_nowait(job)
+        job.restart()
+        self.inflight[job.key] = job
+    
+    def _evict(self):
+        """Forget the oldest finished jobs beyond max_jobs"""
+        excess = len(self.jobs) - self.max_jobs
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.done.is_set()][:max(0, excess)]:
+            del self.jobs[job_id]
+    
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            self.running += 1
+            try:
+                await self._run(job)
+            finally:
+                self.running -= 1
+                self.queue.task_done()
+    
+    async def _run(self, job: Job):
+        from src.pipeline import astream_summary
+        
+        job.status = "running"
+        job.started = time.time()
+        try:
+            async for event in astream_summary(job.input_type, job.content, **job.options):
+                if event["event"] == "final":
+                    state = event.pop("state")
+                    job.summary = event["summary"]
+                    job.stats = {
+                        "chunks": len(state.get("summaries", [])),
+                        "failed_chunks": state.get("failed_chunks", []),
+                        "reduce_levels": state.get("reduce_levels", 0),
+                        "reused_chunks": state.get("reused_chunks", 0),
+                        "resumed_chunks": state.get("resumed_chunks", 0),
+                        "plan": state.get("plan", {}),
+                        "hedge_stats": state.get("hedge_stats", {}),
+                    }
+                job.publish(event)
+            job.status = "done"
+        except Exception as e:
+            job.status = "error"
+            job.error = str(e)
+            job.publish({"event": "error", "error": job.error})
+        finally:
+            job.finished = time.time()
+            self.inflight.pop(job.key, None)
+            job.done.set()
+            job.publish(None)
+    
+    def health(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "queued": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "inflight": len(self.inflight),
+        }
+
+
+def json_error(status: int, message: str, headers: Optional[Dict[str, str]] = None) -> web.Response:
+    return web.json_response({"error": message}, status=status, headers=headers)
+
+
+def get_job(request: web.Request) -> Job:
+    job = request.app["service"].jobs.get(request.match_info["job_id"])
+    if job is None:
+        raise web.HTTPNotFound(
+            text=json.dumps({"error": "Unknown job id"}), content_type="application/json"
+        )
+    return job
+
+
+async def submit_summary(request: web.Request) -> web.Response:
+    service: SummaryService = request.app["service"]
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        return json_error(400, "Request body must be JSON")
+    if not isinstance(body, dict) or not isinstance(body.get("content"), str) or not body.get("input_type"):
+        return json_error(400, "Request needs 'input_type' and 'content'")
+    
+    from src.pipeline import OPTION_FIELDS
+    
+    options = dict(request.app["defaults"])
+    options.update({field: body[field] for field in OPTION_FIELDS if body.get(field) is not None})
+    
+    try:
+        job, coalesced = service.submit(body["input_type"], body["content"], options)
+    except ValueError as e:
+        return json_error(400, str(e))
+    except asyncio.QueueFull:
+        return json_error(429, "Too many queued jobs, retry later", {"Retry-After": request.app["retry_after"]})
+    
+    payload = job.to_dict()
+    payload["coalesced"] = coalesced
+    return web.json_response(payload, status=202)
+
+
+async def resume_job(request: web.Request) -> web.Response:
+    job = get_job(request)
+    try:
+        request.app["service"].resume(job)
+    except ValueError as e:
+        return json_error(409, str(e))
+    except asyncio.QueueFull:
+        return json_error(429, "Too many queued jobs, retry later", {"Retry-After": request.app["retry_after"]})
+    return web.json_response(job.to_dict(), status=202)
+
+
+async def job_status(request: web.Request) -> web.Response:
+    return web.json_response(get_job(request).to_dict())
+
+
+async def job_result(request: web.Request) -> web.Response:
+    job = get_job(request)
+    if request.query.get("wait", "false").lower() in ("1", "true", "yes"):
+        await job.done.wait()
+    
+    if job.status == "error":
+        return json_error(500, job.error or "Summarization failed")
+    if job.status != "done":
+        return web.json_response(job.to_dict(), status=202)
+    
+    payload = job.to_dict()
+    payload.update({"summary": job.summary, "seconds": round(job.finished - job.started, 3)})
+    payload.update(job.stats)
+    return web.json_response(payload)
+
+
+async def job_events(request: web.Request) -> web.StreamResponse:
+    job = get_job(request)
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson", "Cache-Control": "no-cache"})
+    await response.prepare(request)
+    
+    queue = job.subscribe()
+    try:
+        while True:
+            event = await queue.get()
+            if event is None:
+                break
+            await response.write((json.dumps(event, default=str) + "\n").encode("utf-8"))
+    except ConnectionResetError:
+        # The client went away; the job keeps running for other clients
+        pass
+    finally:
+        job.unsubscribe(queue)
+    
+    await response.write_eof()
+    return response
+
+
+async def health(request: web.Request) -> web.Response:
+    return web.json_response(request.app["service"].health())
+
+
+def create_app(
+    workers: int = 4,
+    queue_size: int = 64,
+    defaults: Optional[Dict[str, Any]] = None,
+    allow_files: bool = False
+) -> web.Application:
+    """
+    Create the aiohttp application.
+    
+    Args:
+        workers: Number of pipelines run at once
+        queue_size: Maximum number of jobs waiting for a worker
+        defaults: Default pipeline options (chunk_size, chunk_overlap, ...)
+        allow_files: Accept 'pdf' and 'textfile' inputs
+    
+    Returns:
+        The application; its workers start and stop with it
+    """
+    from src.utils.checkpoint import checkpointing_enabled
+    
+    app = web.Application()
+    app["service"] = SummaryService(
+        workers, queue_size, int(os.getenv("SERVICE_MAX_JOBS", "1000")), allow_files,
+        checkpoint=checkpointing_enabled()
+    )
+    app["defaults"] = defaults or {}
+    app["retry_after"] = os.getenv("SERVICE_RETRY_AFTER", "1")
+    
+    async def start_service(app: web.Application):
+        await app["service"].start()
+    
+    async def stop_service(app: web.Application):
+        await app["service"].stop()
+    
+    app.on_startup.append(start_service)
+    app.on_cleanup.append(stop_service)
+    
+    app.router.add_post("/summaries", submit_summary)
+    app.router.add_get("/summaries/{job_id}", job_status)
+    app.router.add_get("/summaries/{job_id}/result", job_result)
+    app.router.add_get("/summaries/{job_id}/events", job_events)
+    app.router.add_post("/summaries/{job_id}/resume", resume_job)
+    app.router.add_get("/health", health)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the summarizer as an async HTTP API")
+    
+    parser.add_argument("--host", default=os.getenv("SERVICE_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVICE_PORT", "8080")))
+    
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("SERVICE_WORKERS", "4")),
+        help="Number of documents summarized at once (default: SERVICE_WORKERS env var or 4)"
+    )
+    
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=int(os.getenv("SERVICE_QUEUE_SIZE", "64")),
+        help="Jobs waiting for a worker before submissions get 429 (default: SERVICE_QUEUE_SIZE env var or 64)"
+    )
+    
+    parser.add_argument(
+        "--allow-files",
+        action="store_true",
+        default=os.getenv("SERVICE_ALLOW_FILES", "false").lower() in ("1", "true", "yes"),
+        help="Accept 'pdf' and 'textfile' inputs, which read paths on the server"
+    )
+    
+    args = parser.parse_args()
+    
+    if not os.getenv("OPENROUTER_API_KEY"):
+        print("Error: OPENROUTER_API_KEY environment variable is required", file=sys.stderr)
+        print("Please set it in your .env file or environment", file=sys.stderr)
+        sys.exit(1)
+    
+    defaults = {
+        "chunk_size": int(os.getenv("CHUNK_SIZE")) if os.getenv("CHUNK_SIZE") else None,
+        "chunk_overlap": int(os.getenv("CHUNK_OVERLAP", "15")),
+        "max_summary_length": 5,
+    }
+    
+    app = create_app(args.workers, args.queue_size, defaults, args.allow_files)
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
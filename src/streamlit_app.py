@@ -2,13 +2,20 @@
 """
 Streamlit UI for the LangGraph Content Summarizer.
 This script provides a web interface for summarizing content from various sources.
+
+Summaries run on one background event loop shared by all sessions, which keeps
+the compiled graph, LLM clients and tokenizer warm. Jobs survive reruns, and
+finished results are reused for identical requests until they expire.
 """
 
 import streamlit as st
 import os
 import sys
+import time
 import asyncio
-import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict
 from dotenv import load_dotenv
 
 # Add the src directory to the path so we can import our modules
@@ -22,6 +29,161 @@ api_key = os.getenv("OPENROUTER_API_KEY")
 base_url = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
 model = os.getenv("LLM_MODEL", "meta-llama/llama-3.1-8b-instruct:free")
 
+class BackgroundSummarizer:
+    """
+    Runs a SummaryService on an event loop in a background thread.
+    
+    Jobs are kept by request key (content hash, options and model): a request
+    that matches a queued, running or recently finished job attaches to it
+    instead of summarizing again.
+    
+    Args:
+        workers: Number of pipelines run at once
+        max_results: Number of finished jobs kept for reuse
+        ttl: Seconds a finished job is reused for
+    """
+    
+    def __init__(self, workers: int, max_results: int, ttl: float):
+        from src.service import SummaryService
+        
+        self.max_results = max_results
+        self.ttl = ttl
+        self.jobs: "OrderedDict[str, Any]" = OrderedDict()
+        self.service = SummaryService(workers=workers, queue_size=64, max_jobs=max_results)
+        self.loop = asyncio.new_event_loop()
+        self._lock = threading.Lock()
+        threading.Thread(target=self.loop.run_forever, name="summarizer-loop", daemon=True).start()
+        self._call(self.service.start())
+        self._call(self._warm_up())
+    
+    def _call(self, coroutine) -> Any:
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+    
+    async def _warm_up(self):
+        # Build the graph and this loop's LLM client before the first request
+        from src.pipeline import get_app
+        from src.utils.llm import get_llm
+        from src.utils.text_splitter import get_splitter_config, get_tokenizer
+        
+        get_app()
+        get_llm(temperature=0.0)
+        backend, name = get_splitter_config()
+        if backend != "sentence-transformers":
+            try:
+                get_tokenizer(backend, name)
+            except Exception:
+                # Reported by the first request that needs the tokenizer
+                pass
+    
+    def submit(self, input_type: str, content: str, options: Dict[str, Any]) -> Any:
+        """
+        Start a job, or return the live or cached job for the same request.
+        
+        Raises:
+            asyncio.QueueFull: If too many jobs are waiting
+        """
+        from src.service import request_key
+        from src.utils.llm import get_role_model
+        
+        key = request_key(
+            input_type, content, dict(options, map_model=get_role_model("map"), reduce_model=get_role_model("reduce"))
+        )
+        with self._lock:
+            job = self.jobs.get(key)
+            if job is not None and (
+                not job.done.is_set() or (job.status == "done" and time.time() - job.finished < self.ttl)
+            ):
+                self.jobs.move_to_end(key)
+                return job
+            
+            async def submit():
+                return self.service.submit(input_type, content, options)[0]
+            
+            job = self._call(submit())
+            self.jobs[key] = job
+            self.jobs.move_to_end(key)
+            
+            # Forget the oldest finished jobs beyond the cache size
+            finished = [old_key for old_key, old_job in self.jobs.items() if old_job.done.is_set()]
+            for old_key in finished[:max(0, len(self.jobs) - self.max_results)]:
+                del self.jobs[old_key]
+            return job
+
+
+@st.cache_resource(show_spinner="Loading the summarizer...")
+def get_summarizer() -> BackgroundSummarizer:
+    """The process-wide background summarizer"""
+    return BackgroundSummarizer(
+        workers=int(os.getenv("STREAMLIT_WORKERS", "2")),
+        max_results=int(os.getenv("STREAMLIT_RESULT_CACHE_SIZE", "32")),
+        ttl=float(os.getenv("STREAMLIT_RESULT_CACHE_TTL", "3600"))
+    )
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def read_uploaded_file(input_type: str, data: bytes) -> str:
+    """Extract an uploaded file's text in memory, once per distinct upload"""
+    from src.loaders.content_loader import read_upload
+    return read_upload(input_type, data)
+
+
+def render_job(job: Any):
+    """Show a job's progress and summary from the events it produced so far"""
+    status = st.empty()
+    st.subheader("Summary")
+    summary_placeholder = st.empty()
+    chunk_expander = st.expander("Chunk summaries", expanded=False)
+    
+    chunk_count = 0
+    completed = 0
+    summary_text = ""
+    
+    for event in list(job.events):
+        kind = event["event"]
+        if kind == "loaded":
+            status.info(f"📥 Loaded {event['documents']} document(s)")
+        elif kind == "planned":
+            plan = event["plan"]
+            if plan["strategy"] == "stuff":
+                status.info(f"🧭 Summarizing {plan['document_tokens']} tokens in one call")
+            else:
+                status.info(f"🧭 Planned {plan['strategy']}: ~{plan['estimated_calls']} LLM calls, chunks of {plan['chunk_size']} tokens")
+        elif kind == "split":
+            chunk_count = event["chunks"]
+            status.info(f"✂️ Split into {chunk_count} chunks")
+        elif kind in ("deduplicated", "selected"):
+            chunk_count = event["chunks"]
+            status.info(f"🎯 Summarizing {chunk_count} chunks ({event['skipped']} skipped)")
+        elif kind in ("chunk_summary", "chunk_failed"):
+            completed += 1
+            status.info(f"📝 Summarized {completed}/{chunk_count} chunks")
+            if kind == "chunk_summary":
+                chunk_expander.markdown(f"**Chunk {event['index'] + 1}:** {event['summary']}")
+            else:
+                chunk_expander.warning(f"Chunk {event['index'] + 1} failed: {event['error']}")
+        elif kind == "reduce_level":
+            status.info(f"🔗 Combining summaries (level {event['level']})")
+        elif kind == "token":
+            summary_text += event["token"]
+            summary_placeholder.markdown(summary_text)
+        elif kind == "final":
+            summary_placeholder.markdown(event["summary"])
+    
+    if job.status == "done":
+        status.success("✅ Summary generated successfully!")
+    elif job.status == "error":
+        status.empty()
+        st.error(f"❌ Error during summarization: {job.error}")
+        
+        # Show additional debugging info for common issues
+        if "401" in job.error:
+            st.info("💡 This error might be due to an invalid API key. Please check your OPENROUTER_API_KEY.")
+        elif "404" in job.error:
+            st.info("💡 This error might be due to an invalid model. Please check your LLM_MODEL setting.")
+    elif not job.events:
+        status.info("⏳ Waiting for a worker...")
+
+
 # Configure Streamlit page
 st.set_page_config(
     page_title="LangGraph Content Summarizer",
@@ -47,18 +209,29 @@ if not api_key:
     st.error("❌ OPENROUTER_API_KEY environment variable is required. Please set it in your .env file or environment.")
     st.stop()
 
+# Start the background summarizer once per process, on the first page load
+summarizer = get_summarizer()
+
 # Create sidebar for configuration
 with st.sidebar:
     st.header("Configuration")
     
-    # Chunk size configuration
+    # Chunk size configuration; by default the planner derives it from the document size
+    auto_chunk_size = st.checkbox(
+        "Choose chunk size automatically",
+        value=not os.getenv("CHUNK_SIZE"),
+        help="Short documents are summarized in one call; longer ones are split into chunks sized so their summaries fit few combine calls"
+    )
     chunk_size = st.number_input(
         "Chunk Size",
         min_value=50,
-        max_value=1000,
-        value=int(os.getenv("CHUNK_SIZE", "150")),
-        help="Size of text chunks for processing"
+        max_value=8192,
+        value=int(os.getenv("CHUNK_SIZE") or "150"),
+        help="Size of text chunks for processing",
+        disabled=auto_chunk_size
     )
+    if auto_chunk_size:
+        chunk_size = None
     
     # Chunk overlap configuration
     chunk_overlap = st.number_input(
@@ -78,6 +251,30 @@ with st.sidebar:
         help="Maximum number of sentences in the final summary"
     )
     
+    # Summary mode: how much of the content reaches the LLM; an unknown SUMMARY_MODE falls back to full
+    summary_modes = ["full", "salient", "extractive"]
+    default_mode = os.getenv("SUMMARY_MODE", "full").strip().lower()
+    summary_mode = st.selectbox(
+        "Summary Mode",
+        options=summary_modes,
+        index=summary_modes.index(default_mode) if default_mode in summary_modes else 0,
+        format_func=lambda x: {
+            "full": "Full (summarize every chunk)",
+            "salient": "Salient (most important chunks only)",
+            "extractive": "Extractive (top sentences, no LLM)"
+        }[x],
+        help="Salient mode caps LLM cost per document; extractive mode makes no LLM calls"
+    )
+    
+    salient_token_budget = st.number_input(
+        "Salient Token Budget",
+        min_value=256,
+        max_value=65536,
+        value=int(os.getenv("SALIENT_TOKEN_BUDGET", "4096")),
+        help="Chunk tokens sent to the LLM in salient mode",
+        disabled=summary_mode != "salient"
+    )
+    
     # Display current model info
     st.subheader("Model Info")
     st.info(f"Model: {model}")
@@ -96,37 +293,29 @@ content_type = st.selectbox(
 )
 
 content = None
-temp_file_path = None
+input_type = content_type
 
 # Display appropriate input field based on content type
 if content_type == "url":
     content = st.text_input("Enter URL to summarize", placeholder="https://example.com/article")
-elif content_type == "pdf":
-    uploaded_file = st.file_uploader("Upload PDF file (Max 1MB)", type="pdf")
+elif content_type in ("pdf", "textfile"):
+    if content_type == "pdf":
+        uploaded_file = st.file_uploader("Upload PDF file (Max 1MB)", type="pdf")
+    else:
+        uploaded_file = st.file_uploader("Upload Text file (Max 1MB)", type=["txt", "md"])
     if uploaded_file:
         # Check file size
         if uploaded_file.size > 1024 * 1024:  # 1MB in bytes
             st.error("❌ File size exceeds 1MB limit. Please upload a smaller file.")
             st.stop()
         
-        # Save uploaded file to a temporary location
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-            temp_file.write(uploaded_file.getvalue())
-            temp_file_path = temp_file.name
-        content = temp_file_path
-elif content_type == "textfile":
-    uploaded_file = st.file_uploader("Upload Text file (Max 1MB)", type=["txt", "md"])
-    if uploaded_file:
-        # Check file size
-        if uploaded_file.size > 1024 * 1024:  # 1MB in bytes
-            st.error("❌ File size exceeds 1MB limit. Please upload a smaller file.")
+        # Read the upload in memory and summarize its text
+        try:
+            content = read_uploaded_file(content_type, uploaded_file.getvalue())
+            input_type = "text"
+        except Exception as e:
+            st.error(f"❌ Could not read the uploaded file: {str(e)}")
             st.stop()
-        
-        # Save uploaded file to a temporary location
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".txt") as temp_file:
-            temp_file.write(uploaded_file.getvalue())
-            temp_file_path = temp_file.name
-        content = temp_file_path
 elif content_type == "text":
     content = st.text_area("Enter text to summarize", height=200, placeholder="Paste your text here...")
 
@@ -136,42 +325,22 @@ if st.button("🚀 Summarize", type="primary", use_container_width=True):
     if not content:
         st.warning("Please provide content to summarize")
     else:
-        # Show processing status
-        with st.spinner("Processing your content..."):
-            try:
-                # Import the summarization function
-                from src.pipeline import summarize_content
-                
-                # Run the async function
-                summary = asyncio.run(summarize_content(
-                    input_type=content_type,
-                    content=content,
-                    chunk_size=chunk_size,
-                    chunk_overlap=chunk_overlap,
-                    max_summary_length=max_summary_length
-                ))
-                
-                # Display the result
-                st.success("✅ Summary generated successfully!")
-                st.subheader("Summary")
-                st.markdown(summary)
-                
-            except Exception as e:
-                st.error(f"❌ Error during summarization: {str(e)}")
-                
-                # Show additional debugging info for common issues
-                if "401" in str(e):
-                    st.info("💡 This error might be due to an invalid API key. Please check your OPENROUTER_API_KEY.")
-                elif "404" in str(e):
-                    st.info("💡 This error might be due to an invalid model. Please check your LLM_MODEL setting.")
-            finally:
-                # Cleanup temporary files
-                if temp_file_path and os.path.exists(temp_file_path):
-                    try:
-                        os.unlink(temp_file_path)
-                        temp_file_path = None
-                    except:
-                        pass
+        try:
+            # Identical requests attach to the running or cached job
+            st.session_state["job"] = summarizer.submit(input_type, content, {
+                "chunk_size": chunk_size,
+                "chunk_overlap": chunk_overlap,
+                "max_summary_length": max_summary_length,
+                "summary_mode": summary_mode,
+                "salient_token_budget": salient_token_budget,
+            })
+        except asyncio.QueueFull:
+            st.error("❌ Too many summaries are in progress. Please try again shortly.")
+
+# Show the session's job; it keeps running in the background across reruns
+job = st.session_state.get("job")
+if job is not None:
+    render_job(job)
 
 # Display sample usage
 st.divider()
@@ -185,4 +354,9 @@ with col1:
 
 with col2:
     st.markdown("**Try with a URL:**")
-    st.markdown("- `https://en.wikipedia.org/wiki/Artificial_intelligence`")
\ No newline at end of file
+    st.markdown("- `https://en.wikipedia.org/wiki/Artificial_intelligence`")
+
+# Poll until the job finishes; reruns re-render its progress without restarting it
+if job is not None and not job.done.is_set():
+    time.sleep(0.5)
+    st.rerun()
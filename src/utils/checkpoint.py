@@ -0,0 +1,239 @@
+"""
+Durable checkpoints for resumable pipeline runs.
+
+A run with a ``run_id`` records its inputs (the input type, the content and
+the options it was started with) once, and every chunk summary and combine
+result as soon as it completes. A run that fails or is interrupted is resumed
+by running the pipeline again from its recorded inputs: loading and splitting
+are repeated, which costs no LLM calls, while chunks and combine calls that
+completed before are taken from the checkpoint, so only the ones that were
+missing or had failed are sent to the LLM. Loaded documents and chunks are
+never written, so a checkpoint stays small whatever the size of the input.
+
+Runs are deleted when they finish without failed chunks; a run with failed
+chunks is kept so resuming it retries them. Runs that were abandoned are pruned
+once they have not been attempted for CHECKPOINT_MAX_AGE seconds.
+"""
+
+import os
+import time
+import json
+import uuid
+import asyncio
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+
+def get_checkpoint_path() -> str:
+    """Checkpoint database path from CHECKPOINT_PATH"""
+    return os.getenv("CHECKPOINT_PATH", ".cache/checkpoints.sqlite")
+
+
+def checkpointing_enabled() -> bool:
+    """Whether new runs get a run id and are checkpointed (CHECKPOINT_ENABLED, default false)"""
+    return os.getenv("CHECKPOINT_ENABLED", "false").lower() in ("1", "true", "yes")
+
+
+def new_run_id() -> str:
+    """Generate a short run id that is easy to pass to --resume"""
+    return uuid.uuid4().hex[:12]
+
+
+class RunStore:
+    """
+    SQLite-backed store of the inputs and completed chunk summaries of checkpointed runs.
+
+    Summaries are keyed by a fingerprint of the model and the chunk text (or
+    combine prompt), so a resumed run finds them whatever order its chunks
+    complete in. Summaries are written on the store's own thread
+    (``aadd_summary``) so the event loop is not blocked by SQLite, and commits
+    survive a crash of the process without an fsync each (synchronous=NORMAL).
+
+    Runs not attempted for ``max_age`` seconds are pruned on opening and then
+    every PRUNE_INTERVAL runs, and the freed pages are returned to the file
+    system (for databases created with incremental auto-vacuum).
+    """
+    
+    # Prune abandoned runs every N started runs rather than on every run
+    PRUNE_INTERVAL = 100
+    
+    def __init__(self, path: str, max_age: Optional[float] = None):
+        self.path = path
+        self.max_age = max_age
+        self._starts = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="run-store")
+    
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        # Only takes effect on a new database; lets deleted runs give their pages back
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "run_id TEXT PRIMARY KEY, "
+            "inputs TEXT NOT NULL, "
+            "created_at REAL NOT NULL, "
+            "updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS run_summaries ("
+            "run_id TEXT NOT NULL, "
+            "fingerprint TEXT NOT NULL, "
+            "summary TEXT NOT NULL, "
+            "PRIMARY KEY (run_id, fingerprint))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS runs_updated_at ON runs (updated_at)")
+        self._conn.commit()
+        self.prune()
+    
+    def start(self, run_id: str, inputs: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Record the start of a run, or of another attempt at a run.
+        
+        Args:
+            run_id: Run id
+            inputs: Input type, content and options of the run, JSON-serializable
+        
+        Returns:
+            Tuple of (inputs the run was first started with, whether it was started before)
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT inputs FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if row is None:
+                self._conn.execute(
+                    "INSERT INTO runs (run_id, inputs, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                    (run_id, json.dumps(inputs), now, now)
+                )
+            else:
+                self._conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (now, run_id))
+            self._conn.commit()
+            self._starts += 1
+            if self._starts % self.PRUNE_INTERVAL == 0:
+                self._prune(now)
+        
+        if row is None:
+            return inputs, False
+        return json.loads(row[0]), True
+    
+    def get_inputs(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the inputs a run was started with.
+        
+        Args:
+            run_id: Run id
+        
+        Returns:
+            The inputs passed to ``start``, or None for an unknown run
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT inputs FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+    
+    def get_summaries(self, run_id: str) -> Dict[str, str]:
+        """
+        Get the summaries completed so far by a run.
+        
+        Args:
+            run_id: Run id
+        
+        Returns:
+            Mapping of fingerprint to summary
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT fingerprint, summary FROM run_summaries WHERE run_id = ?", (run_id,)
+            ).fetchall()
+        return dict(rows)
+    
+    def add_summary(self, run_id: str, fingerprint: str, summary: str):
+        """Save one completed summary of a run, committed right away so it survives a crash"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO run_summaries (run_id, fingerprint, summary) VALUES (?, ?, ?)",
+                (run_id, fingerprint, summary)
+            )
+            self._conn.commit()
+    
+    async def aadd_summary(self, run_id: str, fingerprint: str, summary: str):
+        """Save one completed summary of a run without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self.add_summary, run_id, fingerprint, summary)
+    
+    def delete(self, run_id: str):
+        """Forget a run and its summaries, e.g. once it finished"""
+        with self._lock:
+            self._conn.execute("DELETE FROM run_summaries WHERE run_id = ?", (run_id,))
+            self._conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+            self._conn.commit()
+            self._free_pages()
+    
+    def prune(self) -> int:
+        """
+        Delete the runs that were not attempted for ``max_age`` seconds.
+        
+        Returns:
+            Number of runs deleted
+        """
+        with self._lock:
+            return self._prune(time.time())
+    
+    def _prune(self, now: float) -> int:
+        if self.max_age is None:
+            return 0
+        cutoff = now - self.max_age
+        self._conn.execute(
+            "DELETE FROM run_summaries WHERE run_id IN (SELECT run_id FROM runs WHERE updated_at < ?)", (cutoff,)
+        )
+        deleted = self._conn.execute("DELETE FROM runs WHERE updated_at < ?", (cutoff,)).rowcount
+        self._conn.commit()
+        if deleted:
+            # Only frees pages; a full VACUUM would rewrite the file while start() holds the lock
+            self._free_pages()
+        return deleted
+    
+    def _free_pages(self):
+        # Run to completion by executescript; a single execute() step frees only one page
+        self._conn.executescript("PRAGMA incremental_vacuum")
+    
+    def stats(self) -> Dict[str, int]:
+        """Return the number of stored runs and summaries"""
+        with self._lock:
+            runs = self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+            summaries = self._conn.execute("SELECT COUNT(*) FROM run_summaries").fetchone()[0]
+        return {"runs": runs, "summaries": summaries}
+    
+    def close(self):
+        """Close the underlying database connection"""
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
+
+
+_store: Optional[RunStore] = None
+_store_lock = threading.Lock()
+
+
+def get_run_store() -> RunStore:
+    """
+    Get the process-wide run store.
+    
+    Configured through CHECKPOINT_PATH and CHECKPOINT_MAX_AGE (seconds, default
+    7 days; empty keeps abandoned runs forever).
+    
+    Returns:
+        The shared RunStore
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            max_age = os.getenv("CHECKPOINT_MAX_AGE", str(7 * 24 * 3600))
+            _store = RunStore(get_checkpoint_path(), max_age=float(max_age) if max_age else None)
+        return _store
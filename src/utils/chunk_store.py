@@ -0,0 +1,248 @@
+"""
+Per-document store of chunk summaries for incremental re-summarization.
+"""
+
+import os
+import time
+import json
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.checkpoint import get_run_store
+
+
+def chunk_fingerprint(model: str, text: str) -> str:
+    """
+    Fingerprint a chunk for a given model.
+    
+    Args:
+        model: Model that summarizes the chunk
+        text: Chunk text
+    
+    Returns:
+        Hex digest identifying the chunk's summary
+    """
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+def summaries_fingerprint(summaries: List[str], **settings: object) -> str:
+    """
+    Fingerprint an ordered list of summaries plus the settings used to combine them.
+    
+    Args:
+        summaries: Chunk summaries in document order
+        **settings: Combine settings such as max_summary_length or combine_mode
+    
+    Returns:
+        Hex digest that changes whenever the combiner input changes
+    """
+    payload = json.dumps({"summaries": summaries, "settings": settings}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ChunkStore:
+    """
+    SQLite-backed store of chunk summaries and final summaries per document id.
+    
+    Each document keeps only the chunks of its latest run, so the store does
+    not grow with every revision of a document.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunk_summaries ("
+            "doc_id TEXT NOT NULL, "
+            "fingerprint TEXT NOT NULL, "
+            "summary TEXT NOT NULL, "
+            "PRIMARY KEY (doc_id, fingerprint))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "doc_id TEXT PRIMARY KEY, "
+            "summaries_fingerprint TEXT NOT NULL, "
+            "final_summary TEXT NOT NULL, "
+            "updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+    
+    def get_summaries(self, doc_id: str) -> Dict[str, str]:
+        """
+        Get the stored chunk summaries of a document.
+        
+        Args:
+            doc_id: Document id
+            
+        Returns:
+            Mapping of chunk fingerprint to summary
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT fingerprint, summary FROM chunk_summaries WHERE doc_id = ?", (doc_id,)
+            ).fetchall()
+        return dict(rows)
+    
+    def replace_summaries(self, doc_id: str, summaries: Dict[str, str]):
+        """
+        Replace the stored chunk summaries of a document with the latest run's.
+        
+        Args:
+            doc_id: Document id
+            summaries: Mapping of fingerprint to summary
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM chunk_summaries WHERE doc_id = ?", (doc_id,))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunk_summaries (doc_id, fingerprint, summary) VALUES (?, ?, ?)",
+                [(doc_id, fingerprint, summary) for fingerprint, summary in summaries.items()]
+            )
+            self._conn.commit()
+    
+    def get_final_summary(self, doc_id: str) -> Optional[Tuple[str, str]]:
+        """
+        Get the last final summary of a document.
+        
+        Returns:
+            Tuple of (summaries fingerprint, final summary), or None
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT summaries_fingerprint, final_summary FROM documents WHERE doc_id = ?", (doc_id,)
+            ).fetchone()
+    
+    def set_final_summary(self, doc_id: str, fingerprint: str, final_summary: str):
+        """Store the final summary produced from summaries with the given fingerprint"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents (doc_id, summaries_fingerprint, final_summary, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                (doc_id, fingerprint, final_summary, time.time())
+            )
+            self._conn.commit()
+    
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+class IncrementalSummaries:
+    """
+    Tracks which chunks of a document can reuse a stored summary during one run.
+    
+    Created with ``doc_id=None`` it reuses nothing and stores nothing. With a
+    ``run_id`` every computed summary is saved as soon as it completes, and a
+    resumed run reuses the summaries its earlier attempts saved.
+    """
+    
+    def __init__(self, doc_id: Optional[str], model: str, run_id: Optional[str] = None):
+        self.doc_id = doc_id
+        self.model = model
+        self.run_id = run_id
+        self.store = get_chunk_store() if doc_id else None
+        self.runs = get_run_store() if run_id else None
+        self.known = self.store.get_summaries(doc_id) if doc_id else {}
+        self.completed = self.runs.get_summaries(run_id) if run_id else {}
+        self.current: Dict[str, str] = {}
+        self.reused = 0
+        self.recomputed = 0
+        self.resumed = 0
+        self._lock = threading.Lock()
+    
+    def lookup(self, text: str) -> Optional[str]:
+        """Return the saved or stored summary of a chunk, or None"""
+        if self.store is None and self.runs is None:
+            return None
+        fingerprint = chunk_fingerprint(self.model, text)
+        summary = self.completed.get(fingerprint)
+        if summary is not None:
+            with self._lock:
+                self.resumed += 1
+                if self.doc_id:
+                    self.current[fingerprint] = summary
+            return summary
+        
+        summary = self.known.get(fingerprint)
+        if summary is not None:
+            with self._lock:
+                self.reused += 1
+                self.current[fingerprint] = summary
+        return summary
+    
+    async def record(self, text: str, summary: str):
+        """Remember a freshly computed chunk summary, saving it at once for a checkpointed run"""
+        if self.store is None and self.runs is None:
+            return
+        fingerprint = chunk_fingerprint(self.model, text)
+        if self.run_id:
+            await self.runs.aadd_summary(self.run_id, fingerprint, summary)
+        if self.doc_id:
+            with self._lock:
+                self.recomputed += 1
+                self.current[fingerprint] = summary
+    
+    async def finish(self, summaries: List[str], **settings: object) -> Dict[str, object]:
+        """
+        Persist this run's chunk summaries and check whether the combiner can be skipped.
+        
+        The store is written and read in a worker thread, off the event loop.
+        
+        Args:
+            summaries: Chunk summaries in document order
+            **settings: Combine settings that affect the final summary
+            
+        Returns:
+            State update with the number of chunks resumed from earlier attempts,
+            reuse counts, the summaries fingerprint and, when
+            the summaries did not change, the stored final summary
+        """
+        update: Dict[str, object] = {"resumed_chunks": self.resumed} if self.run_id else {}
+        if not self.doc_id:
+            return update
+        
+        stored = await asyncio.to_thread(self._save)
+        fingerprint = summaries_fingerprint(summaries, **settings)
+        update.update({
+            "reused_chunks": self.reused,
+            "recomputed_chunks": self.recomputed,
+            "summaries_fingerprint": fingerprint,
+        })
+        
+        if stored is not None and stored[0] == fingerprint:
+            update["final_summary"] = stored[1]
+            update["combine_skipped"] = True
+        return update
+    
+    def _save(self) -> Optional[Tuple[str, str]]:
+        """Replace the document's stored chunk summaries and return its last final summary"""
+        self.store.replace_summaries(self.doc_id, self.current)
+        return self.store.get_final_summary(self.doc_id)
+
+
+_store: Optional[ChunkStore] = None
+_store_lock = threading.Lock()
+
+
+def get_chunk_store() -> ChunkStore:
+    """
+    Get the process-wide chunk store at CHUNK_STORE_PATH.
+    
+    Returns:
+        The shared ChunkStore
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ChunkStore(os.getenv("CHUNK_STORE_PATH", ".cache/chunk_store.sqlite"))
+        return _store
@@ -0,0 +1,105 @@
+"""
+Compact, offset-based chunk storage.
+
+A ``ChunkList`` keeps one shared text buffer per source document and stores
+each chunk as a (document index, start, end) record in typed arrays, so
+splitting a document does not copy its text. Chunk text is sliced out only
+when it is read.
+"""
+
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+
+class Chunk:
+    """
+    Read-only view of one chunk, created on access.
+    
+    Exposes ``page_content`` and ``metadata`` like a LangChain ``Document`` so
+    nodes can treat chunks and documents alike.
+    """
+    
+    __slots__ = ("buffer", "start", "end", "doc_index", "metadata")
+    
+    def __init__(self, buffer: str, start: int, end: int, doc_index: int, metadata: Dict[str, Any]):
+        self.buffer = buffer
+        self.start = start
+        self.end = end
+        self.doc_index = doc_index
+        self.metadata = metadata
+    
+    @property
+    def page_content(self) -> str:
+        return self.buffer[self.start:self.end]
+    
+    def __repr__(self) -> str:
+        return f"Chunk(doc_index={self.doc_index}, start={self.start}, end={self.end})"
+
+
+class ChunkList:
+    """
+    Sequence of chunks stored as (document index, start, end) records.
+    
+    Buffers and document metadata are shared, never copied, between a list
+    and the lists derived from it with ``select``.
+    """
+    
+    def __init__(self, buffers: Optional[List[str]] = None, metadata: Optional[List[Dict[str, Any]]] = None):
+        self.buffers: List[str] = buffers if buffers is not None else []
+        self.metadata: List[Dict[str, Any]] = metadata if metadata is not None else [{} for _ in self.buffers]
+        self.doc_indices = array("l")
+        self.starts = array("q")
+        self.ends = array("q")
+    
+    def add_document(self, text: str, metadata: Optional[Dict[str, Any]] = None) -> int:
+        """Register a text buffer and return its document index"""
+        self.buffers.append(text)
+        self.metadata.append(metadata if metadata is not None else {})
+        return len(self.buffers) - 1
+    
+    def append(self, doc_index: int, start: int, end: int):
+        """Add a chunk covering ``buffers[doc_index][start:end]``"""
+        self.doc_indices.append(doc_index)
+        self.starts.append(start)
+        self.ends.append(end)
+    
+    def text(self, index: int) -> str:
+        """Text of chunk ``index``"""
+        return self.buffers[self.doc_indices[index]][self.starts[index]:self.ends[index]]
+    
+    def texts(self) -> List[str]:
+        """Texts of all chunks, in order"""
+        return [self.text(index) for index in range(len(self))]
+    
+    def select(self, indices: Iterable[int]) -> "ChunkList":
+        """
+        Derive a list holding the given chunks, sharing this list's buffers.
+        
+        Args:
+            indices: Chunk positions to keep, in the order they should appear
+        
+        Returns:
+            A new ChunkList
+        """
+        selected = ChunkList(self.buffers, self.metadata)
+        for index in indices:
+            selected.append(self.doc_indices[index], self.starts[index], self.ends[index])
+        return selected
+    
+    def __len__(self) -> int:
+        return len(self.starts)
+    
+    def __getitem__(self, index: int) -> Chunk:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("chunk index out of range")
+        doc_index = self.doc_indices[index]
+        return Chunk(self.buffers[doc_index], self.starts[index], self.ends[index], doc_index, self.metadata[doc_index])
+    
+    def __iter__(self) -> Iterator[Chunk]:
+        for index in range(len(self)):
+            yield self[index]
+    
+    def __repr__(self) -> str:
+        return f"ChunkList({len(self)} chunks over {len(self.buffers)} documents)"
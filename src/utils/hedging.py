@@ -0,0 +1,232 @@
+"""
+Hedged requests for the tail latency of LLM calls.
+
+A hedged call starts the request as usual. If it has not returned after the
+hedge delay, a percentile (p95 by default) of the recent latencies of the same
+model, a duplicate request is sent, possibly to a fallback model. The first
+successful response is used and the other request is cancelled.
+
+Latency history is kept per model for the lifetime of the process, so
+long-lived processes (daemon, service, batch) start hedging with a warm
+history. Hedging begins once enough latencies have been observed.
+"""
+
+import os
+import math
+import time
+import asyncio
+import threading
+import statistics
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile ``q`` (0-100) of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class LatencyWindow:
+    """
+    Rolling window of the latencies of completed requests to one model.
+    
+    Args:
+        size: Number of recent latencies kept
+    """
+    
+    def __init__(self, size: int = 500):
+        self.samples: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+    
+    def add(self, seconds: float):
+        with self._lock:
+            self.samples.append(seconds)
+    
+    def percentile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        """Percentile ``q`` of the window, or None with fewer than ``min_samples`` latencies"""
+        with self._lock:
+            samples = list(self.samples)
+        if not samples or len(samples) < min_samples:
+            return None
+        return percentile(samples, q)
+    
+    def expected_beyond(self, seconds: float) -> float:
+        """Median of the latencies of at least ``seconds``, i.e. how long a request still running after ``seconds`` is expected to take"""
+        with self._lock:
+            longer = [sample for sample in self.samples if sample >= seconds]
+        return statistics.median(longer) if longer else seconds
+
+
+_windows: Dict[str, LatencyWindow] = {}
+_windows_lock = threading.Lock()
+
+
+def get_latency_window(model: str) -> LatencyWindow:
+    """Get the process-wide latency window of a model"""
+    with _windows_lock:
+        window = _windows.get(model)
+        if window is None:
+            window = LatencyWindow()
+            _windows[model] = window
+        return window
+
+
+class Hedger:
+    """
+    Runs calls with a backup request after a percentile-based delay and
+    records the hedging done in one run.
+    
+    Args:
+        window: Latencies of the primary model the hedge delay is derived from
+        backup_window: Latencies of the backup model, defaults to ``window``
+        fallback: Client for backup requests (e.g. a fallback model), used by the caller
+        percentile: Latency percentile after which the backup request is sent
+        min_samples: Latencies needed in ``window`` before calls are hedged
+        min_delay: Shortest hedge delay in seconds
+    """
+    
+    def __init__(
+        self,
+        window: LatencyWindow,
+        backup_window: Optional[LatencyWindow] = None,
+        fallback: Any = None,
+        percentile: float = 95.0,
+        min_samples: int = 20,
+        min_delay: float = 0.5
+    ):
+        self.window = window
+        self.backup_window = backup_window or window
+        self.fallback = fallback
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.calls = 0
+        self.hedged = 0
+        self.backup_wins = 0
+        # Time until the response was available, and the estimated time without hedging
+        self.latencies: List[float] = []
+        self.unhedged_latencies: List[float] = []
+    
+    def delay(self) -> Optional[float]:
+        """Seconds to wait before sending a backup request, or None while the history is too short"""
+        value = self.window.percentile(self.percentile, self.min_samples)
+        return None if value is None else max(self.min_delay, value)
+    
+    async def run(self, primary: Callable[[], Awaitable[T]], backup: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Run a call, hedging it with a backup request once the delay passes.
+        
+        Args:
+            primary: Function starting the request
+            backup: Function starting the duplicate request
+        
+        Returns:
+            The first successful result and whether it came from the backup request
+        
+        Raises:
+            The primary request's error if both requests fail
+        """
+        started = time.perf_counter()
+        delay = self.delay()
+        self.calls += 1
+        
+        primary_task = asyncio.ensure_future(self._timed(primary, self.window))
+        backup_task = None
+        pending = {primary_task}
+        errors = []
+        
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                self.hedged += 1
+                backup_task = asyncio.ensure_future(self._timed(backup, self.backup_window))
+                pending.add(backup_task)
+            
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # The primary wins a tie
+                for task in sorted(done, key=lambda task: task is not primary_task):
+                    if task.exception() is None:
+                        self._record(started, task is backup_task)
+                        return task.result(), task is backup_task
+                    errors.append((task is primary_task, task.exception()))
+            
+            # Both failed: report the primary's error
+            raise max(errors, key=lambda item: item[0])[1]
+        finally:
+            # Cancel the request that lost
+            for task in pending:
+                task.cancel()
+    
+    async def _timed(self, call: Callable[[], Awaitable[T]], window: LatencyWindow) -> T:
+        # Only completed requests contribute to the latency history
+        started = time.perf_counter()
+        result = await call()
+        window.add(time.perf_counter() - started)
+        return result
+    
+    def _record(self, started: float, backup_won: bool):
+        elapsed = time.perf_counter() - started
+        self.latencies.append(elapsed)
+        if backup_won:
+            # The cancelled primary would have taken at least this long
+            self.backup_wins += 1
+            self.unhedged_latencies.append(self.window.expected_beyond(elapsed))
+        else:
+            self.unhedged_latencies.append(elapsed)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hedging done in this run.
+        
+        The latency without hedging of a call whose backup won is estimated from
+        the latencies of earlier requests that ran at least as long, so
+        ``p99_saved_ms`` is an estimate.
+        
+        Returns:
+            Dictionary with the number of calls, hedged calls and backup wins,
+            and p99 latency in milliseconds with and without hedging
+        """
+        stats: Dict[str, Any] = {"calls": self.calls, "hedged": self.hedged, "backup_wins": self.backup_wins}
+        if self.latencies:
+            p99 = percentile(self.latencies, 99)
+            p99_unhedged = percentile(self.unhedged_latencies, 99)
+            stats.update({
+                "p99_ms": round(p99 * 1000, 1),
+                "p99_unhedged_ms": round(p99_unhedged * 1000, 1),
+                "p99_saved_ms": round(max(0.0, p99_unhedged - p99) * 1000, 1),
+            })
+        return stats
+
+
+def hedging_enabled(override: Optional[bool] = None) -> bool:
+    """Whether map calls are hedged: the override if given, else HEDGE_ENABLED"""
+    if override is not None:
+        return override
+    return os.getenv("HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+
+
+def hedger_from_env(model: str, backup_model: str, fallback: Any = None) -> Hedger:
+    """
+    Create a hedger configured by the environment.
+    
+    Args:
+        model: Model of the primary requests
+        backup_model: Model of the backup requests
+        fallback: Client for backup requests
+    
+    Returns:
+        A new Hedger using the process-wide latency windows of both models
+    """
+    return Hedger(
+        get_latency_window(model),
+        backup_window=get_latency_window(backup_model),
+        fallback=fallback,
+        percentile=float(os.getenv("HEDGE_PERCENTILE", "95")),
+        min_samples=int(os.getenv("HEDGE_MIN_SAMPLES", "20")),
+        min_delay=float(os.getenv("HEDGE_MIN_DELAY", "0.5"))
+    )
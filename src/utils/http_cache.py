@@ -0,0 +1,152 @@
+"""
+Persistent cache of fetched web pages for conditional requests.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+
+
+class HTTPCache:
+    """
+    SQLite-backed cache of page bodies keyed by URL, with their ETag and Last-Modified validators.
+    
+    Entries are never served without asking the server: a cached page is
+    revalidated with If-None-Match / If-Modified-Since and reused only on a 304
+    response. The least recently used entries are evicted beyond ``max_entries``.
+    """
+    
+    # Run eviction every N writes rather than on every write
+    EVICT_INTERVAL = 100
+    
+    def __init__(self, path: str, max_entries: Optional[int] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.revalidated = 0
+        self.fetched = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, "
+            "etag TEXT, "
+            "last_modified TEXT, "
+            "content_type TEXT, "
+            "body BLOB NOT NULL, "
+            "fetched_at REAL NOT NULL, "
+            "accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at)")
+        self._conn.commit()
+    
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached page.
+        
+        Args:
+            url: The requested URL
+        
+        Returns:
+            Dictionary with etag, last_modified, content_type and body, or None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, content_type, body FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "content_type": row[2], "body": row[3]}
+    
+    def set(self, url: str, etag: Optional[str], last_modified: Optional[str], content_type: Optional[str], body: bytes):
+        """
+        Store a page fetched with a 200 response.
+        
+        Args:
+            url: The requested URL
+            etag: ETag response header
+            last_modified: Last-Modified response header
+            content_type: Content-Type response header
+            body: The response body
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, content_type, body, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, content_type, body, now, now)
+            )
+            self._conn.commit()
+            self.fetched += 1
+            self._writes += 1
+            if self._writes % self.EVICT_INTERVAL == 0:
+                self._evict()
+    
+    def touch(self, url: str):
+        """Record that the server confirmed the cached page is current (a 304 response)"""
+        with self._lock:
+            self._conn.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+            self.revalidated += 1
+    
+    def _evict(self):
+        if self.max_entries is not None:
+            self._conn.execute(
+                "DELETE FROM pages WHERE url NOT IN "
+                "(SELECT url FROM pages ORDER BY accessed_at DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+    
+    def clear(self):
+        """Remove every cached page"""
+        with self._lock:
+            self._conn.execute("DELETE FROM pages")
+            self._conn.commit()
+    
+    def stats(self) -> Dict[str, int]:
+        """Return revalidation/fetch counters and the number of stored pages"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        return {"revalidated": self.revalidated, "fetched": self.fetched, "entries": entries}
+    
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+_cache: Optional[HTTPCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> Optional[HTTPCache]:
+    """
+    Get the process-wide page cache.
+    
+    Configured through URL_CACHE_ENABLED, URL_CACHE_PATH and URL_CACHE_MAX_ENTRIES.
+    
+    Returns:
+        The shared cache, or None when caching is disabled
+    """
+    global _cache
+    
+    if os.getenv("URL_CACHE_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+    
+    with _cache_lock:
+        if _cache is None:
+            max_entries = os.getenv("URL_CACHE_MAX_ENTRIES", "1000")
+            _cache = HTTPCache(
+                path=os.getenv("URL_CACHE_PATH", ".cache/url_cache.sqlite"),
+                max_entries=int(max_entries) if max_entries else None
+            )
+        return _cache
@@ -0,0 +1,290 @@
+"""
+Instrumentation for pipeline runs: node timings, LLM calls, token usage,
+retries and cache hits, delivered to pluggable sinks.
+
+Records are plain dictionaries with a ``type`` of ``node``, ``llm_call``,
+``llm_retry`` or ``http_error`` plus ``name``, ``start`` (epoch seconds) and ``seconds``. They
+are tagged with the ``run_id`` of the pipeline run that produced them.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import functools
+import threading
+import contextvars
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, TextIO
+
+_sinks: List[Any] = []
+_sinks_lock = threading.Lock()
+_env_configured = False
+_run_id: contextvars.ContextVar = contextvars.ContextVar("run_id", default=None)
+
+
+class MemorySink:
+    """Collects records in memory, e.g. for tests or the --profile report"""
+    
+    def __init__(self):
+        self.records: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+    
+    def emit(self, record: Dict[str, Any]):
+        with self._lock:
+            self.records.append(record)
+    
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+
+
+class JsonLogSink:
+    """Writes one JSON object per record to a file or stream"""
+    
+    def __init__(self, target: Any = None):
+        if target is None or target == "-":
+            self._stream: TextIO = sys.stderr
+            self._owns_stream = False
+        elif isinstance(target, str):
+            self._stream = open(target, "a", encoding="utf-8")
+            self._owns_stream = True
+        else:
+            self._stream = target
+            self._owns_stream = False
+        self._lock = threading.Lock()
+    
+    def emit(self, record: Dict[str, Any]):
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+    
+    def close(self):
+        if self._owns_stream:
+            self._stream.close()
+
+
+class OpenTelemetrySink:
+    """
+    Turns records into OpenTelemetry spans.
+    
+    Requires the optional ``opentelemetry-api`` package; exporting is left to
+    whatever tracer provider the application configures.
+    """
+    
+    def __init__(self, tracer_name: str = "langgraph-summarizer"):
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise ImportError("OpenTelemetrySink requires the 'opentelemetry-api' package")
+        self._tracer = trace.get_tracer(tracer_name)
+    
+    def emit(self, record: Dict[str, Any]):
+        start_ns = int(record["start"] * 1e9)
+        span = self._tracer.start_span(f"{record['type']}:{record['name']}", start_time=start_ns)
+        for key, value in record.items():
+            if value is not None and isinstance(value, (str, bool, int, float)):
+                span.set_attribute(f"summarizer.{key}", value)
+        span.end(end_time=start_ns + int(record["seconds"] * 1e9))
+
+
+def add_sink(sink: Any):
+    """Register a sink; it receives every record emitted afterwards"""
+    with _sinks_lock:
+        _sinks.append(sink)
+
+
+def remove_sink(sink: Any):
+    """Unregister a previously added sink"""
+    with _sinks_lock:
+        if sink in _sinks:
+            _sinks.remove(sink)
+
+
+def configure_sinks_from_env():
+    """
+    Add sinks requested through the environment, once per process.
+    
+    TRACE_LOG enables JSON log lines (a file path, or '-' for stderr) and
+    TRACE_OTEL=true enables OpenTelemetry spans.
+    """
+    global _env_configured
+    if _env_configured:
+        return
+    _env_configured = True
+    
+    trace_log = os.getenv("TRACE_LOG")
+    if trace_log:
+        add_sink(JsonLogSink(trace_log))
+    if os.getenv("TRACE_OTEL", "false").lower() in ("1", "true", "yes"):
+        add_sink(OpenTelemetrySink())
+
+
+def is_enabled() -> bool:
+    """Whether any sink is registered"""
+    return bool(_sinks)
+
+
+def set_run_id(run_id: Optional[str]) -> contextvars.Token:
+    """Tag records emitted in the current context with a run id"""
+    return _run_id.set(run_id)
+
+
+def reset_run_id(token: contextvars.Token):
+    """Restore the run id that was active before ``set_run_id``"""
+    _run_id.reset(token)
+
+
+async def iter_with_run_id(iterator: AsyncIterator[Any], run_id: Optional[str]) -> AsyncIterator[Any]:
+    """
+    Tag records emitted while advancing an async iterator with a run id.
+    
+    The run id is set only while the next item is produced and reset before it
+    is yielded, so it never leaks into the consumer's context, even if the
+    consumer stops iterating without closing the iterator.
+    
+    Args:
+        iterator: Async iterator, e.g. a graph's ``astream``
+        run_id: Run id
+    
+    Yields:
+        The iterator's items
+    """
+    try:
+        while True:
+            token = set_run_id(run_id)
+            try:
+                item = await anext(iterator)
+            except StopAsyncIteration:
+                return
+            finally:
+                reset_run_id(token)
+            yield item
+    finally:
+        await iterator.aclose()
+
+
+def emit(record_type: str, name: str, start: float, seconds: float, **fields: Any):
+    """
+    Send a record to every registered sink.
+    
+    Args:
+        record_type: 'node', 'llm_call', 'llm_retry' or 'http_error'
+        name: Node name, model name or URL
+        start: Start time in epoch seconds
+        seconds: Duration in seconds
+        **fields: Extra attributes (tokens, cache_hit, status, ...)
+    """
+    if not _sinks:
+        return
+    
+    record = {"type": record_type, "name": name, "run_id": _run_id.get(), "start": start, "seconds": seconds}
+    record.update(fields)
+    
+    with _sinks_lock:
+        sinks = list(_sinks)
+    for sink in sinks:
+        sink.emit(record)
+
+
+def instrument_node(name: str, node: Callable) -> Callable:
+    """
+    Wrap a graph node so its wall time is recorded as a ``node`` record.
+    
+    Args:
+        name: Node name used in the graph
+        node: Sync or async node function
+    
+    Returns:
+        Wrapped node function of the same kind
+    """
+    if asyncio.iscoroutinefunction(node):
+        @functools.wraps(node)
+        async def async_wrapper(state: Any) -> Dict[str, Any]:
+            start, started = time.time(), time.perf_counter()
+            try:
+                return await node(state)
+            finally:
+                emit("node", name, start, time.perf_counter() - started)
+        return async_wrapper
+    
+    @functools.wraps(node)
+    def wrapper(state: Any) -> Dict[str, Any]:
+        start, started = time.time(), time.perf_counter()
+        try:
+            return node(state)
+        finally:
+            emit("node", name, start, time.perf_counter() - started)
+    return wrapper
+
+
+async def record_http_error(response: Any):
+    """httpx response hook recording failed HTTP attempts (which the scheduler may retry)"""
+    if response.status_code >= 400:
+        emit("http_error", str(response.request.url), time.time(), 0.0, status=response.status_code)
+
+
+def summarize_records(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Aggregate records into a per-run profile.
+    
+    Args:
+        records: Records collected by a MemorySink
+    
+    Returns:
+        Dictionary with per-node seconds and LLM call, token, retry, hedge and cache totals
+    """
+    nodes: Dict[str, Dict[str, float]] = {}
+    calls = [record for record in records if record["type"] == "llm_call"]
+    network_calls = [record for record in calls if not record.get("cache_hit")]
+    
+    for record in records:
+        if record["type"] == "node":
+            node = nodes.setdefault(record["name"], {"calls": 0, "seconds": 0.0})
+            node["calls"] += 1
+            node["seconds"] += record["seconds"]
+    
+    latencies = sorted(record["seconds"] for record in network_calls)
+    return {
+        "nodes": nodes,
+        "llm_calls": len(network_calls),
+        "cache_hits": len(calls) - len(network_calls),
+        "llm_seconds_total": sum(latencies),
+        "llm_seconds_p50": latencies[len(latencies) // 2] if latencies else 0.0,
+        "llm_seconds_max": latencies[-1] if latencies else 0.0,
+        "prompt_tokens": sum(record.get("prompt_tokens") or 0 for record in calls),
+        "completion_tokens": sum(record.get("completion_tokens") or 0 for record in calls),
+        "retries": sum(1 for record in records if record["type"] == "llm_retry"),
+        "hedge_wins": sum(1 for record in network_calls if record.get("hedge_won")),
+        "rate_limited": sum(1 for record in records if record["type"] == "http_error" and record.get("status") == 429),
+    }
+
+
+def format_profile(records: List[Dict[str, Any]]) -> str:
+    """
+    Render a profile breakdown table.
+    
+    Args:
+        records: Records collected by a MemorySink
+    
+    Returns:
+        Multi-line table text
+    """
+    profile = summarize_records(records)
+    total = sum(node["seconds"] for node in profile["nodes"].values()) or 1.0
+    
+    lines = [f"{'node':<14}{'calls':>7}{'seconds':>10}{'share':>8}"]
+    for name, node in profile["nodes"].items():
+        lines.append(f"{name:<14}{node['calls']:>7}{node['seconds']:>10.3f}{node['seconds'] / total:>8.1%}")
+    lines.append("")
+    lines.append(
+        f"LLM calls: {profile['llm_calls']} (cache hits: {profile['cache_hits']}, retries: {profile['retries']}, "
+        f"rate limited: {profile['rate_limited']}, won by hedged requests: {profile['hedge_wins']})"
+    )
+    lines.append(
+        f"LLM latency: total {profile['llm_seconds_total']:.3f}s, "
+        f"p50 {profile['llm_seconds_p50']:.3f}s, max {profile['llm_seconds_max']:.3f}s"
+    )
+    lines.append(f"Tokens: {profile['prompt_tokens']} prompt, {profile['completion_tokens']} completion")
+    return "\n".join(lines)
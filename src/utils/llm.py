@@ -0,0 +1,330 @@
+"""
+Shared helpers for creating and calling the LLM from pipeline nodes.
+
+``langchain_openai`` (and with it the ``openai`` SDK) is imported when the
+first client is created, not when this module is imported.
+"""
+
+import os
+import time
+import asyncio
+import threading
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+
+from src.utils import instrumentation
+from src.utils.hedging import Hedger
+from src.utils.llm_cache import get_llm_cache
+from src.utils.scheduler import LLMScheduler, is_retryable, scheduler_from_env
+from src.utils.text_splitter import estimate_tokens
+
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
+
+# Keep-alive connection pool limits shared by every client of a base URL
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60.0)
+HTTP_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+
+# Completion tokens assumed per call until the actual usage is known
+COMPLETION_TOKEN_ESTIMATE = 256
+
+_lock = threading.Lock()
+_sync_pools: Dict[str, httpx.Client] = {}
+_async_pools: Dict[Tuple[str, int], httpx.AsyncClient] = {}
+_llms: Dict[Tuple[Any, ...], "ChatOpenAI"] = {}
+_loops: Dict[int, asyncio.AbstractEventLoop] = {}
+_schedulers: Dict[int, LLMScheduler] = {}
+_llm_concurrency: Optional[int] = None
+
+
+def get_llm_config() -> Dict[str, str]:
+    """
+    Read the LLM configuration from the environment.
+    
+    Returns:
+        Dictionary with the model name, base URL and API key
+    """
+    return {
+        "model": os.getenv("LLM_MODEL", "meta-llama/llama-3.1-8b-instruct:free"),
+        "base_url": os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1"),
+        "api_key": os.getenv("OPENROUTER_API_KEY"),
+    }
+
+
+def get_role_model(role: str, override: Optional[str] = None) -> str:
+    """
+    Get the model for one phase of the pipeline.
+    
+    The cheap per-chunk ``map`` calls use MAP_MODEL and the quality-critical
+    ``reduce`` (combine) calls use REDUCE_MODEL; both default to LLM_MODEL.
+    
+    Args:
+        role: 'map' or 'reduce'
+        override: Model requested for this run, if any
+    
+    Returns:
+        The model name
+    """
+    return override or os.getenv(f"{role.upper()}_MODEL") or get_llm_config()["model"]
+
+
+def _current_loop_id() -> int:
+    # Async connections cannot be shared between event loops (e.g. repeated asyncio.run calls)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return 0
+    _loops.setdefault(id(loop), loop)
+    return id(loop)
+
+
+def _prune_closed_loops():
+    # Forget clients bound to event loops that have finished
+    for loop_id, loop in list(_loops.items()):
+        if loop.is_closed():
+            del _loops[loop_id]
+            for key in [key for key in _async_pools if key[1] == loop_id]:
+                del _async_pools[key]
+            for key in [key for key in _llms if key[-1] == loop_id]:
+                del _llms[key]
+            _schedulers.pop(loop_id, None)
+
+
+def get_llm(model: Optional[str] = None, temperature: float = 0.0) -> "ChatOpenAI":
+    """
+    Get a shared chat model client for the current configuration.
+    
+    Clients are cached per (model, base URL, API key, temperature) and share a
+    keep-alive HTTP connection pool per base URL, so repeated node calls reuse
+    open TLS connections. The client does not retry by itself; retries are
+    left to the request scheduler used by ``invoke_llm``. Changing the environment yields a new client on the
+    next call; use ``reset_llm_clients`` to drop the old ones.
+    
+    Args:
+        model: Model name, defaults to LLM_MODEL
+        temperature: Sampling temperature
+        
+    Returns:
+        A configured ChatOpenAI instance
+    """
+    config = get_llm_config()
+    model = model or config["model"]
+    base_url = config["base_url"]
+    
+    with _lock:
+        loop_id = _current_loop_id()
+        key = (model, base_url, config["api_key"], temperature, loop_id)
+        llm = _llms.get(key)
+        if llm is not None:
+            return llm
+        
+        _prune_closed_loops()
+        
+        sync_pool = _sync_pools.get(base_url)
+        if sync_pool is None:
+            sync_pool = httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+            _sync_pools[base_url] = sync_pool
+        
+        async_pool = _async_pools.get((base_url, loop_id))
+        if async_pool is None:
+            async_pool = httpx.AsyncClient(
+                limits=HTTP_LIMITS,
+                timeout=HTTP_TIMEOUT,
+                event_hooks={"response": [instrumentation.record_http_error]}
+            )
+            _async_pools[(base_url, loop_id)] = async_pool
+        
+        from langchain_openai import ChatOpenAI
+        
+        # Low temperature for consistent, factual summaries
+        llm = ChatOpenAI(
+            model=model,
+            openai_api_key=config["api_key"],
+            openai_api_base=base_url,
+            temperature=temperature,
+            stream_usage=True,
+            max_retries=0,
+            http_client=sync_pool,
+            http_async_client=async_pool
+        )
+        _llms[key] = llm
+        return llm
+
+
+def set_llm_concurrency(limit: Optional[int]):
+    """
+    Set the process-wide limit on in-flight LLM calls.
+    
+    The limit applies across all concurrently running pipelines (e.g. batch
+    mode), on top of the per-document ``max_concurrency``. It is the upper
+    bound of the scheduler's adaptive limit, which shrinks on rate limiting.
+    
+    Args:
+        limit: Maximum number of concurrent LLM calls, or None/0 for the default
+    """
+    global _llm_concurrency
+    with _lock:
+        _llm_concurrency = limit
+        _schedulers.clear()
+
+
+def get_scheduler() -> LLMScheduler:
+    """
+    Get the request scheduler of the current event loop.
+    
+    Rate limits, retries and deadlines are read from the environment when the
+    scheduler is created (see ``scheduler_from_env``).
+    
+    Returns:
+        The shared LLMScheduler
+    """
+    with _lock:
+        loop_id = _current_loop_id()
+        scheduler = _schedulers.get(loop_id)
+        if scheduler is None:
+            scheduler = scheduler_from_env(_llm_concurrency)
+            _schedulers[loop_id] = scheduler
+        return scheduler
+
+
+async def aclose_llm_clients():
+    """
+    Close every shared client and its HTTP connection pools.
+    
+    Call this when shutting down a long-lived process. Async pools belonging to
+    other (already closed) event loops are discarded without awaiting them.
+    """
+    with _lock:
+        loop_id = _current_loop_id()
+        sync_pools = list(_sync_pools.values())
+        async_pools = list(_async_pools.items())
+        _sync_pools.clear()
+        _async_pools.clear()
+        _llms.clear()
+        _loops.clear()
+        _schedulers.clear()
+    
+    for pool in sync_pools:
+        pool.close()
+    for (_, pool_loop_id), pool in async_pools:
+        if pool_loop_id == loop_id:
+            await pool.aclose()
+
+
+def reset_llm_clients():
+    """Drop all cached clients so the next call rebuilds them from the current environment"""
+    with _lock:
+        for pool in _sync_pools.values():
+            pool.close()
+        _sync_pools.clear()
+        _async_pools.clear()
+        _llms.clear()
+        _loops.clear()
+        _schedulers.clear()
+
+
+async def invoke_llm(
+    llm: Any,
+    prompt: str,
+    on_token: Optional[Callable[[str], None]] = None,
+    timeout: Optional[float] = None,
+    hedger: Optional[Hedger] = None
+) -> str:
+    """
+    Send a prompt to the LLM, serving repeated prompts from the response cache.
+    
+    A cache hit skips the network call entirely; a miss goes through the
+    request scheduler, which applies rate limits and adaptive concurrency and
+    retries rate-limited, failed and timed-out attempts, and stores the
+    stripped response text.
+    
+    Args:
+        llm: LangChain chat model to call
+        prompt: The rendered prompt
+        on_token: Optional callback; when given the response is streamed and
+            each generated token is passed to it (a cache hit is passed whole).
+            A streamed call is not retried once tokens have been passed on.
+        timeout: Deadline in seconds for the call including retries, defaults
+            to LLM_CALL_TIMEOUT
+        hedger: Optional hedger; a call that has not returned after its hedge
+            delay is duplicated on ``hedger.fallback`` (or ``llm``) and the
+            slower request is cancelled. Streamed calls are not hedged.
+        
+    Returns:
+        The response text
+    """
+    cache = get_llm_cache()
+    model = getattr(llm, "model_name", "")
+    temperature = getattr(llm, "temperature", None)
+    # Responses of the same model name from different endpoints are cached apart
+    provider = getattr(llm, "openai_api_base", None) or ""
+    
+    start, started = time.time(), time.perf_counter()
+    
+    if cache is not None:
+        cached = await cache.aget(model, temperature, prompt, provider)
+        if cached is not None:
+            instrumentation.emit("llm_call", model, start, time.perf_counter() - started, cache_hit=True)
+            if on_token is not None:
+                on_token(cached)
+            return cached
+    
+    scheduler = get_scheduler()
+    estimated_tokens = estimate_tokens(prompt) + COMPLETION_TOKEN_ESTIMATE
+    usage = None
+    streamed = False
+    
+    async def attempt(target: Any = llm) -> str:
+        nonlocal usage, streamed
+        if on_token is None:
+            response = await target.ainvoke(prompt)
+            usage = response.usage_metadata
+            return response.content.strip()
+        
+        parts = []
+        async for chunk in llm.astream(prompt):
+            if chunk.content:
+                parts.append(chunk.content)
+                streamed = True
+                on_token(chunk.content)
+            if chunk.usage_metadata:
+                usage = chunk.usage_metadata
+        return "".join(parts).strip()
+    
+    def scheduled(target: Any) -> Awaitable[str]:
+        return scheduler.run(
+            lambda: attempt(target),
+            tokens=estimated_tokens,
+            timeout=timeout,
+            name=getattr(target, "model_name", ""),
+            retryable=lambda error: not streamed and is_retryable(error)
+        )
+    
+    started = time.perf_counter()
+    backup_won = False
+    if hedger is not None and on_token is None:
+        backup = hedger.fallback or llm
+        text, backup_won = await hedger.run(lambda: scheduled(llm), lambda: scheduled(backup))
+        if backup_won:
+            # Cache the response under the model that produced it
+            model = getattr(backup, "model_name", "")
+            temperature = getattr(backup, "temperature", None)
+            provider = getattr(backup, "openai_api_base", None) or ""
+    else:
+        text = await scheduled(llm)
+    scheduler.record_usage(estimated_tokens, usage.get("total_tokens") if usage else None)
+    
+    instrumentation.emit(
+        "llm_call", model, start, time.perf_counter() - started,
+        cache_hit=False,
+        hedge_won=backup_won,
+        prompt_tokens=usage.get("input_tokens") if usage else None,
+        completion_tokens=usage.get("output_tokens") if usage else None
+    )
+    
+    if cache is not None:
+        await cache.aset(model, temperature, prompt, text, provider)
+    
+    return text
@@ -0,0 +1,195 @@
+"""
+Persistent, content-addressed cache for LLM responses.
+"""
+
+import os
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict
+
+
+class LLMCache:
+    """
+    SQLite-backed cache of LLM responses keyed by provider, model, temperature and prompt hash.
+    
+    The provider is the API base URL, so the same model name served by two
+    endpoints (e.g. OpenRouter and a local stand-in server) does not share entries.
+    
+    The database runs in WAL mode with a busy timeout so that the CLI and the
+    Streamlit app can share one cache file. Entries expire after ``ttl`` seconds
+    and the least recently used entries are evicted beyond ``max_entries``.
+    
+    Async callers use ``aget`` and ``aset``, which run the queries on the
+    cache's own thread so the event loop keeps serving other LLM calls.
+    Commits are not synced to disk one by one (synchronous=NORMAL): a crash of
+    the process loses nothing, a power loss at most the latest responses.
+    """
+    
+    # Run eviction every N writes rather than on every write
+    EVICT_INTERVAL = 100
+    
+    def __init__(self, path: str, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="llm-cache")
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, "
+            "response TEXT NOT NULL, "
+            "created_at REAL NOT NULL, "
+            "accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        self._conn.commit()
+    
+    @staticmethod
+    def make_key(model: str, temperature: float, prompt: str, provider: str = "") -> str:
+        """Build the cache key for a rendered prompt"""
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return f"{provider}|{model}|{temperature}|{prompt_hash}"
+    
+    def get(self, model: str, temperature: float, prompt: str, provider: str = "") -> Optional[str]:
+        """
+        Look up a cached response.
+        
+        Args:
+            model: Model name the prompt was sent to
+            temperature: Sampling temperature of the call
+            prompt: The rendered prompt
+            provider: API base URL the model is served from
+            
+        Returns:
+            The cached response, or None on a miss or expired entry
+        """
+        key = self.make_key(model, temperature, prompt, provider)
+        now = time.time()
+        
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            
+            if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+                self.misses += 1
+                return None
+            
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+    
+    def set(self, model: str, temperature: float, prompt: str, response: str, provider: str = ""):
+        """
+        Store a response in the cache.
+        
+        Args:
+            model: Model name the prompt was sent to
+            temperature: Sampling temperature of the call
+            prompt: The rendered prompt
+            response: The LLM response text
+            provider: API base URL the model is served from
+        """
+        key = self.make_key(model, temperature, prompt, provider)
+        now = time.time()
+        
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, response, now, now)
+            )
+            self._conn.commit()
+            self._writes += 1
+            if self._writes % self.EVICT_INTERVAL == 0:
+                self._evict(now)
+    
+    async def aget(self, model: str, temperature: float, prompt: str, provider: str = "") -> Optional[str]:
+        """Look up a cached response without blocking the event loop, see ``get``"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.get, model, temperature, prompt, provider)
+    
+    async def aset(self, model: str, temperature: float, prompt: str, response: str, provider: str = ""):
+        """Store a response without blocking the event loop, see ``set``"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self.set, model, temperature, prompt, response, provider)
+    
+    def evict(self):
+        """Remove expired entries and trim the cache to its maximum size"""
+        with self._lock:
+            self._evict(time.time())
+    
+    def _evict(self, now: float):
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        if self.max_entries is not None:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key NOT IN "
+                "(SELECT key FROM responses ORDER BY accessed_at DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+        self._conn.commit()
+    
+    def clear(self):
+        """Remove every cached response"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+    
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the number of stored entries"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+    
+    def close(self):
+        """Close the underlying database connection"""
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """
+    Get the process-wide LLM response cache.
+    
+    Configured through LLM_CACHE_ENABLED, LLM_CACHE_PATH, LLM_CACHE_TTL (seconds)
+    and LLM_CACHE_MAX_ENTRIES.
+    
+    Returns:
+        The shared cache, or None when caching is disabled
+    """
+    global _cache
+    
+    if os.getenv("LLM_CACHE_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+    
+    with _cache_lock:
+        if _cache is None:
+            ttl = os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))
+            max_entries = os.getenv("LLM_CACHE_MAX_ENTRIES", "100000")
+            _cache = LLMCache(
+                path=os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite"),
+                ttl=float(ttl) if ttl else None,
+                max_entries=int(max_entries) if max_entries else None
+            )
+        return _cache
@@ -0,0 +1,23 @@
+"""
+Progress events emitted from inside pipeline nodes while streaming.
+"""
+
+from typing import Any, Callable, Dict
+
+from langgraph.config import get_stream_writer
+
+
+def get_progress_writer() -> Callable[[Dict[str, Any]], None]:
+    """
+    Get a callable that emits progress events to the LangGraph custom stream.
+    
+    Outside of a graph run (e.g. when a node is called directly) the returned
+    writer silently drops events.
+    
+    Returns:
+        Function taking an event dictionary
+    """
+    try:
+        return get_stream_writer()
+    except (RuntimeError, KeyError):
+        return lambda event: None
@@ -0,0 +1,278 @@
+"""
+Rate-limit-aware scheduling of LLM requests.
+
+Every LLM call made through ``invoke_llm`` passes through one scheduler per
+event loop, which combines:
+
+* token buckets for requests per minute and tokens per minute
+* AIMD adaptive concurrency: the in-flight limit is halved on 429 responses
+  and grows by about one per round of successful calls
+* retries with exponential backoff and full jitter, honoring Retry-After
+* a deadline per call that covers all attempts and backoff waits
+"""
+
+import os
+import time
+import random
+import asyncio
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from src.utils import instrumentation
+
+T = TypeVar("T")
+
+# In-flight LLM calls per event loop when neither the caller nor LLM_MAX_INFLIGHT sets a limit
+DEFAULT_MAX_INFLIGHT = 64
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at ``rate_per_minute``.
+    
+    Waiters are served in arrival order. Requests for more than the capacity
+    are clamped to the capacity so they can still proceed.
+    """
+    
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    async def acquire(self, amount: float = 1.0):
+        """Wait until ``amount`` tokens are available and take them"""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+    
+    def adjust(self, amount: float):
+        """Charge (or refund, if negative) tokens after the fact, e.g. once usage is known"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class AdaptiveConcurrency:
+    """
+    Concurrency limit with additive increase and multiplicative decrease.
+    
+    Each successful call raises the limit by ``1 / limit`` (about one per round
+    trip of a full window); a rate-limited call multiplies it by ``decrease``,
+    at most once per ``cooldown`` seconds so one burst of 429s counts once.
+    """
+    
+    def __init__(self, maximum: int, minimum: int = 1, decrease: float = 0.5, cooldown: float = 1.0):
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.limit = float(self.maximum)
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+    
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < max(self.minimum, int(self.limit)))
+            self.in_flight += 1
+    
+    async def release(self, rate_limited: bool = False, succeeded: bool = False):
+        async with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if rate_limited and now - self._last_decrease >= self.cooldown:
+                self.limit = max(float(self.minimum), self.limit * self.decrease)
+                self._last_decrease = now
+            elif succeeded:
+                self.limit = min(float(self.maximum), self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+
+def error_status(error: BaseException) -> Optional[int]:
+    """HTTP status code of an API error, if it has one"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds requested by the Retry-After header of an API error, if any"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return max(0.0, float(headers.get("retry-after")))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Rate limits, server errors, timeouts and connection failures are retried"""
+    # Only reached after a call failed, so the openai SDK is already loaded
+    import openai
+    
+    if isinstance(error, (openai.APIConnectionError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = error_status(error)
+    return status is not None and (status in (408, 409, 429) or status >= 500)
+
+
+class LLMScheduler:
+    """
+    Admits, times out and retries LLM calls for one event loop.
+    
+    Args:
+        max_concurrency: Upper bound of the adaptive in-flight limit
+        requests_per_minute: Request rate limit, or 0 for none
+        tokens_per_minute: Token rate limit (prompt plus completion), or 0 for none
+        max_retries: Retries after the first attempt
+        backoff_base: First backoff ceiling in seconds, doubled per attempt
+        backoff_max: Largest backoff ceiling in seconds
+        timeout: Default deadline in seconds for one call including retries
+    """
+    
+    def __init__(
+        self,
+        max_concurrency: int = 64,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        timeout: float = 300.0
+    ):
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+    
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        """Delay before retry number ``attempt`` (0-based): Retry-After, else full jitter"""
+        requested = retry_after(error)
+        if requested is not None:
+            return requested
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+    
+    def record_usage(self, estimated: int, actual: Optional[int]):
+        """Correct the token bucket once the actual token usage of a call is known"""
+        if self.tokens is not None and actual is not None:
+            self.tokens.adjust(actual - estimated)
+    
+    async def _admit(self, tokens: int):
+        if self.requests is not None:
+            await self.requests.acquire(1)
+        if self.tokens is not None:
+            await self.tokens.acquire(tokens)
+        await self.concurrency.acquire()
+    
+    async def run(
+        self,
+        call: Callable[[], Awaitable[T]],
+        tokens: int = 0,
+        timeout: Optional[float] = None,
+        name: str = "",
+        retryable: Callable[[BaseException], bool] = is_retryable
+    ) -> T:
+        """
+        Run an LLM call under the rate limits, retrying transient failures.
+        
+        Args:
+            call: Function starting one attempt of the call
+            tokens: Estimated tokens of the call, charged to the token bucket
+            timeout: Deadline in seconds for all attempts, defaults to the scheduler's;
+                it starts when the first attempt is admitted
+            name: Name for instrumentation records (the model)
+            retryable: Predicate deciding whether an error may be retried
+        
+        Returns:
+            The result of the call
+        
+        Raises:
+            TimeoutError: If the deadline passes before an attempt succeeds
+        """
+        loop = asyncio.get_running_loop()
+        timeout = timeout or self.timeout
+        deadline = None
+        attempt = 0
+        
+        while True:
+            if deadline is None:
+                await self._admit(tokens)
+                deadline = loop.time() + timeout
+            else:
+                try:
+                    await asyncio.wait_for(self._admit(tokens), max(0.0, deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    raise TimeoutError(f"LLM call exceeded its {timeout:g}s deadline") from None
+            
+            try:
+                result = await asyncio.wait_for(call(), max(0.0, deadline - loop.time()))
+            except BaseException as error:
+                rate_limited = error_status(error) == 429
+                await self.concurrency.release(rate_limited=rate_limited)
+                
+                if isinstance(error, asyncio.TimeoutError) and loop.time() >= deadline:
+                    raise TimeoutError(f"LLM call exceeded its {timeout:g}s deadline") from error
+                if not isinstance(error, Exception) or attempt >= self.max_retries or not retryable(error):
+                    raise
+                
+                delay = self.backoff(attempt, error)
+                if loop.time() + delay >= deadline:
+                    raise
+                instrumentation.emit(
+                    "llm_retry", name, time.time(), delay,
+                    attempt=attempt + 1, status=error_status(error), error=type(error).__name__
+                )
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            
+            await self.concurrency.release(succeeded=True)
+            return result
+
+
+def max_inflight_from_env() -> int:
+    """
+    Upper bound of in-flight LLM calls configured by the environment.
+    
+    Returns:
+        LLM_MAX_INFLIGHT, or DEFAULT_MAX_INFLIGHT when it is 0 or unset
+    """
+    return int(os.getenv("LLM_MAX_INFLIGHT", "0")) or DEFAULT_MAX_INFLIGHT
+
+
+def scheduler_from_env(max_concurrency: Optional[int] = None) -> LLMScheduler:
+    """
+    Create a scheduler configured by the environment.
+    
+    Args:
+        max_concurrency: Upper bound of in-flight calls; ``max_inflight_from_env()``
+            when None
+    
+    Returns:
+        A new LLMScheduler
+    """
+    if not max_concurrency:
+        max_concurrency = max_inflight_from_env()
+    return LLMScheduler(
+        max_concurrency=max_concurrency,
+        requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0")),
+        tokens_per_minute=float(os.getenv("LLM_TOKENS_PER_MINUTE", "0")),
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "4")),
+        backoff_base=float(os.getenv("LLM_BACKOFF_BASE", "0.5")),
+        backoff_max=float(os.getenv("LLM_BACKOFF_MAX", "30")),
+        timeout=float(os.getenv("LLM_CALL_TIMEOUT", "300"))
+    )
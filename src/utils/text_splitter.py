@@ -1,11 +1,267 @@
 """
 Text splitting utility for dividing large documents into chunks.
+
+Chunks are measured in tokens. The tokenizer backend is selected with the
+SPLITTER_BACKEND env var and cached for the lifetime of the process:
+
+* ``hf`` (default): a Hugging Face fast tokenizer loaded with the lightweight
+  ``tokenizers`` package, no torch required.
+* ``tiktoken``: an OpenAI BPE encoding, close to what most hosted LLMs count.
+* ``sentence-transformers``: the original SentenceTransformersTokenTextSplitter,
+  which loads the full embedding model. Opt-in only.
+
+SPLITTER_TOKENIZER overrides the tokenizer name of the selected backend.
+
+Chunks are returned as a ``ChunkList`` of character offsets into the document
+texts rather than as copied strings. ``StreamSplitter`` splits a text that is
+read piece by piece, such as a file too large to load at once.
 """
 
-from typing import List, Dict, Any
-from langchain_text_splitters import SentenceTransformersTokenTextSplitter
+import os
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple
 from langchain_core.documents import Document
 
+from src.utils.chunks import ChunkList
+
+
+DEFAULT_TOKENIZERS = {
+    "hf": "sentence-transformers/all-mpnet-base-v2",
+    "tiktoken": "cl100k_base",
+    "sentence-transformers": "sentence-transformers/all-mpnet-base-v2",
+}
+
+# Chunking used when neither the caller nor the planner chooses a size
+DEFAULT_CHUNK_SIZE = 150
+DEFAULT_CHUNK_OVERLAP = 15
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of LLM tokens in a piece of text.
+    
+    Uses the common approximation of four characters per token, which is
+    cheap enough to call on every summary without loading a tokenizer.
+    
+    Args:
+        text: Text to measure
+    
+    Returns:
+        Estimated token count
+    """
+    return len(text) // 4 + 1
+
+
+def get_splitter_config() -> Tuple[str, str]:
+    """
+    Read the splitter backend and tokenizer name from the environment.
+    
+    Returns:
+        Tuple of (backend, tokenizer name)
+    """
+    backend = os.getenv("SPLITTER_BACKEND", "hf")
+    if backend not in DEFAULT_TOKENIZERS:
+        raise ValueError(f"Unsupported splitter backend: {backend}")
+    return backend, os.getenv("SPLITTER_TOKENIZER") or DEFAULT_TOKENIZERS[backend]
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(backend: str, name: str) -> Any:
+    """
+    Load a tokenizer once per process.
+    
+    Args:
+        backend: 'hf' or 'tiktoken'
+        name: Hugging Face model id or tiktoken encoding name
+    
+    Returns:
+        The loaded tokenizer
+    """
+    if backend == "hf":
+        from tokenizers import Tokenizer
+        tokenizer = Tokenizer.from_pretrained(name)
+        # Whole documents are encoded at once, so disable model-length truncation
+        tokenizer.no_truncation()
+        tokenizer.no_padding()
+        return tokenizer
+    if backend == "tiktoken":
+        import tiktoken
+        return tiktoken.get_encoding(name)
+    raise ValueError(f"Unsupported tokenizer backend: {backend}")
+
+
+@lru_cache(maxsize=8)
+def get_sentence_transformers_splitter(name: str, chunk_size: int, chunk_overlap: int) -> Any:
+    """Build the heavy sentence-transformers splitter once per configuration"""
+    from langchain_text_splitters import SentenceTransformersTokenTextSplitter
+    return SentenceTransformersTokenTextSplitter(
+        model_name=name,
+        tokens_per_chunk=chunk_size,
+        chunk_overlap=chunk_overlap,
+    )
+
+
+def token_offsets(text: str, backend: str, name: str) -> List[Tuple[int, int]]:
+    """
+    Tokenize text once and return the character span of every token.
+    
+    Args:
+        text: Text to tokenize
+        backend: 'hf' or 'tiktoken'
+        name: Tokenizer name for the backend
+    
+    Returns:
+        List of (start, end) character offsets into ``text``
+    """
+    tokenizer = get_tokenizer(backend, name)
+    
+    if backend == "hf":
+        encoding = tokenizer.encode(text, add_special_tokens=False)
+        return [(start, end) for start, end in encoding.offsets if end > start]
+    
+    # tiktoken only reports start offsets; a token ends where the next one starts
+    _, starts = tokenizer.decode_with_offsets(tokenizer.encode(text, disallowed_special=()))
+    ends = starts[1:] + [len(text)]
+    return [(start, end) for start, end in zip(starts, ends) if end > start]
+
+
+def split_spans(offsets: List[Tuple[int, int]], chunk_size: int, chunk_overlap: int) -> List[Tuple[int, int]]:
+    """
+    Group token offsets into overlapping windows of character spans.
+    
+    Args:
+        offsets: Token (start, end) character offsets in document order
+        chunk_size: Number of tokens per chunk
+        chunk_overlap: Number of tokens shared by consecutive chunks
+    
+    Returns:
+        List of (start, end) character spans, one per chunk
+    """
+    if chunk_overlap >= chunk_size:
+        raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})")
+    
+    spans = []
+    step = chunk_size - chunk_overlap
+    
+    for index in range(0, len(offsets), step):
+        window_end = min(index + chunk_size, len(offsets))
+        spans.append((offsets[index][0], offsets[window_end - 1][1]))
+        if window_end == len(offsets):
+            break
+    
+    return spans
+
+
+def split_documents(documents: List[Document], chunk_size: int, chunk_overlap: int) -> ChunkList:
+    """
+    Split documents into token-sized chunks with the configured backend.
+    
+    Each document's text is kept once as a shared buffer and chunks are
+    recorded as (document, start, end) offsets into it.
+    
+    Args:
+        documents: Documents to split
+        chunk_size: Number of tokens per chunk
+        chunk_overlap: Number of tokens shared by consecutive chunks
+    
+    Returns:
+        ChunkList whose chunks carry their source document's metadata
+    """
+    backend, name = get_splitter_config()
+    chunks = ChunkList()
+    
+    if backend == "sentence-transformers":
+        # This splitter re-joins decoded tokens, so its chunks are not spans of the source text
+        splitter = get_sentence_transformers_splitter(name, chunk_size, chunk_overlap)
+        for chunk in splitter.split_documents(documents):
+            doc_index = chunks.add_document(chunk.page_content, chunk.metadata)
+            chunks.append(doc_index, 0, len(chunk.page_content))
+        return chunks
+    
+    for document in documents:
+        text = document.page_content
+        doc_index = chunks.add_document(text, dict(document.metadata))
+        for start, end in split_spans(token_offsets(text, backend, name), chunk_size, chunk_overlap):
+            chunks.append(doc_index, start, end)
+    
+    return chunks
+
+
+class StreamSplitter:
+    """
+    Splits a text that arrives in consecutive pieces (e.g. windows of a large
+    file) into the chunks ``split_documents`` produces for the whole text.
+    
+    Between pieces only the unfinished tail is kept: the tokens from the start
+    of the next chunk on. The last word of a piece is re-tokenized with the
+    next piece, since it may continue there. Memory is therefore bounded by the
+    piece size, not the text size. The sentence-transformers backend reports
+    no token offsets, so with it every piece is split on its own.
+    
+    Args:
+        chunk_size: Number of tokens per chunk
+        chunk_overlap: Number of tokens shared by consecutive chunks
+    """
+    
+    def __init__(self, chunk_size: int, chunk_overlap: int):
+        if chunk_overlap >= chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.backend, self.name = get_splitter_config()
+        self.tail = ""
+    
+    def feed(self, text: str) -> List[str]:
+        """
+        Add the next piece of the text.
+        
+        Args:
+            text: Text continuing the previous pieces
+        
+        Returns:
+            Texts of the chunks completed by this piece
+        """
+        if self.backend == "sentence-transformers":
+            return split_documents([Document(page_content=text)], self.chunk_size, self.chunk_overlap).texts()
+        
+        text = self.tail + text
+        offsets = token_offsets(text, self.backend, self.name)
+        
+        # Tokens of the trailing word are not final until the text after it is known
+        settled = len(text)
+        while settled and not text[settled - 1].isspace():
+            settled -= 1
+        if not settled and offsets:
+            # No whitespace at all: hold back only the last token
+            settled = offsets[-1][0]
+        complete = len(offsets)
+        while complete and offsets[complete - 1][1] > settled:
+            complete -= 1
+        
+        chunks = []
+        index = 0
+        step = self.chunk_size - self.chunk_overlap
+        # A window reaching the last complete token may still be the final, shorter one
+        while index + self.chunk_size < complete:
+            chunks.append(text[offsets[index][0]:offsets[index + self.chunk_size - 1][1]])
+            index += step
+        
+        self.tail = text[offsets[index][0]:] if index < len(offsets) else ""
+        return chunks
+    
+    def finish(self) -> List[str]:
+        """
+        End the text.
+        
+        Returns:
+            Texts of the remaining chunks
+        """
+        text, self.tail = self.tail, ""
+        if not text.strip():
+            return []
+        spans = split_spans(token_offsets(text, self.backend, self.name), self.chunk_size, self.chunk_overlap)
+        return [text[start:end] for start, end in spans]
+
 
 def split_text(state: Any) -> Dict[str, Any]:
     """
@@ -13,23 +269,18 @@ def split_text(state: Any) -> Dict[str, Any]:
     
     Args:
         state: The current state containing documents, chunk_size, and chunk_overlap
-        
+    
     Returns:
-        Updated state with text chunks
+        Updated state with text chunks; the documents are released since the
+        chunks now hold their text
     """
     # Access attributes using dot notation for Pydantic models
     documents = state.documents
-    chunk_size = state.chunk_size
+    chunk_size = state.chunk_size or DEFAULT_CHUNK_SIZE
     chunk_overlap = state.chunk_overlap
     
-    # Initialize sentence-based text splitter
-    text_splitter = SentenceTransformersTokenTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-    )
-    
-    # Split documents into chunks
-    chunks = text_splitter.split_documents(documents)
+    # Split documents into chunks with the cached tokenizer backend
+    chunks = split_documents(documents, chunk_size, chunk_overlap)
     
     # Return updated state
-    return {"chunks": chunks}
\ No newline at end of file
+    return {"chunks": chunks, "documents": []}
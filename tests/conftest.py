@@ -0,0 +1,69 @@
+"""
+Shared pytest setup: make the ``src`` package importable from the repository root,
+and provide the local stand-in LLM server and isolated on-disk stores.
+"""
+
+import os
+import re
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope="session")
+def llm_server():
+    """OpenAI-compatible stand-in server shared by the tests, answering within milliseconds"""
+    from benchmarks.fake_llm_server import FakeLLMServer
+    
+    with FakeLLMServer(latency_ms=5, jitter=0, tokens_per_second=0, seed=0) as server:
+        yield server
+
+
+@pytest.fixture
+def fake_llm(llm_server, monkeypatch):
+    """Point the LLM clients at the stand-in server, with fresh counters, no injected errors and no response cache"""
+    monkeypatch.setenv("OPENROUTER_BASE_URL", llm_server.base_url)
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test")
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "false")
+    llm_server.error_rate = llm_server.rate_limit_rate = llm_server.malformed_rate = 0.0
+    llm_server.reset_counters()
+    return llm_server
+
+
+@pytest.fixture
+def stores(tmp_path, monkeypatch):
+    """Give the process-wide SQLite stores fresh files under ``tmp_path``"""
+    import src.utils.checkpoint as checkpoint
+    import src.utils.chunk_store as chunk_store
+    import src.utils.http_cache as http_cache
+    import src.utils.llm_cache as llm_cache
+    
+    singletons = [
+        (checkpoint, "_store", "CHECKPOINT_PATH"),
+        (chunk_store, "_store", "CHUNK_STORE_PATH"),
+        (llm_cache, "_cache", "LLM_CACHE_PATH"),
+        (http_cache, "_cache", "URL_CACHE_PATH"),
+    ]
+    for module, name, variable in singletons:
+        monkeypatch.setenv(variable, str(tmp_path / f"{variable.lower()}.sqlite"))
+        monkeypatch.setattr(module, name, None)
+    yield tmp_path
+    
+    for module, name, _ in singletons:
+        store = getattr(module, name)
+        if store is not None:
+            store.close()
+
+
+@pytest.fixture
+def word_tokens(monkeypatch):
+    """Count whitespace-separated words as tokens, so splitting needs no tokenizer model"""
+    import src.utils.text_splitter as text_splitter
+    
+    monkeypatch.delenv("SPLITTER_BACKEND", raising=False)
+    monkeypatch.setattr(
+        text_splitter, "token_offsets", lambda text, backend, name: [match.span() for match in re.finditer(r"\S+", text)]
+    )
@@ -0,0 +1,111 @@
+"""
+Tests for batch mode: input discovery, skipping finished inputs on a rerun and
+resuming checkpointed inputs.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+import src.utils.llm as llm
+from src.batch import completed_ids, inputs_from_glob, inputs_from_manifest, run_batch
+
+TEXT = " ".join(f"Sentence {index} explains part {index} of the topic." for index in range(40))
+DEFAULTS = {"chunk_size": 60, "chunk_overlap": 5, "max_summary_length": 3, "max_concurrency": 4}
+
+
+@pytest.fixture(autouse=True)
+def default_llm_concurrency(monkeypatch):
+    """``run_batch`` sets the process-wide limit; restore it after each test"""
+    monkeypatch.setattr(llm, "_llm_concurrency", None)
+
+
+def read_results(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_inputs_from_glob_keeps_supported_files(tmp_path):
+    for name in ["b.md", "a.txt", "c.pdf", "notes.docx"]:
+        (tmp_path / name).write_text("x")
+    (tmp_path / "dir.txt").mkdir()
+    
+    inputs = inputs_from_glob(str(tmp_path))
+    assert [(entry["id"].rsplit("/", 1)[1], entry["input_type"]) for entry in inputs] == [
+        ("a.txt", "textfile"), ("b.md", "textfile"), ("c.pdf", "pdf"),
+    ]
+
+
+def test_inputs_from_manifest(tmp_path):
+    manifest = tmp_path / "inputs.jsonl"
+    manifest.write_text(
+        '{"id": "one", "input_type": "text", "content": "hello", "chunk_size": 10}\n'
+        "\n"
+        '{"input_type": "url", "content": "https://example.com"}\n'
+    )
+    inputs = inputs_from_manifest(str(manifest))
+    assert [entry["id"] for entry in inputs] == ["one", "https://example.com"]
+    assert inputs[0]["chunk_size"] == 10
+    
+    manifest.write_text('{"id": "broken", "input_type": "text"}\n')
+    with pytest.raises(ValueError, match="line 1"):
+        inputs_from_manifest(str(manifest))
+
+
+def test_completed_ids_follow_the_last_line_per_id(tmp_path):
+    output = tmp_path / "out.jsonl"
+    lines = [
+        {"id": "a", "status": "ok", "failed_chunks": []},
+        {"id": "b", "status": "error"},
+        {"id": "b", "status": "ok", "failed_chunks": []},
+        {"id": "c", "status": "ok", "failed_chunks": []},
+        {"id": "c", "status": "error"},
+        {"id": "d", "status": "ok", "failed_chunks": [2]},
+    ]
+    output.write_text("".join(json.dumps(line) + "\n" for line in lines) + '{"id": "e", "sta')
+    
+    assert completed_ids(str(output)) == {"a", "b", "d"}
+    assert completed_ids(str(output), retry_failed_chunks=True) == {"a", "b"}
+    assert completed_ids(str(tmp_path / "missing.jsonl")) == set()
+
+
+def test_rerun_skips_inputs_that_succeeded(fake_llm, stores, word_tokens):
+    output = str(stores / "out.jsonl")
+    inputs = [
+        {"id": "first", "input_type": "text", "content": TEXT},
+        {"id": "second", "input_type": "text", "content": TEXT.replace("topic", "subject")},
+        {"id": "missing", "input_type": "textfile", "content": str(stores / "missing.txt")},
+    ]
+    
+    counts = asyncio.run(run_batch(inputs, output, DEFAULTS, doc_concurrency=2))
+    assert counts == {"ok": 2, "error": 1, "skipped": 0}
+    results = {result["id"]: result for result in read_results(output)}
+    assert results["first"]["summary"] and results["second"]["summary"]
+    assert "missing.txt" in results["missing"]["error"]
+    
+    fake_llm.reset_counters()
+    counts = asyncio.run(run_batch(inputs, output, DEFAULTS))
+    assert counts == {"ok": 0, "error": 1, "skipped": 2}
+    assert fake_llm.counters["requests"] == 0
+    assert len(read_results(output)) == 4
+
+
+def test_checkpoint_rerun_resumes_with_the_saved_options(fake_llm, stores, word_tokens, monkeypatch):
+    monkeypatch.setenv("LLM_MAX_RETRIES", "0")
+    output = str(stores / "out.jsonl")
+    entry = {"id": "doc", "input_type": "text", "content": TEXT}
+    
+    fake_llm.error_rate = 1.0
+    counts = asyncio.run(run_batch([entry], output, DEFAULTS, checkpoint=True))
+    assert counts["ok"] == 0
+    
+    fake_llm.error_rate = 0.0
+    counts = asyncio.run(run_batch([entry], output, dict(DEFAULTS, chunk_size=80), checkpoint=True))
+    assert counts == {"ok": 1, "error": 0, "skipped": 0}
+    
+    results = read_results(output)
+    assert [result["id"] for result in results] == ["doc", "doc"]
+    assert results[-1]["status"] == "ok"
+    assert results[-1]["ignored_options"] == ["chunk_size"]
+    assert completed_ids(output, retry_failed_chunks=True) == {"doc"}
@@ -0,0 +1,107 @@
+"""
+Tests for checkpointed runs: the run store, resuming after a failed combine
+and retrying failed chunks.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+import src.nodes.combine_node as combine_node
+import src.nodes.summarize_node as summarize_node
+from src.pipeline import run_pipeline
+from src.utils.checkpoint import RunStore, get_run_store
+
+TEXT = " ".join(f"s{section}w{index}" for section in range(6) for index in range(20))
+OPTIONS = {"chunk_size": 20, "chunk_overlap": 0, "strategy": "map_reduce", "combine_mode": "single", "run_id": "run"}
+
+
+@pytest.fixture
+def failures(monkeypatch):
+    """Make map calls for chunks containing a marker, or every combine call, fail"""
+    failing = {"markers": set(), "combine": False}
+    invoke_map, invoke_combine = summarize_node.invoke_llm, combine_node.invoke_llm
+    
+    async def map_llm(llm, prompt, **kwargs):
+        if any(marker in prompt for marker in failing["markers"]):
+            raise RuntimeError("map failed")
+        return await invoke_map(llm, prompt, **kwargs)
+    
+    async def combine_llm(llm, prompt, **kwargs):
+        if failing["combine"]:
+            raise RuntimeError("combine failed")
+        return await invoke_combine(llm, prompt, **kwargs)
+    
+    monkeypatch.setattr(summarize_node, "invoke_llm", map_llm)
+    monkeypatch.setattr(combine_node, "invoke_llm", combine_llm)
+    return failing
+
+
+def test_start_keeps_the_first_inputs(tmp_path):
+    store = RunStore(str(tmp_path / "runs.sqlite"))
+    assert store.start("run", {"content": "first"}) == ({"content": "first"}, False)
+    assert store.start("run", {"content": "second"}) == ({"content": "first"}, True)
+    store.add_summary("run", "fingerprint", "summary")
+    
+    assert store.get_inputs("run") == {"content": "first"}
+    assert store.get_summaries("run") == {"fingerprint": "summary"}
+    store.delete("run")
+    assert store.get_inputs("run") is None and store.stats() == {"runs": 0, "summaries": 0}
+    store.close()
+
+
+def test_abandoned_runs_are_pruned_and_their_pages_freed(tmp_path):
+    path = str(tmp_path / "runs.sqlite")
+    store = RunStore(path, max_age=0.1)
+    store.start("old", {})
+    for index in range(500):
+        store.add_summary("old", str(index), "summary " * 50)
+    time.sleep(0.2)
+    store.start("new", {})
+    
+    assert store.prune() == 1
+    assert store.stats() == {"runs": 1, "summaries": 0}
+    assert store._conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    store.close()
+    
+    # Opening the store prunes as well
+    time.sleep(0.2)
+    reopened = RunStore(path, max_age=0.1)
+    assert reopened.stats()["runs"] == 0
+    reopened.close()
+
+
+def test_resume_after_a_failed_combine_reuses_the_chunk_summaries(fake_llm, stores, word_tokens, failures):
+    failures["combine"] = True
+    with pytest.raises(Exception, match="combine failed"):
+        asyncio.run(run_pipeline("text", TEXT, **OPTIONS))
+    assert fake_llm.counters["requests"] == 6
+    assert get_run_store().stats() == {"runs": 1, "summaries": 6}
+    
+    # The run resumes from its recorded input; the arguments given now are ignored
+    failures["combine"] = False
+    fake_llm.reset_counters()
+    final_state = asyncio.run(run_pipeline("text", "ignored", chunk_size=999, run_id="run"))
+    
+    assert final_state["resumed_chunks"] == 6 and len(final_state["summaries"]) == 6
+    assert fake_llm.counters["requests"] == 1
+    # A finished run is deleted
+    assert get_run_store().stats() == {"runs": 0, "summaries": 0}
+
+
+def test_resume_retries_only_the_failed_chunks(fake_llm, stores, word_tokens, failures):
+    failures["markers"] = {"s2w5", "s4w5"}
+    final_state = asyncio.run(run_pipeline("text", TEXT, **OPTIONS))
+    assert [failed["index"] for failed in final_state["failed_chunks"]] == [2, 4]
+    # The run is kept so the failed chunks can be retried
+    assert get_run_store().stats()["runs"] == 1
+    
+    failures["markers"] = set()
+    fake_llm.reset_counters()
+    final_state = asyncio.run(run_pipeline("text", TEXT, **OPTIONS))
+    
+    assert final_state["failed_chunks"] == [] and final_state["resumed_chunks"] == 4
+    # The two failed chunks and the combine call
+    assert fake_llm.counters["requests"] == 3
+    assert get_run_store().stats()["runs"] == 0
@@ -0,0 +1,82 @@
+"""
+Tests for incremental re-summarization: stored chunk summaries are reused for
+unchanged chunks, and an unchanged document skips the combiner.
+"""
+
+import asyncio
+
+from src.pipeline import run_pipeline
+from src.utils.chunk_store import ChunkStore, IncrementalSummaries, get_chunk_store
+
+SECTIONS = [" ".join(f"s{section}w{index}" for index in range(20)) for section in range(6)]
+OPTIONS = {"chunk_size": 20, "chunk_overlap": 0, "strategy": "map_reduce", "combine_mode": "single", "doc_id": "doc"}
+
+
+def summarize(text):
+    return asyncio.run(run_pipeline("text", text, **OPTIONS))
+
+
+def test_latest_run_replaces_the_stored_summaries(tmp_path):
+    store = ChunkStore(str(tmp_path / "chunks.sqlite"))
+    store.replace_summaries("doc", {"a": "first", "b": "second"})
+    store.replace_summaries("doc", {"b": "second", "c": "third"})
+    store.replace_summaries("other", {"a": "other"})
+    store.set_final_summary("doc", "fingerprint", "final")
+    
+    assert store.get_summaries("doc") == {"b": "second", "c": "third"}
+    assert store.get_final_summary("doc") == ("fingerprint", "final")
+    assert store.get_final_summary("other") is None
+    store.close()
+
+
+def test_unchanged_summaries_reuse_the_stored_final_summary(stores):
+    first = IncrementalSummaries("doc", "model")
+    assert first.lookup("chunk") is None
+    asyncio.run(first.record("chunk", "summary"))
+    update = asyncio.run(first.finish(["summary"], max_summary_length=3))
+    assert update["recomputed_chunks"] == 1 and "final_summary" not in update
+    get_chunk_store().set_final_summary("doc", update["summaries_fingerprint"], "final")
+    
+    second = IncrementalSummaries("doc", "model")
+    assert second.lookup("chunk") == "summary"
+    assert IncrementalSummaries("doc", "other model").lookup("chunk") is None
+    update = asyncio.run(second.finish(["summary"], max_summary_length=3))
+    assert update["reused_chunks"] == 1
+    assert update["final_summary"] == "final" and update["combine_skipped"]
+    
+    # Other combine settings give another final summary
+    third = IncrementalSummaries("doc", "model")
+    third.lookup("chunk")
+    assert "final_summary" not in asyncio.run(third.finish(["summary"], max_summary_length=5))
+
+
+def test_without_a_doc_id_nothing_is_stored(stores):
+    incremental = IncrementalSummaries(None, "model")
+    asyncio.run(incremental.record("chunk", "summary"))
+    assert asyncio.run(incremental.finish(["summary"])) == {}
+    assert incremental.lookup("chunk") is None
+
+
+def test_rerun_sends_only_changed_chunks(fake_llm, stores, word_tokens):
+    text = " ".join(SECTIONS)
+    first = summarize(text)
+    assert first["recomputed_chunks"] == 6
+    assert fake_llm.counters["requests"] == 7
+    
+    # Unchanged: every chunk is reused and the stored final summary returned
+    fake_llm.reset_counters()
+    second = summarize(text)
+    assert fake_llm.counters["requests"] == 0
+    assert second["reused_chunks"] == 6 and second["combine_skipped"]
+    assert second["final_summary"] == first["final_summary"]
+    
+    # One section edited: one chunk and the combiner are sent again
+    fake_llm.reset_counters()
+    edited = " ".join(SECTIONS[:3] + [SECTIONS[3].replace("s3w5", "changed")] + SECTIONS[4:])
+    third = summarize(edited)
+    assert fake_llm.counters["requests"] == 2
+    assert (third["reused_chunks"], third["recomputed_chunks"]) == (5, 1)
+    assert not third["combine_skipped"]
+    
+    # Only the latest run's chunks are kept
+    assert len(get_chunk_store().get_summaries("doc")) == 6
@@ -0,0 +1,92 @@
+"""
+Tests for batching summaries and carrying deduplication weights into combine prompts.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import src.nodes.combine_node as combine_node
+from src.nodes.combine_node import batch_summaries, format_summaries
+from src.utils.text_splitter import estimate_tokens
+
+
+def summary(index: int) -> str:
+    """A distinct summary of about 11 estimated tokens"""
+    return f"Summary number {index:02d} of the document section."
+
+
+def combine(monkeypatch, summaries, weights, reduce_levels=0):
+    """Run one combine level with a stub LLM and return the update and the prompts sent"""
+    prompts = []
+    
+    async def invoke_llm(llm, prompt, on_token=None, **kwargs):
+        prompts.append(prompt)
+        return f"combined {len(prompts)}"
+    
+    monkeypatch.setattr(combine_node, "get_llm", lambda **kwargs: SimpleNamespace(model_name="stub"))
+    monkeypatch.setattr(combine_node, "invoke_llm", invoke_llm)
+    # Two summaries per batch
+    monkeypatch.setenv("REDUCE_TOKEN_BUDGET", str(2 * estimate_tokens(summary(0))))
+    state = SimpleNamespace(
+        summaries=summaries,
+        reduce_summaries=summaries,
+        summary_weights=weights,
+        reduce_levels=reduce_levels,
+        reduce_fan_in=[],
+        max_summary_length=3,
+        max_concurrency=1,
+        combine_mode="tree",
+        reduce_model="stub",
+        run_id=None,
+        doc_id=None,
+        stream_events=False,
+    )
+    return asyncio.run(combine_node.combine_summaries(state)), prompts
+
+
+def test_batches_fit_the_budget_and_keep_order():
+    summaries = [summary(index) for index in range(7)]
+    budget = 3 * estimate_tokens(summaries[0])
+    batches = batch_summaries(summaries, budget)
+    
+    assert [item for batch in batches for item in batch] == summaries
+    assert all(sum(estimate_tokens(item) for item in batch) <= budget for batch in batches)
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+
+
+def test_batches_hold_at_least_two_summaries():
+    # Oversized summaries are still paired, so every level shrinks
+    summaries = ["x" * 400 for _ in range(5)]
+    assert [len(batch) for batch in batch_summaries(summaries, 10)] == [2, 2, 1]
+
+
+def test_format_marks_only_weights_above_one():
+    assert format_summaries(["a", "b"], [1, 3]) == "- a\n\n- [x3] b"
+
+
+def test_weights_follow_their_summaries_across_batches(monkeypatch):
+    summaries = [summary(index) for index in range(5)]
+    update, prompts = combine(monkeypatch, summaries, [1, 3, 1, 2, 1])
+    
+    assert update["reduce_fan_in"] == [[2, 2, 1]]
+    assert len(prompts) == 2
+    assert f"- {summaries[0]}" in prompts[0] and f"- [x3] {summaries[1]}" in prompts[0]
+    assert f"- {summaries[2]}" in prompts[1] and f"- [x2] {summaries[3]}" in prompts[1]
+    assert all("near-identical sections" in prompt for prompt in prompts)
+    # The single-summary batch is carried over unchanged
+    assert update["reduce_summaries"][2] == summaries[4]
+
+
+def test_weights_are_ignored_above_the_first_level(monkeypatch):
+    summaries = [summary(index) for index in range(4)]
+    _, prompts = combine(monkeypatch, summaries, [3, 1, 1, 2], reduce_levels=1)
+    
+    assert not any("[x" in prompt for prompt in prompts)
+    assert not any("near-identical sections" in prompt for prompt in prompts)
+
+
+def test_mismatched_weights_are_ignored(monkeypatch):
+    summaries = [summary(index) for index in range(4)]
+    _, prompts = combine(monkeypatch, summaries, [3, 2])
+    
+    assert not any("[x" in prompt for prompt in prompts)
@@ -0,0 +1,34 @@
+"""
+Tests for reading text files in windows without holding the whole file.
+"""
+
+from src.loaders.content_loader import iter_documents, iter_text_windows
+
+
+def test_windows_never_split_a_character(tmp_path):
+    text = "naïve café — 数据 " * 50
+    path = tmp_path / "text.txt"
+    path.write_text(text, encoding="utf-8")
+    
+    for window_bytes in [1, 2, 3, 7, 4096]:
+        windows = list(iter_text_windows(str(path), window_bytes))
+        assert "".join(windows) == text
+        assert all(windows)
+    assert len(list(iter_text_windows(str(path), 100))) > 1
+
+
+def test_undecodable_bytes_are_replaced(tmp_path):
+    path = tmp_path / "text.txt"
+    path.write_bytes(b"ok \xff end")
+    assert "".join(iter_text_windows(str(path), 2)) == "ok � end"
+
+
+def test_text_files_are_yielded_as_numbered_windows(tmp_path, monkeypatch):
+    monkeypatch.setenv("TEXT_STREAM_WINDOW_BYTES", "10")
+    path = tmp_path / "text.txt"
+    path.write_text("0123456789abcdefghijXYZ")
+    
+    documents = list(iter_documents("textfile", str(path)))
+    assert [document.page_content for document in documents] == ["0123456789", "abcdefghij", "XYZ"]
+    assert [document.metadata["window"] for document in documents] == [0, 1, 2]
+    assert documents[0].metadata["source"] == str(path)
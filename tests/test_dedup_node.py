@@ -0,0 +1,62 @@
+"""
+Tests for MinHash signatures and clustering of near-duplicate chunks.
+"""
+
+import numpy as np
+
+from src.nodes.dedup_node import cluster_signatures, dedup_chunks, minhash_signatures
+from src.pipeline import State
+from src.utils.chunks import ChunkList
+
+
+def test_identical_rows_join_the_first_cluster():
+    signatures = np.array([[1, 2, 3, 4], [5, 6, 7, 8], [1, 2, 3, 4], [1, 2, 3, 4]], dtype=np.uint64)
+    assert cluster_signatures(signatures, threshold=0.9, bands=2) == [0, 1, 0, 0]
+
+
+def test_threshold_decides_candidates_sharing_a_band():
+    # Rows 0 and 1 share the first band and agree on half of their values
+    signatures = np.array([[1, 2, 3, 4], [1, 2, 9, 9]], dtype=np.uint64)
+    assert cluster_signatures(signatures, threshold=0.5, bands=2) == [0, 0]
+    assert cluster_signatures(signatures, threshold=0.75, bands=2) == [0, 1]
+
+
+def test_rows_without_a_shared_band_are_not_compared():
+    signatures = np.array([[1, 2, 3, 4], [1, 9, 3, 9]], dtype=np.uint64)
+    assert cluster_signatures(signatures, threshold=0.0, bands=2) == [0, 1]
+
+
+def test_clusters_are_transitive_and_rooted_at_the_earliest_chunk():
+    # 2 matches 1 and 1 matches 0 through different bands; 2 and 0 share nothing
+    signatures = np.array([[1, 1, 2, 2], [1, 1, 3, 3], [4, 4, 3, 3]], dtype=np.uint64)
+    assert cluster_signatures(signatures, threshold=0.5, bands=2) == [0, 0, 0]
+
+
+def test_near_duplicate_texts_cluster_and_distinct_texts_do_not():
+    base = " ".join(f"word{index}" for index in range(200))
+    texts = [
+        base,
+        "A completely different paragraph about rate limits, retries and backoff with jitter.",
+        base.replace("word150", "changed"),
+        base,
+    ]
+    roots = cluster_signatures(minhash_signatures(texts), threshold=0.85)
+    assert roots == [0, 1, 0, 0]
+
+
+def test_empty_input():
+    assert cluster_signatures(np.zeros((0, 128), dtype=np.uint64), threshold=0.85) == []
+
+
+def test_dedup_keeps_the_first_chunk_of_each_cluster_with_its_weight():
+    base = " ".join(f"word{index}" for index in range(200))
+    chunks = ChunkList()
+    for text in [base, "Something else entirely, about caching.", base, base.replace("word7", "changed")]:
+        chunks.append(chunks.add_document(text), 0, len(text))
+    
+    update = dedup_chunks(State(input_type="text", content="", chunks=chunks, dedup=True, dedup_threshold=0.85))
+    assert update["chunks"].texts() == [base, "Something else entirely, about caching."]
+    assert update["chunk_weights"] == [3, 1]
+    assert update["duplicate_chunks"] == 2
+    
+    assert dedup_chunks(State(input_type="text", content="", chunks=chunks, dedup=False)) == {}
@@ -0,0 +1,101 @@
+"""
+Tests for TF-IDF TextRank ranking, salient chunk selection and extractive summaries.
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from src.nodes.extractive_node import (
+    extract_summary, get_summary_mode, select_salient_chunks, split_sentences, textrank_scores, tfidf_matrix
+)
+from src.pipeline import State, run_pipeline
+from src.utils.chunks import ChunkList
+
+TEXTS = [
+    "Rate limits slow the batch, so the scheduler retries with backoff.",
+    "The scheduler retries rate limited calls with jittered backoff.",
+    "Backoff and retries keep the scheduler within the rate limits.",
+    "Tomatoes grow best in warm soil with plenty of sun.",
+]
+
+
+def chunk_list(texts):
+    chunks = ChunkList()
+    for text in texts:
+        chunks.append(chunks.add_document(text), 0, len(text))
+    return chunks
+
+
+def test_tfidf_rows_are_normalized():
+    matrix = tfidf_matrix(TEXTS + [""])
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    assert np.allclose(norms, [1, 1, 1, 1, 0])
+
+
+def test_textrank_matches_pagerank_over_the_dense_similarity_graph():
+    matrix = tfidf_matrix(TEXTS)
+    similarity = (matrix @ matrix.T).toarray()
+    np.fill_diagonal(similarity, 0.0)
+    transition = similarity / similarity.sum(axis=1, keepdims=True)
+    expected = np.full(len(TEXTS), 1.0 / len(TEXTS))
+    for _ in range(200):
+        expected = 0.15 / len(TEXTS) + 0.85 * transition.T @ expected
+    
+    scores = textrank_scores(matrix)
+    assert scores == pytest.approx(expected / expected.sum(), abs=1e-5)
+    # The off-topic text is the least central
+    assert np.argmin(scores) == 3
+
+
+def test_unrelated_texts_rank_equally():
+    scores = textrank_scores(tfidf_matrix(["alpha beta", "gamma delta", "epsilon zeta"]))
+    assert scores == pytest.approx([1 / 3] * 3)
+    assert len(textrank_scores(tfidf_matrix([]))) == 0
+
+
+def test_split_sentences():
+    text = "First one.  Second\none?\n\nHeading\n\nThird!"
+    assert split_sentences(text) == ["First one.", "Second one?", "Heading", "Third!"]
+
+
+def test_salient_mode_keeps_top_chunks_within_budget_in_document_order():
+    state = State(
+        input_type="text", content="", chunks=chunk_list(TEXTS), chunk_weights=[1, 2, 1, 1],
+        summary_mode="salient", salient_token_budget=40
+    )
+    update = select_salient_chunks(state)
+    
+    kept = update["chunks"].texts()
+    assert 1 <= len(kept) < len(TEXTS) and TEXTS[3] not in kept
+    assert kept == [text for text in TEXTS if text in kept]
+    assert update["unselected_chunks"] == len(TEXTS) - len(kept)
+    assert update["chunk_weights"] == [[1, 2, 1, 1][TEXTS.index(text)] for text in kept]
+    
+    assert select_salient_chunks(State(input_type="text", content="", chunks=chunk_list(TEXTS))) == {}
+
+
+def test_extractive_summary_keeps_top_sentences_in_order():
+    documents = [Document(page_content=" ".join(TEXTS) + "\n\nShort heading\n\nMore about tomatoes and the warm summer sun in the garden.")]
+    update = extract_summary(State(input_type="text", content="", documents=documents, max_summary_length=2))
+    
+    sentences = split_sentences(documents[0].page_content)
+    summary = update["final_summary"]
+    chosen = [sentence for sentence in sentences if sentence in summary]
+    assert len(chosen) == 2 and "Short heading" not in chosen
+    assert summary == " ".join(chosen)
+    assert update["documents"] == []
+
+
+def test_unknown_summary_mode_is_rejected():
+    with pytest.raises(ValueError):
+        get_summary_mode(State(input_type="text", content="", summary_mode="abstract"))
+
+
+def test_extractive_pipeline_makes_no_llm_calls(fake_llm, stores, word_tokens):
+    final_state = asyncio.run(run_pipeline("text", " ".join(TEXTS * 3), summary_mode="extractive", max_summary_length=2))
+    
+    assert final_state["final_summary"]
+    assert fake_llm.counters["requests"] == 0
@@ -0,0 +1,117 @@
+"""
+Tests for hedged LLM calls: which request wins, what is cancelled and what is counted.
+"""
+
+import asyncio
+
+import pytest
+
+from src.utils.hedging import Hedger, LatencyWindow, percentile
+
+
+def make_hedger(delay: float = 0.05) -> Hedger:
+    """A hedger whose history is warm, so calls are hedged after ``delay`` seconds"""
+    window = LatencyWindow()
+    window.add(0.001)
+    return Hedger(window, min_samples=1, min_delay=delay)
+
+
+def request(result, delay: float, log: dict, name: str, error: Exception = None):
+    """A request recording whether it started, finished or was cancelled"""
+    
+    async def call():
+        log[name] = "started"
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            log[name] = "cancelled"
+            raise
+        log[name] = "finished"
+        if error is not None:
+            raise error
+        return result
+    
+    return call
+
+
+def test_percentile_is_nearest_rank():
+    assert percentile([5, 1, 3, 2, 4], 50) == 3
+    assert percentile([5, 1, 3, 2, 4], 95) == 5
+    assert percentile([7], 99) == 7
+
+
+def test_no_hedge_before_the_history_is_warm():
+    hedger = Hedger(LatencyWindow(), min_samples=20)
+    assert hedger.delay() is None
+
+
+def test_fast_primary_is_not_hedged():
+    hedger = make_hedger()
+    log = {}
+    result, backup_won = asyncio.run(hedger.run(request("primary", 0.0, log, "primary"), request("backup", 0.0, log, "backup")))
+    
+    assert (result, backup_won) == ("primary", False)
+    assert "backup" not in log
+    assert hedger.stats()["calls"] == 1
+    assert hedger.hedged == 0 and hedger.backup_wins == 0
+
+
+def test_backup_wins_and_primary_is_cancelled():
+    hedger = make_hedger()
+    log = {}
+    result, backup_won = asyncio.run(hedger.run(request("primary", 5.0, log, "primary"), request("backup", 0.01, log, "backup")))
+    
+    assert (result, backup_won) == ("backup", True)
+    assert log == {"primary": "cancelled", "backup": "finished"}
+    assert (hedger.calls, hedger.hedged, hedger.backup_wins) == (1, 1, 1)
+    # Only the completed backup request adds to the latency history
+    assert len(hedger.window.samples) == 2
+
+
+def test_primary_wins_after_hedging_and_backup_is_cancelled():
+    hedger = make_hedger()
+    log = {}
+    result, backup_won = asyncio.run(hedger.run(request("primary", 0.1, log, "primary"), request("backup", 5.0, log, "backup")))
+    
+    assert (result, backup_won) == ("primary", False)
+    assert log == {"primary": "finished", "backup": "cancelled"}
+    assert (hedger.calls, hedger.hedged, hedger.backup_wins) == (1, 1, 0)
+
+
+def test_failed_primary_falls_back_to_backup():
+    hedger = make_hedger()
+    log = {}
+    primary = request(None, 0.1, log, "primary", error=RuntimeError("primary failed"))
+    result, backup_won = asyncio.run(hedger.run(primary, request("backup", 0.2, log, "backup")))
+    
+    assert (result, backup_won) == ("backup", True)
+    assert hedger.backup_wins == 1
+
+
+def test_primary_error_is_raised_when_both_fail():
+    hedger = make_hedger()
+    log = {}
+    primary = request(None, 0.2, log, "primary", error=RuntimeError("primary failed"))
+    backup = request(None, 0.01, log, "backup", error=RuntimeError("backup failed"))
+    
+    with pytest.raises(RuntimeError, match="primary failed"):
+        asyncio.run(hedger.run(primary, backup))
+    assert hedger.backup_wins == 0
+    assert hedger.latencies == []
+
+
+def test_stats_estimate_latency_saved_by_backup_wins():
+    hedger = make_hedger()
+    # A few slow requests, too few to raise the p95 hedge delay
+    for _ in range(96):
+        hedger.window.add(0.001)
+    for _ in range(3):
+        hedger.window.add(2.0)
+    log = {}
+    asyncio.run(hedger.run(request("primary", 5.0, log, "primary"), request("backup", 0.01, log, "backup")))
+    
+    stats = hedger.stats()
+    assert stats["calls"] == 1 and stats["hedged"] == 1 and stats["backup_wins"] == 1
+    # The cancelled primary is estimated from earlier requests that ran at least as long
+    assert stats["p99_unhedged_ms"] == 2000.0
+    assert stats["p99_saved_ms"] > 0
@@ -0,0 +1,82 @@
+"""
+Tests for the persistent LLM response cache and its use by ``invoke_llm``.
+"""
+
+import asyncio
+import time
+
+from src.utils.llm import get_llm, invoke_llm
+from src.utils.llm_cache import LLMCache, get_llm_cache
+
+
+def test_round_trip_is_keyed_by_provider_model_temperature_and_prompt(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.sqlite"))
+    cache.set("model", 0.0, "prompt", "answer", provider="https://a/v1")
+    
+    assert cache.get("model", 0.0, "prompt", provider="https://a/v1") == "answer"
+    assert cache.get("model", 0.0, "prompt", provider="https://b/v1") is None
+    assert cache.get("other", 0.0, "prompt", provider="https://a/v1") is None
+    assert cache.get("model", 0.7, "prompt", provider="https://a/v1") is None
+    assert cache.get("model", 0.0, "prompt!", provider="https://a/v1") is None
+    assert cache.stats() == {"hits": 1, "misses": 4, "entries": 1}
+    cache.close()
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.sqlite"), ttl=0.05)
+    cache.set("model", 0.0, "prompt", "answer")
+    time.sleep(0.1)
+    
+    assert cache.get("model", 0.0, "prompt") is None
+    cache.evict()
+    assert cache.stats()["entries"] == 0
+    cache.close()
+
+
+def test_eviction_keeps_the_most_recently_used(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+    for index in range(3):
+        cache.set("model", 0.0, f"prompt {index}", f"answer {index}")
+        time.sleep(0.01)
+    cache.get("model", 0.0, "prompt 0")
+    cache.evict()
+    
+    assert cache.get("model", 0.0, "prompt 0") == "answer 0"
+    assert cache.get("model", 0.0, "prompt 1") is None
+    assert cache.get("model", 0.0, "prompt 2") == "answer 2"
+    cache.close()
+
+
+def test_entries_persist_across_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    first = LLMCache(path)
+    asyncio.run(first.aset("model", 0.0, "prompt", "answer"))
+    first.close()
+    
+    second = LLMCache(path)
+    assert asyncio.run(second.aget("model", 0.0, "prompt")) == "answer"
+    second.close()
+
+
+def test_repeated_prompts_skip_the_network(fake_llm, stores, monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "true")
+    
+    async def call_twice():
+        llm = get_llm(model="stub")
+        return [await invoke_llm(llm, "Summarize this."), await invoke_llm(llm, "Summarize this.")]
+    
+    first, second = asyncio.run(call_twice())
+    assert first == second
+    assert fake_llm.counters["requests"] == 1
+    assert get_llm_cache().stats()["hits"] == 1
+
+
+def test_endpoints_do_not_share_entries(fake_llm, stores, monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "true")
+    get_llm_cache().set("stub", 0.0, "Summarize this.", "from another endpoint", provider="https://elsewhere/v1")
+    
+    async def call():
+        return await invoke_llm(get_llm(model="stub"), "Summarize this.")
+    
+    assert asyncio.run(call()) != "from another endpoint"
+    assert fake_llm.counters["requests"] == 1
@@ -0,0 +1,54 @@
+"""
+Tests for PDF extraction in this process and in the worker pool, both of
+which must give the pages PyPDFLoader gives.
+"""
+
+import os
+
+import pypdf
+import pytest
+from langchain_community.document_loaders import PyPDFLoader
+
+from src.loaders.pdf_loader import PDFLoader, get_pdf_workers, page_batches
+
+SAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "samples")
+
+
+def pages(documents):
+    return [(document.page_content, document.metadata) for document in documents]
+
+
+@pytest.mark.parametrize("count, workers", [(1, 4), (10, 1), (64, 4), (65, 3), (1000, 8)])
+def test_page_batches_cover_the_pages_in_order(count, workers):
+    batches = page_batches(count, workers)
+    assert [page for start, stop in batches for page in range(start, stop)] == list(range(count))
+    assert len(batches) <= workers * 4
+
+
+def test_pool_is_opt_in(monkeypatch):
+    monkeypatch.delenv("PDF_WORKERS", raising=False)
+    assert get_pdf_workers() == 1
+    monkeypatch.setenv("PDF_WORKERS", "0")
+    assert get_pdf_workers() == (os.cpu_count() or 1)
+
+
+@pytest.mark.parametrize("name", ["business_ai.pdf", "drylab.pdf"])
+def test_in_process_extraction_matches_pypdfloader_and_parses_once(name, monkeypatch):
+    path = os.path.join(SAMPLES, name)
+    expected = pages(PyPDFLoader(path).load())
+    
+    opened = []
+    
+    class CountingReader(pypdf.PdfReader):
+        def __init__(self, *args, **kwargs):
+            opened.append(args[0])
+            super().__init__(*args, **kwargs)
+    
+    monkeypatch.setattr(pypdf, "PdfReader", CountingReader)
+    assert pages(PDFLoader(path, workers=1).load()) == expected
+    assert len(opened) == 1
+
+
+def test_pool_extraction_matches_pypdfloader():
+    path = os.path.join(SAMPLES, "drylab.pdf")
+    assert pages(PDFLoader(path, workers=2, min_pages=0).load()) == pages(PyPDFLoader(path).load())
@@ -0,0 +1,85 @@
+"""
+Tests for the pipelined node that overlaps loading, splitting and chunk summarization.
+"""
+
+import asyncio
+import random
+import re
+
+import pytest
+
+import src.nodes.pipelined_node as pipelined_node
+import src.nodes.summarize_node as summarize_node
+from src.nodes.pipelined_node import load_split_summarize
+from src.pipeline import State
+
+TEXT = " ".join(f"w{index}" for index in range(100))
+
+
+@pytest.fixture
+def stub_llm(fake_llm, monkeypatch):
+    """Answer each chunk with its first word after a random delay; records the peak calls in flight"""
+    calls = {"in_flight": 0, "peak": 0, "fail": set()}
+    rng = random.Random(0)
+    
+    async def invoke_llm(llm, prompt, hedger=None, **kwargs):
+        first = re.search(r"w\d+", prompt).group()
+        calls["in_flight"] += 1
+        calls["peak"] = max(calls["peak"], calls["in_flight"])
+        try:
+            await asyncio.sleep(rng.uniform(0, 0.01))
+        finally:
+            calls["in_flight"] -= 1
+        if first in calls["fail"]:
+            raise RuntimeError(f"no summary for {first}")
+        return first
+    
+    monkeypatch.setattr(summarize_node, "invoke_llm", invoke_llm)
+    return calls
+
+
+def run(content, input_type="text", **options):
+    state = State(
+        input_type=input_type, content=content, chunk_size=10, chunk_overlap=0,
+        max_concurrency=3, map_mode="chunk", hedge=False, pipelined=True, **options
+    )
+    return asyncio.run(load_split_summarize(state))
+
+
+def test_summaries_keep_chunk_order_within_the_concurrency_limit(stub_llm, word_tokens):
+    update = run(TEXT)
+    
+    assert update["summaries"] == [f"w{index}" for index in range(0, 100, 10)]
+    assert update["failed_chunks"] == []
+    assert 1 < stub_llm["peak"] <= 3
+
+
+def test_failed_chunks_are_reported_without_failing_the_run(stub_llm, word_tokens):
+    stub_llm["fail"].add("w30")
+    update = run(TEXT)
+    
+    assert len(update["summaries"]) == 9
+    assert update["failed_chunks"] == [{"index": 3, "error": "no summary for w30"}]
+
+
+def test_text_file_chunks_span_its_windows(stub_llm, word_tokens, tmp_path, monkeypatch):
+    monkeypatch.setenv("TEXT_STREAM_WINDOW_BYTES", "64")
+    path = tmp_path / "text.txt"
+    path.write_text(TEXT)
+    
+    # Windows end inside words, yet the chunks are those of the whole text
+    assert run(str(path), input_type="textfile")["summaries"] == run(TEXT)["summaries"]
+
+
+def test_loader_errors_are_load_failures(stub_llm, word_tokens, tmp_path):
+    with pytest.raises(Exception, match="^Failed to load content"):
+        run(str(tmp_path / "missing.txt"), input_type="textfile")
+
+
+def test_splitter_errors_keep_their_own_message(stub_llm, word_tokens, monkeypatch):
+    def split_documents(documents, chunk_size, chunk_overlap):
+        raise ValueError("cannot split")
+    
+    monkeypatch.setattr(pipelined_node, "split_documents", split_documents)
+    with pytest.raises(ValueError, match="^cannot split$"):
+        run(TEXT)
@@ -0,0 +1,91 @@
+"""
+Tests for strategy planning: stuffing small documents, deriving chunk sizes
+and estimating the calls of the map and reduce phases.
+"""
+
+import asyncio
+
+import pytest
+from langchain_core.documents import Document
+
+from src.nodes.planner_node import count_chunks, derive_chunk_size, estimate_reduce, plan_summary
+from src.pipeline import State, run_pipeline
+from src.utils.text_splitter import split_spans
+
+
+@pytest.fixture(autouse=True)
+def budgets(monkeypatch):
+    """A 4096-token context: documents up to 2048 tokens are stuffed, 2048 summary tokens per combine call"""
+    monkeypatch.setenv("LLM_CONTEXT_WINDOW", "4096")
+    for variable in [
+        "STUFF_TOKEN_BUDGET", "REDUCE_TOKEN_BUDGET", "PACK_TOKEN_BUDGET", "SUMMARY_STRATEGY", "SUMMARY_MODE",
+        "COMBINE_MODE", "MAP_MODE", "MIN_CHUNK_SIZE", "MAX_CHUNK_SIZE", "SPLITTER_BACKEND", "PACK_MAX_CHUNKS",
+    ]:
+        monkeypatch.delenv(variable, raising=False)
+
+
+def plan(tokens, **options):
+    # Four characters per estimated token
+    state = State(input_type="text", content="", documents=[Document(page_content="word " * (tokens * 4 // 5))], **options)
+    return plan_summary(state)
+
+
+@pytest.mark.parametrize("tokens", [0, 1, 9, 10, 11, 100, 101])
+@pytest.mark.parametrize("chunk_size, chunk_overlap", [(10, 0), (10, 3), (7, 6)])
+def test_count_chunks_matches_the_splitter(tokens, chunk_size, chunk_overlap):
+    spans = [(index, index + 1) for index in range(tokens)]
+    assert count_chunks([tokens], chunk_size, chunk_overlap) == len(split_spans(spans, chunk_size, chunk_overlap))
+
+
+def test_derived_chunk_size_is_rounded_and_clamped():
+    # 2048 // 60 = 34 target chunks: 10000 / 34 -> 295 + 15 overlap -> rounded up to 320
+    assert derive_chunk_size(10000, 15, 2048, 150, 2048) == 320
+    assert derive_chunk_size(100, 15, 2048, 150, 2048) == 150
+    assert derive_chunk_size(10 ** 6, 15, 2048, 150, 2048) == 2048
+
+
+def test_estimate_reduce_batches_like_the_combiner():
+    assert estimate_reduce(1, 600, "tree") == {"calls": 0, "levels": 0}
+    assert estimate_reduce(50, 600, "single") == {"calls": 1, "levels": 1}
+    # 10 summaries per call, then 4 partial summaries per call
+    assert estimate_reduce(25, 600, "tree") == {"calls": 4, "levels": 2}
+    # A trailing single summary is carried to the next level without a call
+    assert estimate_reduce(21, 600, "tree") == {"calls": 3, "levels": 2}
+
+
+def test_small_documents_are_stuffed():
+    result = plan(1000)
+    assert result["plan"]["strategy"] == "stuff" and result["plan"]["estimated_calls"] == 1
+    assert "chunk_size" not in result
+    
+    assert plan(1000, strategy="map_reduce")["plan"]["strategy"] == "map_reduce"
+    assert plan(0)["plan"]["strategy"] != "stuff"
+
+
+def test_large_documents_get_a_derived_chunk_size():
+    result = plan(10000)
+    assert result["chunk_size"] == 320
+    assert result["plan"]["chunks"] == count_chunks([10000], 320, 15)
+    assert result["plan"]["estimated_calls"] == result["plan"]["map_calls"] + result["plan"]["reduce_calls"]
+    
+    # A configured chunk size is kept
+    assert plan(10000, chunk_size=200)["chunk_size"] == 200
+
+
+def test_packed_and_salient_modes_need_fewer_map_calls():
+    full = plan(10000, chunk_size=200)["plan"]
+    packed = plan(10000, chunk_size=200, map_mode="packed")["plan"]
+    # 1024 pack tokens hold 5 chunks of 200
+    assert packed["map_calls"] == -(-full["map_calls"] // 5)
+    
+    salient = plan(10000, summary_mode="salient", salient_token_budget=1500)
+    assert salient["chunk_size"] == 150
+    assert salient["plan"]["map_calls"] == 10
+
+
+def test_stuffed_document_takes_one_llm_call(fake_llm, stores, word_tokens):
+    final_state = asyncio.run(run_pipeline("text", "A short note about the weekly planning meeting."))
+    
+    assert final_state["plan"]["strategy"] == "stuff"
+    assert final_state["final_summary"]
+    assert fake_llm.counters["requests"] == 1
@@ -0,0 +1,164 @@
+"""
+Tests for the LLM request scheduler: retries, Retry-After, AIMD concurrency and deadlines.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils.scheduler import AdaptiveConcurrency, LLMScheduler, TokenBucket, error_status, retry_after
+
+
+class APIError(Exception):
+    """Error shaped like the openai SDK's status errors"""
+    
+    def __init__(self, status_code: int, headers: dict = None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+def failing_call(errors, result="ok", delay=0.0):
+    """A call raising ``errors`` one per attempt, then returning ``result``; counts its attempts"""
+    attempts = []
+    
+    async def call():
+        attempts.append(time.monotonic())
+        if delay:
+            await asyncio.sleep(delay)
+        if len(attempts) <= len(errors):
+            raise errors[len(attempts) - 1]
+        return result
+    
+    return call, attempts
+
+
+def test_error_status_and_retry_after():
+    error = APIError(429, {"retry-after": "1.5"})
+    assert error_status(error) == 429
+    assert retry_after(error) == 1.5
+    assert retry_after(APIError(429, {"retry-after": "soon"})) is None
+    assert retry_after(APIError(429)) is None
+    assert error_status(ValueError()) is None
+
+
+def test_retries_rate_limits_honoring_retry_after():
+    scheduler = LLMScheduler(max_concurrency=4, backoff_base=10.0, timeout=5.0)
+    call, attempts = failing_call([APIError(429, {"retry-after": "0.05"}), APIError(429, {"retry-after": "0.05"})])
+    
+    assert asyncio.run(scheduler.run(call)) == "ok"
+    assert len(attempts) == 3
+    # Retry-After replaces the (much longer) jittered backoff
+    gaps = [later - earlier for earlier, later in zip(attempts, attempts[1:])]
+    assert all(0.04 <= gap < 1.0 for gap in gaps)
+
+
+def test_backoff_without_retry_after_is_capped_full_jitter():
+    scheduler = LLMScheduler(backoff_base=0.5, backoff_max=2.0)
+    error = APIError(503)
+    for attempt in range(6):
+        delay = scheduler.backoff(attempt, error)
+        assert 0.0 <= delay <= min(2.0, 0.5 * 2 ** attempt)
+
+
+def test_non_retryable_error_is_raised_at_once():
+    scheduler = LLMScheduler(max_retries=4, backoff_base=0.01)
+    call, attempts = failing_call([APIError(400)])
+    
+    with pytest.raises(APIError):
+        asyncio.run(scheduler.run(call))
+    assert len(attempts) == 1
+
+
+def test_gives_up_after_max_retries():
+    scheduler = LLMScheduler(max_retries=2, backoff_base=0.001)
+    call, attempts = failing_call([APIError(500)] * 5)
+    
+    with pytest.raises(APIError):
+        asyncio.run(scheduler.run(call))
+    assert len(attempts) == 3
+
+
+def test_rate_limit_halves_concurrency_once_per_burst():
+    scheduler = LLMScheduler(max_concurrency=8, timeout=5.0)
+    call, _ = failing_call([APIError(429, {"retry-after": "0"})] * 3)
+    
+    asyncio.run(scheduler.run(call))
+    # Three 429s within the cooldown count as one decrease, then one success adds 1/limit
+    assert scheduler.concurrency.limit == pytest.approx(4.0 + 1 / 4.0)
+    assert scheduler.concurrency.in_flight == 0
+
+
+def test_aimd_shrinks_to_minimum_and_grows_back_to_maximum():
+    async def scenario():
+        concurrency = AdaptiveConcurrency(8, minimum=2, cooldown=0.0)
+        for _ in range(5):
+            await concurrency.acquire()
+            await concurrency.release(rate_limited=True)
+        shrunk = concurrency.limit
+        
+        for _ in range(100):
+            await concurrency.acquire()
+            await concurrency.release(succeeded=True)
+        return shrunk, concurrency.limit
+    
+    shrunk, grown = asyncio.run(scenario())
+    assert shrunk == 2.0
+    assert grown == 8.0
+
+
+def test_adaptive_limit_bounds_calls_in_flight():
+    async def scenario():
+        concurrency = AdaptiveConcurrency(4)
+        concurrency.limit = 2.0
+        peak = 0
+        
+        async def call():
+            nonlocal peak
+            await concurrency.acquire()
+            peak = max(peak, concurrency.in_flight)
+            await asyncio.sleep(0.01)
+            # Without success or rate limit signals the limit stays put
+            await concurrency.release()
+        
+        await asyncio.gather(*(call() for _ in range(10)))
+        return peak
+    
+    assert asyncio.run(scenario()) == 2
+
+
+def test_deadline_interrupts_a_slow_call():
+    scheduler = LLMScheduler()
+    call, attempts = failing_call([], delay=5.0)
+    
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        asyncio.run(scheduler.run(call, timeout=0.1))
+    assert time.monotonic() - started < 1.0
+    assert len(attempts) == 1
+
+
+def test_deadline_covers_retries_and_backoff():
+    scheduler = LLMScheduler(max_retries=10)
+    # Retrying after Retry-After would pass the deadline, so the error is raised instead of waiting
+    call, attempts = failing_call([APIError(429, {"retry-after": "30"})])
+    
+    started = time.monotonic()
+    with pytest.raises(APIError):
+        asyncio.run(scheduler.run(call, timeout=0.5))
+    assert time.monotonic() - started < 1.0
+    assert len(attempts) == 1
+
+
+def test_token_bucket_waits_for_refill():
+    async def scenario():
+        bucket = TokenBucket(600, capacity=1)
+        started = time.monotonic()
+        await bucket.acquire()
+        await bucket.acquire()
+        return time.monotonic() - started
+    
+    # 600 per minute refills one token every 0.1 s
+    assert 0.08 <= asyncio.run(scenario()) < 1.0
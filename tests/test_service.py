@@ -0,0 +1,133 @@
+"""
+Tests for the HTTP service endpoints against the local stand-in LLM server.
+"""
+
+import asyncio
+import json
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.service import create_app
+
+TEXT = " ".join(f"Sentence {index} explains part {index} of the topic." for index in range(40))
+DEFAULTS = {"chunk_size": 60, "chunk_overlap": 5, "max_summary_length": 3, "strategy": "map_reduce"}
+
+
+def serve(scenario, **app_options):
+    """Run ``scenario(client, app)`` against a fresh service"""
+    async def main():
+        app = create_app(defaults=DEFAULTS, **app_options)
+        async with TestClient(TestServer(app)) as client:
+            return await scenario(client, app)
+    
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def slow_llm(fake_llm, monkeypatch):
+    """Keep jobs running long enough for later requests to find them queued or running"""
+    monkeypatch.setattr(fake_llm, "latency_ms", 300)
+    return fake_llm
+
+
+def test_submit_then_wait_for_the_result(fake_llm, stores, word_tokens):
+    async def scenario(client, app):
+        response = await client.post("/summaries", json={"input_type": "text", "content": TEXT})
+        assert response.status == 202
+        job = await response.json()
+        assert job["status"] == "queued" and not job["coalesced"]
+        
+        response = await client.get(f"/summaries/{job['job_id']}/result", params={"wait": "true"})
+        assert response.status == 200
+        result = await response.json()
+        assert result["status"] == "done" and result["summary"]
+        assert result["chunks"] > 1 and result["failed_chunks"] == []
+        
+        # A finished job replays its chunk summaries but not its streamed tokens
+        response = await client.get(f"/summaries/{job['job_id']}/events")
+        kinds = [json.loads(line)["event"] for line in (await response.text()).splitlines()]
+        assert kinds.count("chunk_summary") == result["chunks"]
+        assert kinds[-1] == "final" and "token" not in kinds
+        
+        assert (await client.get("/summaries/unknown")).status == 404
+        assert (await (await client.get("/health")).json())["inflight"] == 0
+    
+    serve(scenario)
+
+
+def test_identical_submissions_share_a_job(slow_llm, stores, word_tokens):
+    async def scenario(client, app):
+        body = {"input_type": "text", "content": TEXT}
+        first = await (await client.post("/summaries", json=body)).json()
+        second = await (await client.post("/summaries", json=body)).json()
+        other = await (await client.post("/summaries", json=dict(body, max_summary_length=2))).json()
+        
+        assert second["coalesced"] and second["job_id"] == first["job_id"]
+        assert second["submissions"] == 2
+        assert not other["coalesced"] and other["job_id"] != first["job_id"]
+        await app["service"].queue.join()
+    
+    serve(scenario)
+
+
+@pytest.mark.parametrize("body, message", [
+    ({"input_type": "text", "content": TEXT, "chunk_size": "many"}, "Invalid option 'chunk_size'"),
+    ({"input_type": "text", "content": TEXT, "hedge": "maybe"}, "Invalid option 'hedge'"),
+    ({"input_type": "video", "content": TEXT}, "input_type must be one of"),
+    ({"input_type": "pdf", "content": "report.pdf"}, "disabled"),
+    ({"input_type": "text", "content": TEXT, "run_id": "service-" + "0" * 32}, "needs checkpointing"),
+    ({"input_type": "text"}, "needs 'input_type' and 'content'"),
+])
+def test_invalid_submissions_are_rejected(fake_llm, stores, body, message):
+    async def scenario(client, app):
+        response = await client.post("/summaries", json=body)
+        assert response.status == 400
+        assert message in (await response.json())["error"]
+        assert not app["service"].jobs
+    
+    serve(scenario)
+
+
+def test_full_queue_answers_429_with_retry_after(slow_llm, stores, word_tokens):
+    async def scenario(client, app):
+        statuses = []
+        for index in range(3):
+            response = await client.post("/summaries", json={"input_type": "text", "content": f"{TEXT} {index}"})
+            statuses.append(response.status)
+            # Let the worker take the first job off the queue
+            await asyncio.sleep(0.05)
+        assert statuses == [202, 202, 429]
+        assert response.headers["Retry-After"] == "1"
+        await app["service"].queue.join()
+    
+    serve(scenario, workers=1, queue_size=1)
+
+
+def test_failed_job_resumes_under_its_run_id(fake_llm, stores, word_tokens, monkeypatch):
+    monkeypatch.setenv("CHECKPOINT_ENABLED", "true")
+    monkeypatch.setenv("LLM_MAX_RETRIES", "0")
+    
+    async def scenario(client, app):
+        fake_llm.error_rate = 1.0
+        job = await (await client.post("/summaries", json={"input_type": "text", "content": TEXT})).json()
+        assert job["run_id"] == "service-" + job["job_id"]
+        response = await client.get(f"/summaries/{job['job_id']}/result", params={"wait": "true"})
+        assert response.status == 500
+        
+        fake_llm.error_rate = 0.0
+        response = await client.post(f"/summaries/{job['job_id']}/resume")
+        assert response.status == 202
+        assert (await response.json())["attempts"] == 2
+        response = await client.get(f"/summaries/{job['job_id']}/result", params={"wait": "true"})
+        result = await response.json()
+        assert response.status == 200 and result["run_id"] == job["run_id"]
+        
+        # Finished jobs cannot be resumed, and a known run id is resumed through its job
+        assert (await client.post(f"/summaries/{job['job_id']}/resume")).status == 409
+        response = await client.post("/summaries", json={"input_type": "text", "content": TEXT, "run_id": job["run_id"]})
+        assert response.status == 400
+        response = await client.post("/summaries", json={"input_type": "text", "content": TEXT, "run_id": "batch-0123"})
+        assert "run id of a job of this service" in (await response.json())["error"]
+    
+    serve(scenario)
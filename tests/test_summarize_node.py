@@ -0,0 +1,84 @@
+"""
+Tests for packed map requests: grouping chunks, parsing the answers and
+failures of a whole pack.
+"""
+
+import asyncio
+
+import pytest
+
+import src.nodes.summarize_node as summarize_node
+from src.nodes.summarize_node import pack_chunks, parse_packed_summaries, summarize_chunks
+from src.pipeline import State
+from src.utils.chunks import ChunkList
+from src.utils.text_splitter import estimate_tokens
+
+TEXTS = [f"Section {index} describes one part of the topic in a few words." for index in range(6)]
+
+
+def packed_state(monkeypatch, pack_size=2):
+    chunks = ChunkList()
+    for text in TEXTS:
+        chunks.append(chunks.add_document(text), 0, len(text))
+    monkeypatch.setenv("PACK_MAX_CHUNKS", str(pack_size))
+    monkeypatch.setenv("PACK_TOKEN_BUDGET", "100000")
+    return State(
+        input_type="text", content="", chunks=chunks,
+        map_mode="packed", max_concurrency=4, hedge=False
+    )
+
+
+def test_parses_array_wrapped_in_code_fence_and_text():
+    response = 'Here you go:\n```json\n["First summary.", " Second summary. "]\n```'
+    assert parse_packed_summaries(response, 2) == ["First summary.", "Second summary."]
+
+
+@pytest.mark.parametrize("response", [
+    "",
+    "No JSON here.",
+    "] backwards [",
+    '["unterminated", "array"',
+    '["not", "valid" json]',
+    '["only one"]',
+    '["one", "two", "three"]',
+    '["one", 2]',
+    '["one", ""]',
+    '["one", "   "]',
+    '["one", null]',
+    '[["nested"], "two"]',
+])
+def test_malformed_answers_are_rejected(response):
+    assert parse_packed_summaries(response, 2) is None
+
+
+def test_packs_are_consecutive_and_bounded():
+    tokens = estimate_tokens(TEXTS[0])
+    assert pack_chunks(TEXTS, 2 * tokens, 10) == [[0, 1], [2, 3], [4, 5]]
+    assert pack_chunks(TEXTS, 100 * tokens, 4) == [[0, 1, 2, 3], [4, 5]]
+    # A chunk over the budget still gets a pack of its own
+    assert pack_chunks(TEXTS[:2], 1, 10) == [[0], [1]]
+
+
+def test_one_request_per_pack(fake_llm, stores, monkeypatch):
+    update = asyncio.run(summarize_chunks(packed_state(monkeypatch)))
+    
+    assert fake_llm.counters["requests"] == 3
+    assert len(update["summaries"]) == 6
+    assert update["failed_chunks"] == []
+
+
+def test_failed_pack_fails_only_its_own_chunks(fake_llm, stores, monkeypatch):
+    summarize_pack = summarize_node.summarize_pack
+    
+    async def failing_pack(llm, indices, texts, *args):
+        if indices[0] == 2:
+            raise RuntimeError("store unavailable")
+        return await summarize_pack(llm, indices, texts, *args)
+    
+    monkeypatch.setattr(summarize_node, "summarize_pack", failing_pack)
+    update = asyncio.run(summarize_chunks(packed_state(monkeypatch)))
+    
+    assert len(update["summaries"]) == 4
+    assert update["failed_chunks"] == [
+        {"index": 2, "error": "store unavailable"}, {"index": 3, "error": "store unavailable"},
+    ]
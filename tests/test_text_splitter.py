@@ -0,0 +1,88 @@
+"""
+Tests for token-window splitting into offset-based chunks, and for splitting
+a text that arrives piece by piece into the same chunks.
+
+Tokens are whitespace-separated words here, so the tests need no tokenizer model.
+"""
+
+import random
+import re
+
+import pytest
+from langchain_core.documents import Document
+
+from src.utils.text_splitter import StreamSplitter, split_documents, split_spans
+
+
+def word_offsets(text):
+    return [match.span() for match in re.finditer(r"\S+", text)]
+
+
+def whole(text: str, chunk_size: int, chunk_overlap: int):
+    return [text[start:end] for start, end in split_spans(word_offsets(text), chunk_size, chunk_overlap)]
+
+
+def make_text(words: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    separators = [" ", " ", " ", "\n", "\n\n", "  "]
+    return "".join(f"w{index}" + rng.choice(separators) for index in range(words)).rstrip()
+
+
+def streamed(text: str, chunk_size: int, chunk_overlap: int, piece_sizes):
+    splitter = StreamSplitter(chunk_size, chunk_overlap)
+    chunks = []
+    position = 0
+    for size in piece_sizes:
+        chunks.extend(splitter.feed(text[position:position + size]))
+        position += size
+    chunks.extend(splitter.feed(text[position:]))
+    return chunks + splitter.finish()
+
+
+def test_split_spans_windows_overlap():
+    text = "a b c d e f g"
+    assert whole(text, 3, 1) == ["a b c", "c d e", "e f g"]
+    assert whole(text, 4, 2) == ["a b c d", "c d e f", "e f g"]
+    assert whole("a b", 5, 1) == ["a b"]
+    assert whole("", 5, 1) == []
+
+
+def test_split_spans_rejects_overlap_not_below_size():
+    with pytest.raises(ValueError):
+        split_spans([(0, 1)], 3, 3)
+    with pytest.raises(ValueError):
+        StreamSplitter(3, 5)
+
+
+def test_split_documents_keeps_one_buffer_per_document(word_tokens):
+    documents = [
+        Document(page_content="one two three four five", metadata={"page": 1}),
+        Document(page_content="six seven", metadata={"page": 2}),
+    ]
+    chunks = split_documents(documents, chunk_size=3, chunk_overlap=1)
+    
+    assert chunks.texts() == ["one two three", "three four five", "six seven"]
+    assert [chunk.metadata["page"] for chunk in chunks] == [1, 1, 2]
+    # Chunks are offsets into the document text, not copies
+    assert chunks.buffers == [document.page_content for document in documents]
+    assert (chunks[1].start, chunks[1].end) == (8, 23)
+
+
+@pytest.mark.parametrize("chunk_size, chunk_overlap", [(10, 0), (10, 3), (7, 6), (50, 10)])
+@pytest.mark.parametrize("piece", [1, 5, 17, 64, 1000])
+def test_stream_matches_whole_text(word_tokens, chunk_size, chunk_overlap, piece):
+    text = make_text(300)
+    sizes = [piece] * (len(text) // piece)
+    assert streamed(text, chunk_size, chunk_overlap, sizes) == whole(text, chunk_size, chunk_overlap)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_stream_matches_whole_text_for_random_pieces(word_tokens, seed):
+    rng = random.Random(seed)
+    text = make_text(rng.randint(1, 400), seed)
+    sizes = [rng.randint(0, 40) for _ in range(len(text) // 10)]
+    assert streamed(text, 12, 4, sizes) == whole(text, 12, 4)
+
+
+def test_stream_of_whitespace_only_text_has_no_chunks(word_tokens):
+    assert streamed("   \n  ", 5, 1, [2, 2]) == []
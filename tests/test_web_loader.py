@@ -0,0 +1,123 @@
+"""
+Tests for the web loader: main-content extraction, and fetching pages from a
+local fixture server with ETag revalidation through the page cache.
+"""
+
+import pytest
+
+from benchmarks.bench_url import FixtureServer
+from src.loaders.web_loader import WebLoader, decode_html, extract_main_text, fetch, split_urls
+from src.utils.http_cache import HTTPCache, get_http_cache
+
+PAGE = """<html lang="en">
+<head>
+  <title>  Rate limits
+    and retries </title>
+  <meta name="description" content=" How to retry. ">
+  <script>var tracking = 1;</script>
+</head>
+<body>
+  <header><a href="/">Home</a></header>
+  <nav><ul><li><a href="/a">Guides</a></li><li><a href="/b">Reference</a></li></ul></nav>
+  <main>
+    <h1>Rate limits</h1>
+    <p>Requests over the limit are answered with status 429.</p>
+    <div class="share-buttons">Share on every network</div>
+    <ul><li><a href="/x">Related one</a></li><li><a href="/y">Related two</a></li></ul>
+  </main>
+  <footer>Copyright Acme</footer>
+</body>
+</html>"""
+
+
+@pytest.fixture
+def server():
+    server = FixtureServer().start()
+    yield server
+    server.stop()
+
+
+def test_main_text_drops_page_chrome():
+    text, metadata = extract_main_text(PAGE)
+    
+    assert "Requests over the limit are answered with status 429." in text
+    assert "Rate limits" in text
+    for boilerplate in ["tracking", "Guides", "Home", "Copyright", "Share on", "Related one"]:
+        assert boilerplate not in text
+    assert metadata == {"title": "Rate limits and retries", "description": "How to retry.", "language": "en"}
+
+
+def test_page_of_only_boilerplate_keeps_its_text():
+    text, _ = extract_main_text("<html><body><nav>Only navigation</nav></body></html>")
+    assert text == "Only navigation"
+    assert extract_main_text("  ") == ("", {})
+
+
+def test_decode_html_uses_the_declared_charset():
+    body = "<p>café</p>".encode("latin-1")
+    assert decode_html(body, "text/html; charset=ISO-8859-1") == "<p>café</p>"
+    assert decode_html(b'<meta charset="latin-1"><p>caf\xe9</p>', None).endswith("café</p>")
+
+
+def test_split_urls():
+    assert split_urls(" https://a.example\nhttps://b.example  ") == ["https://a.example", "https://b.example"]
+
+
+def test_unchanged_page_is_revalidated_instead_of_downloaded(server, stores):
+    url = f"{server.base_url}/docs_page.html"
+    
+    first = WebLoader([url]).load()[0]
+    assert first.metadata["source"] == url
+    assert first.metadata["title"].startswith("Rate limits and retries")
+    assert "sidebar-search" not in first.page_content
+    
+    second = WebLoader([url]).load()[0]
+    assert second.page_content == first.page_content
+    assert server.counters["requests"] == 2 and server.counters["not_modified"] == 1
+    assert get_http_cache().stats() == {"revalidated": 1, "fetched": 1, "entries": 1}
+
+
+def test_disabled_cache_downloads_every_time(server, stores, monkeypatch):
+    monkeypatch.setenv("URL_CACHE_ENABLED", "false")
+    url = f"{server.base_url}/docs_page.html"
+    
+    assert fetch(url)[0] == fetch(url)[0]
+    assert server.counters["not_modified"] == 0
+    assert get_http_cache() is None
+
+
+def test_several_urls_load_in_order(server, stores):
+    names = ["news_article.html", "docs_page.html", "blog_post.html", "docs_page.html?copy=2"]
+    urls = [f"{server.base_url}/{name}" for name in names]
+    
+    documents = WebLoader(urls, concurrency=2).load()
+    assert [document.metadata["source"] for document in documents] == urls
+    assert documents[1].page_content == documents[3].page_content
+    assert server.counters["requests"] == 4
+
+
+def test_missing_page_raises(server, stores):
+    import requests
+    
+    with pytest.raises(requests.HTTPError):
+        WebLoader([f"{server.base_url}/missing.html"]).load()
+
+
+def test_http_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(HTTPCache, "EVICT_INTERVAL", 3)
+    cache = HTTPCache(str(tmp_path / "pages.sqlite"), max_entries=2)
+    times = iter(range(100))
+    monkeypatch.setattr("src.utils.http_cache.time.time", lambda: next(times))
+    
+    cache.set("a", '"1"', None, "text/html", b"A")
+    cache.set("b", None, "Tue, 01 Jan 2030 00:00:00 GMT", None, b"B")
+    cache.touch("a")
+    cache.set("c", '"3"', None, "text/html", b"C")
+    
+    assert cache.get("b") is None
+    assert cache.get("a") == {"etag": '"1"', "last_modified": None, "content_type": "text/html", "body": b"A"}
+    assert cache.stats() == {"revalidated": 1, "fetched": 3, "entries": 2}
+    
+    cache.clear()
+    assert cache.get("a") is None and cache.stats()["entries"] == 0
+    cache.close()